@@ -0,0 +1,263 @@
+"""Offline end-to-end benchmark with deterministic fakes
+
+Runs the FastAPI app from main.py in-process (no server, no network, no
+OPENAI_API_KEY) with services.fakes.FakeEmbeddings and FakeStreamingChatModel
+standing in for OpenAI and FakeEncoding for tiktoken, inside a scratch
+directory so no real data is touched. A synthetic interview-question corpus
+is uploaded in steps; after each step it measures:
+
+- ingestion throughput through POST /documents/upload and the job queue
+- /qa/ask latency percentiles and throughput at each concurrency level
+- GET /stats/ and GET /documents/ (first page and a full walk) latency
+- peak resident memory of the process
+
+Results are printed as JSON (or written to --output) so runs can be
+compared between releases. Fake latencies make the numbers reflect the
+server's own overhead plus a fixed, reproducible model cost.
+
+    cd backend
+    python benchmark.py --corpus-sizes 50,200,800 --concurrency 1,8,32 --llm-token-delay 0.005
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import numpy as np
+
+from services.vector_store import VECTOR_BACKENDS
+from utils.config import Config
+
+TOPICS = ["python", "javascript", "react", "sql", "java", "docker", "networking", "algorithms"]
+UPLOAD_RETRY_DELAY = 0.05  # Seconds between retries when the ingestion queue is full
+JOB_POLL_INTERVAL = 0.01
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    return {f"p{p}": round(float(np.percentile(samples_ms, p)), 3) for p in (50, 95, 99)}
+
+def make_corpus(count: int, questions_per_document: int, rng: random.Random) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """Interview-style Q&A documents and the questions they answer"""
+    syllables = ["ka", "lo", "mi", "ten", "ra", "vo", "sel", "dun", "pe", "gri", "ox", "ul"]
+    vocabulary = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(2000)]
+
+    documents = []
+    questions = []
+    for i in range(count):
+        topic = TOPICS[i % len(TOPICS)]
+        lines = [f"{topic.upper()} INTERVIEW QUESTIONS {i}", ""]
+        for n in range(1, questions_per_document + 1):
+            terms = rng.sample(vocabulary, 3)
+            question = f"What is the difference between {terms[0]} and {terms[1]} in {topic} {terms[2]}?"
+            answer = " ".join(
+                " ".join(rng.sample(vocabulary, rng.randint(8, 16))).capitalize() + "."
+                for _ in range(rng.randint(2, 6))
+            )
+            lines += [f"{n}. {question}", f"Answer: {terms[0]} {answer}", ""]
+            questions.append(question)
+        documents.append((f"{topic}_{i}.txt", "\n".join(lines)))
+    return documents, questions
+
+async def timed(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> Tuple[float, httpx.Response]:
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000, response
+
+async def ingest(client: httpx.AsyncClient, documents: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Upload documents and wait for their ingestion jobs"""
+    start = time.perf_counter()
+    job_ids = []
+    for filename, text in documents:
+        while True:
+            response = await client.post(
+                "/documents/upload",
+                files={"file": (filename, text.encode("utf-8"), "text/plain")}
+            )
+            if response.status_code != 503:
+                break
+            await asyncio.sleep(UPLOAD_RETRY_DELAY)
+        response.raise_for_status()
+        job_ids.append(response.json()["job_id"])
+
+    chunks = 0
+    for job_id in job_ids:
+        while True:
+            job = (await client.get(f"/documents/jobs/{job_id}")).json()
+            if job["status"] in ("completed", "failed"):
+                break
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+        if job["status"] == "failed":
+            raise RuntimeError(f"Ingestion failed: {job['error']}")
+        chunks += job["chunk_count"]
+
+    elapsed = time.perf_counter() - start
+    return {
+        "documents": len(documents),
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "docs_per_second": round(len(documents) / elapsed, 2),
+        "chunks_per_second": round(chunks / elapsed, 1)
+    }
+
+async def ask_load(
+    client: httpx.AsyncClient,
+    questions: List[str],
+    requests: int,
+    concurrency: int,
+    rng: random.Random
+) -> Dict[str, Any]:
+    """``requests`` /qa/ask calls with ``concurrency`` in flight"""
+    slots = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+    no_answer = 0
+
+    async def ask(question: str):
+        nonlocal no_answer
+        async with slots:
+            elapsed_ms, response = await timed(client, "POST", "/qa/ask", json={"question": question})
+        samples.append(elapsed_ms)
+        if not response.json()["sources"]:
+            no_answer += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(rng.choice(questions)) for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "latency_ms": percentiles(samples),
+        "requests_per_second": round(requests / elapsed, 2),
+        "no_answer": no_answer
+    }
+
+async def endpoint_latency(client: httpx.AsyncClient, url: str, repeats: int) -> Dict[str, float]:
+    samples = [(await timed(client, "GET", url))[0] for _ in range(repeats)]
+    return percentiles(samples)
+
+async def walk_documents(client: httpx.AsyncClient, page_size: int) -> Dict[str, Any]:
+    """Time listing every document by following next_cursor"""
+    start = time.perf_counter()
+    pages = 0
+    cursor = None
+    while True:
+        params = {"limit": page_size, **({"cursor": cursor} if cursor else {})}
+        _, response = await timed(client, "GET", "/documents/", params=params)
+        pages += 1
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    return {"pages": pages, "ms": round((time.perf_counter() - start) * 1000, 3)}
+
+async def run(args) -> Dict[str, Any]:
+    # Imported after Config is set up so the app picks up the overrides
+    from main import app, lifespan
+
+    rng = random.Random(args.seed)
+    sizes = [int(size) for size in args.corpus_sizes.split(",")]
+    corpus, questions = make_corpus(max(sizes), args.questions_per_document, rng)
+
+    steps = []
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            indexed = 0
+            for size in sizes:
+                step: Dict[str, Any] = {"documents": size}
+                step["ingestion"] = await ingest(client, corpus[indexed:size])
+                indexed = size
+                asked = questions[:size * args.questions_per_document]
+                step["qa_ask"] = {
+                    f"concurrency_{concurrency}": await ask_load(client, asked, args.requests, concurrency, rng)
+                    for concurrency in (int(c) for c in args.concurrency.split(","))
+                }
+                step["stats_ms"] = await endpoint_latency(client, "/stats/", args.repeats)
+                step["documents_page_ms"] = await endpoint_latency(client, "/documents/", args.repeats)
+                step["documents_walk"] = await walk_documents(client, Config.DOCUMENTS_PAGE_SIZE)
+                step["peak_rss_mb"] = peak_rss_mb()
+                steps.append(step)
+
+        embeddings = app.state.services.rag_service.embedding_scheduler.embeddings
+        fake_calls = {"requests": embeddings.requests, "texts": embeddings.texts_embedded}
+
+    return {
+        "config": {
+            "backend": Config.VECTOR_BACKEND,
+            "seed": args.seed,
+            "questions_per_document": args.questions_per_document,
+            "requests": args.requests,
+            "llm_first_token_delay": Config.FAKE_LLM_FIRST_TOKEN_DELAY,
+            "llm_token_delay": Config.FAKE_LLM_TOKEN_DELAY,
+            "embedding_request_latency": Config.FAKE_EMBEDDING_REQUEST_LATENCY,
+            "embedding_text_latency": Config.FAKE_EMBEDDING_TEXT_LATENCY,
+            "answer_cache": Config.ANSWER_CACHE_ENABLED
+        },
+        "steps": steps,
+        "embedding_calls": fake_calls,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API offline with deterministic fake models")
+    parser.add_argument("--corpus-sizes", default="50,200,800", help="Documents indexed at each measurement step")
+    parser.add_argument("--questions-per-document", type=int, default=20)
+    parser.add_argument("--concurrency", default="1,8,32", help="Concurrent /qa/ask requests to measure")
+    parser.add_argument("--requests", type=int, default=200, help="/qa/ask requests per concurrency level")
+    parser.add_argument("--repeats", type=int, default=50, help="Requests per /stats/ and /documents/ measurement")
+    parser.add_argument("--backend", choices=VECTOR_BACKENDS, default=Config.VECTOR_BACKEND)
+    parser.add_argument("--llm-first-token-delay", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--llm-token-delay", type=float, default=0.0, help="Seconds per streamed token")
+    parser.add_argument("--embedding-request-latency", type=float, default=0.0, help="Seconds per embedding call")
+    parser.add_argument("--embedding-text-latency", type=float, default=0.0, help="Seconds per embedded text")
+    parser.add_argument("--answer-cache", action="store_true", help="Leave the answer cache on (repeat questions hit it)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    args = parser.parse_args()
+
+    Config.USE_FAKE_LLM = True
+    Config.USE_FAKE_EMBEDDINGS = True
+    # tiktoken would download its encodings on first use
+    Config.USE_FAKE_TOKENIZER = True
+    Config.FAKE_LLM_FIRST_TOKEN_DELAY = args.llm_first_token_delay
+    Config.FAKE_LLM_TOKEN_DELAY = args.llm_token_delay
+    Config.FAKE_EMBEDDING_REQUEST_LATENCY = args.embedding_request_latency
+    Config.FAKE_EMBEDDING_TEXT_LATENCY = args.embedding_text_latency
+    Config.ANSWER_CACHE_ENABLED = args.answer_cache
+    Config.ANSWER_CACHE_FILE = None
+    Config.VECTOR_BACKEND = args.backend
+    # Every store below is relative to the scratch directory
+    Config.EMBEDDING_CACHE_DIR = "embedding_cache"
+    Config.PDF_PARSE_WORKERS = 0
+
+    output = os.path.abspath(args.output) if args.output else None
+    cwd = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix="rag_benchmark_")
+    os.chdir(scratch)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        os.chdir(cwd)
+        if args.keep:
+            print(f"Scratch directory kept at {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    report = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+if __name__ == "__main__":
+    main()
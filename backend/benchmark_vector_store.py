@@ -0,0 +1,170 @@
+"""Benchmark the local vector index against Chroma
+
+Builds each backend from the same random unit vectors, then measures
+cold-load time (open + first query), query latency percentiles (unscoped
+and scoped to one document) and peak resident memory. Every phase runs in
+its own process so memory and load times are not shared between backends;
+the OS page cache is not dropped, so cold loads are "warm disk" numbers.
+
+    cd backend
+    python benchmark_vector_store.py --vectors 100000 --queries 200
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from langchain_chroma import Chroma
+
+from services.compaction import directory_size
+from services.local_vector_store import INDEX_MODES, LocalVectorStore
+from services.quantization import QUANTIZATION_METHODS
+from services.vector_store import VECTOR_BACKENDS
+from utils.config import Config
+
+BUILD_BATCH_SIZE = 5000  # Below Chroma's maximum upsert batch size
+CHUNKS_PER_DOCUMENT = 100
+
+def open_store(backend: str, directory: str, args):
+    if backend == "chroma":
+        return Chroma(collection_name="benchmark", persist_directory=directory)
+    return LocalVectorStore(
+        directory,
+        mode=args.mode,
+        ivf_min_vectors=args.ivf_min_vectors,
+        ivf_probes=Config.LOCAL_INDEX_IVF_PROBES,
+        quantization=args.quantization,
+        dimensions=args.dimensions,
+        pq_subvectors=Config.LOCAL_INDEX_PQ_SUBVECTORS,
+        rerank_factor=Config.LOCAL_INDEX_RERANK_FACTOR,
+        codec_train_min_vectors=Config.LOCAL_INDEX_CODEC_TRAIN_MIN_VECTORS
+    )
+
+def random_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def percentiles(samples_ms):
+    return {f"p{p}": round(float(np.percentile(samples_ms, p)), 3) for p in (50, 95, 99)}
+
+def build(backend: str, directory: str, args):
+    rng = np.random.default_rng(args.seed)
+    store = open_store(backend, directory, args)
+    start = time.perf_counter()
+    for first in range(0, args.vectors, BUILD_BATCH_SIZE):
+        count = min(BUILD_BATCH_SIZE, args.vectors - first)
+        rows = range(first, first + count)
+        store._collection.upsert(
+            ids=[f"v{i}" for i in rows],
+            embeddings=random_vectors(rng, count, args.dim).tolist(),
+            documents=[f"chunk {i}" for i in rows],
+            metadatas=[
+                {"document_id": f"doc{i // CHUNKS_PER_DOCUMENT}", "chunk_index": i % CHUNKS_PER_DOCUMENT}
+                for i in rows
+            ]
+        )
+    if isinstance(store, LocalVectorStore):
+        # Clustering and codec training run in the background; count them in the build
+        store._collection.wait_for_build()
+    build_seconds = time.perf_counter() - start
+    if isinstance(store, LocalVectorStore):
+        store.close()
+    return {"build_seconds": round(build_seconds, 2), "peak_rss_mb": peak_rss_mb()}
+
+def query(backend: str, directory: str, args):
+    queries = random_vectors(np.random.default_rng(args.seed + 1), args.queries, args.dim).tolist()
+    document_count = max(1, args.vectors // CHUNKS_PER_DOCUMENT)
+
+    start = time.perf_counter()
+    store = open_store(backend, directory, args)
+    store.similarity_search_by_vector_with_relevance_scores(queries[0], k=args.k)
+    cold_load_ms = (time.perf_counter() - start) * 1000
+
+    unscoped, scoped = [], []
+    for i, embedding in enumerate(queries):
+        start = time.perf_counter()
+        store.similarity_search_by_vector_with_relevance_scores(embedding, k=args.k)
+        unscoped.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        store.similarity_search_by_vector_with_relevance_scores(
+            embedding, k=args.k, filter={"document_id": f"doc{i % document_count}"}
+        )
+        scoped.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "cold_load_ms": round(cold_load_ms, 1),
+        "query_ms": percentiles(unscoped),
+        "scoped_query_ms": percentiles(scoped),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def run_phase(phase: str, backend: str, directory: str, argv):
+    """Run one phase of one backend in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *argv,
+         "--phase", phase, "--backend", backend, "--directory", directory],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the local vector index with Chroma")
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=Config.RETRIEVAL_K)
+    parser.add_argument("--mode", choices=INDEX_MODES, default=Config.LOCAL_INDEX_MODE)
+    parser.add_argument("--ivf-min-vectors", type=int, default=Config.LOCAL_INDEX_IVF_MIN_VECTORS)
+    parser.add_argument("--quantization", choices=QUANTIZATION_METHODS, default=Config.LOCAL_INDEX_QUANTIZATION)
+    parser.add_argument("--dimensions", type=int, default=Config.LOCAL_INDEX_DIMENSIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends", default=",".join(VECTOR_BACKENDS))
+    # Internal: used when the script re-invokes itself for one phase
+    parser.add_argument("--phase", choices=["build", "query"], help=argparse.SUPPRESS)
+    parser.add_argument("--backend", choices=VECTOR_BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        phase = build if args.phase == "build" else query
+        print(json.dumps(phase(args.backend, args.directory, args)))
+        return
+
+    argv = sys.argv[1:]
+    report = {
+        "vectors": args.vectors,
+        "dim": args.dim,
+        "k": args.k,
+        "local_index_mode": args.mode,
+        "local_index_quantization": args.quantization,
+        "local_index_dimensions": args.dimensions,
+        "backends": {}
+    }
+    workspace = tempfile.mkdtemp(prefix="vector_benchmark_")
+    try:
+        for backend in args.backends.split(","):
+            directory = os.path.join(workspace, backend)
+            built = run_phase("build", backend, directory, argv)
+            queried = run_phase("query", backend, directory, argv)
+            report["backends"][backend] = {
+                "build_seconds": built["build_seconds"],
+                "disk_mb": round(directory_size(directory) / 1024 / 1024, 1),
+                **queried
+            }
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
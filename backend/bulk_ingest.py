@@ -0,0 +1,292 @@
+"""Offline bulk indexing of directories and archives
+
+Walks directories and .zip / .tar(.gz, .bz2, .xz) archives, skips files whose
+bytes are already indexed, splits documents in parallel worker processes and
+embeds them in large batches through the same scheduler as uploads, writing
+vectors and document metadata straight into the configured stores. Stop the
+API server first.
+
+Each file's outcome is appended to a journal (--state-file). Re-running the
+same command after a crash skips the files already indexed and removes the
+partial vectors of documents that were in flight.
+
+    cd backend
+    python bulk_ingest.py ~/corpus ~/more.zip --processes 8 --concurrency 32
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+from services.chunking import StructuredChunker
+from services.fakes import FakeEmbeddings, FakeStreamingChatModel
+from services.rag_service import RAGService, load_pages, split_document
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+HASH_BLOCK_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 10  # Seconds between progress lines
+
+# Per worker process
+_chunker: Optional[StructuredChunker] = None
+
+def split_file(path: str, filename: str, document_id: str) -> List[Document]:
+    """Load and chunk one file; runs in a worker process"""
+    global _chunker
+    if _chunker is None:
+        _chunker = StructuredChunker(
+            Config.EMBEDDING_ENCODING,
+            chunk_tokens=Config.CHUNK_TOKENS,
+            min_chunk_tokens=Config.CHUNK_MIN_TOKENS,
+            max_overlap_tokens=Config.CHUNK_MAX_OVERLAP_TOKENS
+        )
+    pages = load_pages(path, filename)
+    return [chunk for chunks in split_document(pages, _chunker, filename, document_id) for chunk in chunks]
+
+def hash_file(path: str) -> Tuple[str, int]:
+    """SHA-256 of the file's bytes (as computed for uploads) and its size"""
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            hasher.update(block)
+            size += len(block)
+    return hasher.hexdigest(), size
+
+def is_supported(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in Config.ALLOWED_EXTENSIONS
+
+def is_archive(name: str) -> bool:
+    return name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def iter_sources(paths: List[str], staging_dir: str, skip: Set[str]) -> Iterator[Tuple[str, str, str, bool]]:
+    """(source id, filename, path on disk, temporary) for every supported file
+
+    Archive members are extracted one at a time into ``staging_dir`` and
+    identified as ``archive!member``. Sources in ``skip`` are not extracted.
+    """
+    def extract(source: str, name: str, stream) -> str:
+        path = os.path.join(staging_dir, f"{uuid.uuid4()}_{os.path.basename(name)}")
+        with stream, open(path, "wb") as out:
+            shutil.copyfileobj(stream, out, HASH_BLOCK_SIZE)
+        return path
+
+    def from_archive(archive_path: str) -> Iterator[Tuple[str, str, str, bool]]:
+        if zipfile.is_zipfile(archive_path):
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    source = f"{archive_path}!{info.filename}"
+                    if info.is_dir() or not is_supported(info.filename) or source in skip:
+                        continue
+                    yield source, os.path.basename(info.filename), extract(source, info.filename, archive.open(info)), True
+        else:
+            # Streamed in order, so compressed tarballs are read only once
+            with tarfile.open(archive_path, "r|*") as archive:
+                for member in archive:
+                    source = f"{archive_path}!{member.name}"
+                    if not member.isfile() or not is_supported(member.name) or source in skip:
+                        continue
+                    yield source, os.path.basename(member.name), extract(source, member.name, archive.extractfile(member)), True
+
+    def from_file(path: str) -> Iterator[Tuple[str, str, str, bool]]:
+        if is_archive(path):
+            yield from from_archive(path)
+        elif is_supported(path) and path not in skip:
+            yield path, os.path.basename(path), path, False
+
+    for root in paths:
+        root = os.path.abspath(root)
+        if not os.path.isdir(root):
+            yield from from_file(root)
+            continue
+        for directory, subdirectories, filenames in os.walk(root):
+            subdirectories.sort()
+            for name in sorted(filenames):
+                yield from from_file(os.path.join(directory, name))
+
+class Journal:
+    """Append-only JSON lines record of each source's outcome, replayed on resume"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.last: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by the crash
+                        continue
+                    self.last[entry["source"]] = entry
+        self._file = open(path, "a")
+
+    def finished(self) -> Set[str]:
+        """Sources indexed or found to be duplicates by an earlier run"""
+        return {source for source, entry in self.last.items() if entry["status"] in ("indexed", "duplicate")}
+
+    def interrupted(self) -> List[Tuple[str, str]]:
+        """(source, document id) of documents being written when an earlier run stopped"""
+        return [(source, entry["document_id"]) for source, entry in self.last.items() if entry["status"] == "started"]
+
+    def record(self, source: str, status: str, **fields):
+        entry = {"source": source, "status": status, **fields}
+        self.last[source] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+async def chunk_groups(chunks: List[Document]) -> AsyncIterator[List[Document]]:
+    for start in range(0, len(chunks), Config.INGEST_EMBED_GROUP_SIZE):
+        yield chunks[start:start + Config.INGEST_EMBED_GROUP_SIZE]
+
+async def run(args) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    threads = ThreadPoolExecutor(max_workers=Config.WORKER_THREADS, thread_name_prefix="bulk-ingest")
+    processes = ProcessPoolExecutor(max_workers=args.processes, mp_context=multiprocessing.get_context("spawn"))
+    staging_dir = tempfile.mkdtemp(prefix="bulk_ingest_")
+    journal = Journal(args.state_file)
+    rag_service = RAGService(
+        executor=threads,
+        embeddings=FakeEmbeddings(
+            request_latency=Config.FAKE_EMBEDDING_REQUEST_LATENCY,
+            text_latency=Config.FAKE_EMBEDDING_TEXT_LATENCY
+        ) if Config.USE_FAKE_EMBEDDINGS else None,
+        llm=FakeStreamingChatModel() if Config.USE_FAKE_LLM else None
+    )
+
+    counts = {"indexed": 0, "duplicate": 0, "failed": 0, "resumed": len(journal.finished())}
+    chunk_total = 0
+    seen_hashes: Set[str] = set()
+    started = time.time()
+    last_progress = started
+
+    def progress():
+        elapsed = time.time() - started
+        print(
+            f"{sum(counts.values()) - counts['resumed']} files, {counts['indexed']} indexed, "
+            f"{counts['duplicate']} duplicates, {counts['failed']} failed, "
+            f"{counts['indexed'] / elapsed:.1f} docs/s, {chunk_total / elapsed:.0f} chunks/s",
+            file=sys.stderr
+        )
+
+    async def ingest(source: str, filename: str, path: str, temporary: bool):
+        nonlocal chunk_total
+        try:
+            file_hash, file_size = await loop.run_in_executor(threads, hash_file, path)
+            existing = rag_service.documents.find_by_hash(file_hash)
+            if file_hash in seen_hashes or existing is not None:
+                counts["duplicate"] += 1
+                journal.record(source, "duplicate", document_id=existing and existing["id"])
+                return
+            seen_hashes.add(file_hash)
+
+            document_id = str(uuid.uuid4())
+            journal.record(source, "started", document_id=document_id)
+            chunks = await loop.run_in_executor(processes, split_file, path, filename, document_id)
+            result = await rag_service.ingest_file(
+                path,
+                filename,
+                file_hash,
+                file_size,
+                document_id=document_id,
+                chunk_groups=chunk_groups(chunks)
+            )
+            counts["indexed"] += 1
+            chunk_total += result["chunk_count"]
+            journal.record(source, "indexed", document_id=document_id, chunk_count=result["chunk_count"])
+        except Exception as e:
+            logger.exception("Failed to ingest %s", source)
+            counts["failed"] += 1
+            journal.record(source, "failed", error=str(e))
+        finally:
+            if temporary:
+                os.remove(path)
+
+    try:
+        for source, document_id in journal.interrupted():
+            document = rag_service.documents.get(document_id)
+            if document is not None:
+                # The metadata row is written last: the crash came after the document was stored
+                journal.record(source, "indexed", document_id=document_id, chunk_count=document["chunk_count"])
+                continue
+            # Vectors of documents cut off by a crash have no metadata row; remove them
+            await rag_service.discard_vectors(document_id)
+            journal.record(source, "failed", error="interrupted")
+
+        # Enough documents in flight to keep the workers and the embedding batches full
+        slots = asyncio.Semaphore(args.concurrency)
+        tasks: Set[asyncio.Task] = set()
+        sources = iter_sources(args.paths, staging_dir, journal.finished())
+        while True:
+            source = await loop.run_in_executor(threads, next, sources, None)
+            if source is None:
+                break
+            await slots.acquire()
+            task = asyncio.create_task(ingest(*source))
+            task.add_done_callback(lambda task: (tasks.discard(task), slots.release()))
+            tasks.add(task)
+            if time.time() - last_progress >= PROGRESS_INTERVAL:
+                progress()
+                last_progress = time.time()
+        await asyncio.gather(*tasks)
+        progress()
+    finally:
+        await rag_service.close()
+        journal.close()
+        processes.shutdown(cancel_futures=True)
+        threads.shutdown()
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    elapsed = time.time() - started
+    return {
+        **counts,
+        "chunks": chunk_total,
+        "seconds": round(elapsed, 2),
+        "docs_per_second": round(counts["indexed"] / elapsed, 2),
+        "chunks_per_second": round(chunk_total / elapsed, 1),
+        "embedding_scheduler": rag_service.embedding_scheduler.stats()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Index directories and archives without going through the API")
+    parser.add_argument("paths", nargs="+", help="Files, directories, .zip or .tar(.gz) archives")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2, help="Worker processes parsing documents")
+    parser.add_argument("--concurrency", type=int, default=32, help="Documents parsed or embedded at once")
+    parser.add_argument("--batch-size", type=int, default=2048, help="Chunks per embedding request")
+    parser.add_argument("--batch-wait", type=float, default=0.5, help="Seconds to wait for an embedding batch to fill")
+    parser.add_argument("--state-file", default="bulk_ingest_state.jsonl", help="Journal used to resume after a crash")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=Config.LOG_LEVEL,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+    # Larger batches than interactive uploads use; the keyword index is rebuilt
+    # from the vector store when the server starts, so it is not kept here
+    Config.EMBEDDING_BATCH_MAX_SIZE = args.batch_size
+    Config.EMBEDDING_BATCH_WAIT = args.batch_wait
+    Config.HYBRID_SEARCH = False
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
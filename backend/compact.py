@@ -0,0 +1,40 @@
+"""Offline vector store compaction
+
+Removes vectors whose document no longer exists in the metadata store and
+reports how much disk space was reclaimed. Stop the API server first.
+
+    cd backend
+    python compact.py [--dry-run] [--no-vacuum]
+"""
+import argparse
+import json
+
+from services.compaction import compact_collection
+from services.metadata_store import DocumentStore
+from services.vector_store import open_vector_store, vector_store_directory
+from utils.config import Config
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove orphaned vectors from the vector store")
+    parser.add_argument("--dry-run", action="store_true", help="Only report orphaned vectors")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip the VACUUM / vector file rewrite step")
+    args = parser.parse_args()
+
+    documents = DocumentStore(Config.METADATA_DB_FILE, legacy_json_path=Config.DOCUMENTS_METADATA_FILE)
+    live_document_ids = set(documents.ids())
+    documents.close()
+
+    # No embedding function is needed to list and delete vectors
+    db = open_vector_store()
+    report = compact_collection(
+        db._collection,
+        vector_store_directory(),
+        live_document_ids,
+        batch_size=Config.VECTOR_DELETE_BATCH_SIZE,
+        vacuum=not args.no_vacuum,
+        dry_run=args.dry_run
+    )
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Recall@k versus memory for compressed vector representations
+
+Loads the embeddings already stored in the configured vector store, uses a
+random sample of them as queries and compares each representation's top-k
+(with and without full-precision re-ranking) against exact float32 search.
+A query's own vector is excluded from both result lists.
+
+    cd backend
+    python evaluate_quantization.py --queries 200 --dimensions 1536,1024,512,256
+"""
+import argparse
+import json
+
+import numpy as np
+
+from services.quantization import QUANTIZATION_METHODS, Codec, make_codec, normalize
+from services.vector_store import open_vector_store
+from utils.config import Config
+
+PAGE_SIZE = 1000
+
+def load_vectors(limit: int) -> np.ndarray:
+    """Every stored embedding (up to ``limit``), as unit float32 rows"""
+    collection = open_vector_store()._collection
+    pages = []
+    offset = 0
+    while offset < limit:
+        page = collection.get(limit=min(PAGE_SIZE, limit - offset), offset=offset, include=["embeddings"])
+        if not len(page["ids"]):
+            break
+        pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+        offset += len(page["ids"])
+    if not pages:
+        raise SystemExit("The vector store is empty; upload some documents first")
+    return normalize(np.vstack(pages))
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+def evaluate(
+    vectors: np.ndarray,
+    query_rows: np.ndarray,
+    codec: Codec,
+    codes: np.ndarray,
+    k: int,
+    rerank_factor: int
+) -> float:
+    """Mean recall@k of the codec's results against exact search"""
+    recalls = []
+    for row in query_rows:
+        query = vectors[row]
+        exact = vectors @ query
+        exact[row] = -np.inf
+        truth = set(top_k(exact, k).tolist())
+
+        approximate = codec.scores(codes, query)
+        approximate[row] = -np.inf
+        if rerank_factor:
+            shortlist = top_k(approximate, min(k * rerank_factor, len(approximate) - 1))
+            found = shortlist[top_k(vectors[shortlist] @ query, k)]
+        else:
+            found = top_k(approximate, k)
+        recalls.append(len(truth & set(found.tolist())) / k)
+    return float(np.mean(recalls))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure recall@k against memory for compressed vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=Config.RETRIEVAL_K)
+    parser.add_argument("--methods", default=",".join(QUANTIZATION_METHODS))
+    parser.add_argument("--dimensions", default="1536,1024,512,256", help="Matryoshka truncations to try")
+    parser.add_argument("--rerank-factors", default=f"0,{Config.LOCAL_INDEX_RERANK_FACTOR}")
+    parser.add_argument("--pq-subvectors", type=int, default=Config.LOCAL_INDEX_PQ_SUBVECTORS)
+    parser.add_argument("--limit", type=int, default=200_000, help="Maximum number of stored vectors to load")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.limit)
+    count, dim = vectors.shape
+    if count <= args.k:
+        raise SystemExit(f"Need more than {args.k} stored vectors, found {count}")
+    rng = np.random.default_rng(args.seed)
+    query_rows = rng.choice(count, size=min(args.queries, count), replace=False)
+
+    results = []
+    for method in args.methods.split(","):
+        for dimensions in sorted({min(int(d), dim) for d in args.dimensions.split(",")}, reverse=True):
+            try:
+                codec = make_codec(method, dim, dimensions, args.pq_subvectors) or Codec(dim)
+            except ValueError as e:
+                results.append({"method": method, "dimensions": dimensions, "skipped": str(e)})
+                continue
+            if codec.needs_training:
+                codec.train(vectors[rng.choice(count, size=min(count, 65_536), replace=False)])
+            codes = codec.encode(vectors)
+
+            for rerank_factor in [int(f) for f in args.rerank_factors.split(",")]:
+                # Re-ranking exact float32 scores against themselves changes nothing
+                if codec.name == "none" and codec.dimensions == dim and rerank_factor:
+                    continue
+                results.append({
+                    "method": method,
+                    "dimensions": dimensions,
+                    "rerank_factor": rerank_factor,
+                    f"recall_at_{args.k}": round(
+                        evaluate(vectors, query_rows, codec, codes, args.k, rerank_factor), 4
+                    ),
+                    "bytes_per_vector": codec.bytes_per_vector,
+                    "compression": round(4 * dim / codec.bytes_per_vector, 1),
+                    "index_mb": round(codec.bytes_per_vector * count / 1024 / 1024, 2)
+                })
+
+    print(json.dumps({
+        "vectors": count,
+        "dim": dim,
+        "queries": len(query_rows),
+        "k": args.k,
+        "full_precision_mb": round(4 * dim * count / 1024 / 1024, 2),
+        "results": results
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,37 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from utils.config import Config
+from utils.upload_limit import UploadSizeLimitMiddleware
+from services.container import ServiceContainer
 
 # Import routes
-from routes import health, documents, qa, stats
+from routes import health, documents, qa, stats, metrics
+
+logging.basicConfig(
+    level=Config.LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build shared services once at startup and release them on shutdown"""
+    services = ServiceContainer()
+    await services.startup()
+    app.state.services = services
+    try:
+        yield
+    finally:
+        await services.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
     title=Config.API_TITLE,
     description=Config.API_DESCRIPTION,
-    version=Config.API_VERSION
+    version=Config.API_VERSION,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -21,12 +43,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads before Starlette spools them
+app.add_middleware(UploadSizeLimitMiddleware, path="/documents/upload")
+
 # Include routers
 app.include_router(health.router)
 app.include_router(documents.router)
 app.include_router(qa.router)
 app.include_router(stats.router)
+app.include_router(metrics.router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=Config.HOST, port=Config.PORT) 
\ No newline at end of file
+    uvicorn.run(app, host=Config.HOST, port=Config.PORT)
@@ -1,9 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
+from utils.config import Config
+
 class QuestionRequest(BaseModel):
     question: str
     document_ids: Optional[List[str]] = None
+    k: Optional[int] = Field(default=None, ge=1, le=Config.MAX_RETRIEVAL_K)
+    model: Optional[str] = None
 
 class DocumentInfo(BaseModel):
     id: str
@@ -1,45 +1,119 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+import os
+import hashlib
+from typing import Optional
+
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
 from services.rag_service import RAGService
+from services.container import get_rag_service, get_ingestion_jobs
+from services.ingestion_jobs import IngestionJobQueue, QueueFullError
 from models.schemas import QuestionRequest
+from utils.config import Config
 from utils.validators import validate_file_extension, validate_file_size
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
-rag_service = RAGService()
 
-@router.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
-    """Upload and process a document for RAG"""
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check: ``*`` or any listed tag equal to ``etag`` under weak comparison"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+@router.post("/upload", status_code=202)
+async def upload_document(
+    file: UploadFile = File(...),
+    rag_service: RAGService = Depends(get_rag_service),
+    ingestion_jobs: IngestionJobQueue = Depends(get_ingestion_jobs)
+):
+    """Upload a document and queue it for processing"""
     try:
         # Validate file
         validate_file_extension(file.filename)
         
-        # Process document
-        result = await rag_service.process_document(file)
+        # Spool the upload and hand it to the background workers
+        upload = await rag_service.save_upload(file)
+        try:
+            job = ingestion_jobs.submit(upload)
+        except QueueFullError as e:
+            os.remove(upload["path"])
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": str(Config.INGEST_RETRY_AFTER)}
+            )
         
-        return JSONResponse(content={
-            "message": "Document processed successfully",
-            "document_id": result["document_id"],
+        return JSONResponse(status_code=202, content={
+            "message": "Document queued for processing",
+            "job_id": job["id"],
             "filename": file.filename,
-            "chunks_created": result["chunk_count"],
-            "processing_time": result["processing_time"]
+            "status": job["status"],
+            "status_url": f"{router.prefix}/jobs/{job['id']}"
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    ingestion_jobs: IngestionJobQueue = Depends(get_ingestion_jobs)
+):
+    """Get status, stage timings and throughput of an ingestion job"""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(content=job)
+
 @router.get("/")
-async def get_documents():
-    """Get list of uploaded documents"""
+async def get_documents(
+    request: Request,
+    limit: int = Query(Config.DOCUMENTS_PAGE_SIZE, ge=1, le=Config.MAX_DOCUMENTS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("upload_date", description="upload_date or file_size"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,filename"),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """Get a page of uploaded documents"""
     try:
-        documents = await rag_service.get_documents()
-        return JSONResponse(content={"documents": documents})
+        # The listing only changes when documents are added or removed, so the
+        # corpus version and the query identify the response
+        etag = 'W/"{}"'.format(hashlib.sha1(
+            f"{rag_service.corpus_version}|{limit}|{cursor}|{sort}|{order}|{fields}".encode("utf-8")
+        ).hexdigest())
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        
+        field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        page = await rag_service.get_documents(
+            limit=limit,
+            cursor=cursor,
+            sort_by=sort,
+            descending=order == "desc",
+            fields=field_list
+        )
+        return JSONResponse(content=page, headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{document_id}")
-async def delete_document(document_id: str):
+async def delete_document(
+    document_id: str,
+    rag_service: RAGService = Depends(get_rag_service)
+):
     """Delete a document and its embeddings"""
     try:
         await rag_service.delete_document(document_id)
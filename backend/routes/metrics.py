@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from services.container import get_metrics
+from services.metrics import CONTENT_TYPE, Metrics
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics_text(metrics: Metrics = Depends(get_metrics)):
+    """Stage latencies, token counts and cache hit rates in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
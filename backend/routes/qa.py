@@ -1,26 +1,72 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from services.rag_service import RAGService
+from services.container import get_rag_service
 from models.schemas import QuestionRequest
 
 router = APIRouter(prefix="/qa", tags=["Question Answering"])
-rag_service = RAGService()
 
 @router.post("/ask")
-async def ask_question(request: QuestionRequest):
+async def ask_question(
+    request: QuestionRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
     """Ask a question using RAG"""
     try:
         result = await rag_service.ask_question(
             question=request.question,
-            document_ids=request.document_ids
+            document_ids=request.document_ids,
+            k=request.k,
+            model=request.model
         )
         
         return JSONResponse(content={
             "answer": result["answer"],
             "sources": result["sources"],
             "confidence_score": result["confidence_score"],
+            "cached": result["cached"],
             "processing_time": result["processing_time"]
         })
         
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out while answering the question")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/ask/stream")
+async def ask_question_stream(
+    request: QuestionRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """Ask a question and stream sources, answer tokens and timings over SSE"""
+    # Reject bad parameters before the stream starts
+    rag_service.validate_model(request.model)
+    
+    async def event_stream():
+        try:
+            async for event in rag_service.stream_answer(
+                question=request.question,
+                document_ids=request.document_ids,
+                k=request.k,
+                model=request.model
+            ):
+                yield _format_sse(event["event"], event["data"])
+        except asyncio.TimeoutError:
+            yield _format_sse("error", {"detail": "Timed out while answering the question"})
+        except Exception as e:
+            yield _format_sse("error", {"detail": f"Error processing question: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,16 +1,31 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from services.rag_service import RAGService
+from services.container import get_rag_service
 
 router = APIRouter(prefix="/stats", tags=["Statistics"])
-rag_service = RAGService()
 
 @router.get("/")
-async def get_stats():
+async def get_stats(rag_service: RAGService = Depends(get_rag_service)):
     """Get RAG system statistics"""
     try:
         stats = await rag_service.get_stats()
         return JSONResponse(content=stats)
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/documents/{document_id}")
+async def get_document_stats(
+    document_id: str,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """Get totals for a single document"""
+    try:
+        stats = await rag_service.get_document_stats(document_id)
+        return JSONResponse(content=stats)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
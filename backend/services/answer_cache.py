@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip("?!. ")
+
+class AnswerCache:
+    """Two-tier answer cache: exact normalized question, then embedding similarity
+
+    Entries are scoped (document filter, model, k) and tied to a corpus version,
+    expire after ``ttl_seconds`` and are evicted least-recently-used beyond
+    ``max_entries``. Question embeddings live in one preallocated matrix of unit
+    vectors, indexed per scope, so a semantic lookup is a single product over
+    the rows of its scope.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        similarity_threshold: float,
+        persist_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.persist_path = persist_path
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # (max_entries, dimensions), allocated with the first embedding
+        self._matrix: Optional[np.ndarray] = None
+        self._free_slots: List[int] = []
+        # Scope key -> matrix row -> entry key
+        self._scoped_slots: Dict[str, Dict[int, str]] = {}
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        if self.persist_path:
+            self._load()
+
+    def _key(self, question: str, scope: Sequence[Any], corpus_version: str) -> str:
+        """Exact-tier key over the normalized question, scope and corpus version"""
+        raw = json.dumps([normalize_question(question), list(scope), corpus_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _scope_key(self, scope: Sequence[Any], corpus_version: str) -> str:
+        return json.dumps([list(scope), corpus_version])
+
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return now - entry["created_at"] > self.ttl_seconds
+
+    def _store_vector(self, key: str, vector: np.ndarray, scope_key: str) -> Optional[int]:
+        """Copy a unit vector into a free matrix row; None if its size does not fit the matrix"""
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            self._free_slots = list(range(self.max_entries - 1, -1, -1))
+        if len(vector) != self._matrix.shape[1] or not self._free_slots:
+            # e.g. persisted under another embedding model
+            return None
+        slot = self._free_slots.pop()
+        self._matrix[slot] = vector
+        self._scoped_slots.setdefault(scope_key, {})[slot] = key
+        return slot
+
+    def _insert(self, key: str, entry: Dict[str, Any], vector: Optional[np.ndarray]):
+        """Add an entry as the most recently used, evicting the least recently used"""
+        if key in self._entries:
+            self._remove(key)
+        while len(self._entries) >= self.max_entries:
+            self._remove(next(iter(self._entries)))
+        entry["slot"] = None
+        if vector is not None:
+            entry["slot"] = self._store_vector(key, vector, self._scope_key(entry["scope"], entry["corpus_version"]))
+        self._entries[key] = entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        slot = entry["slot"]
+        if slot is not None:
+            scope_key = self._scope_key(entry["scope"], entry["corpus_version"])
+            slots = self._scoped_slots[scope_key]
+            del slots[slot]
+            if not slots:
+                del self._scoped_slots[scope_key]
+            self._free_slots.append(slot)
+
+    def get(self, question: str, scope: Sequence[Any], corpus_version: str) -> Optional[Dict[str, Any]]:
+        """Exact-match lookup; misses are recorded by the caller after both tiers"""
+        key = self._key(question, scope, corpus_version)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._is_expired(entry, time.time()):
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        self.exact_hits += 1
+        return entry["result"]
+
+    def get_similar(
+        self,
+        embedding: List[float],
+        scope: Sequence[Any],
+        corpus_version: str
+    ) -> Optional[Dict[str, Any]]:
+        """Semantic lookup: best cached question above the cosine threshold"""
+        slots = self._scoped_slots.get(self._scope_key(scope, corpus_version))
+        if not slots or len(embedding) != self._matrix.shape[1]:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        rows = np.fromiter(slots, dtype=np.intp, count=len(slots))
+        # One matrix-vector product over the preallocated rows, no copy of the candidates
+        similarities = (self._matrix @ query)[rows]
+
+        now = time.time()
+        expired = []
+        result = None
+        for position in np.argsort(-similarities):
+            if similarities[position] < self.similarity_threshold:
+                break
+            key = slots[int(rows[position])]
+            entry = self._entries[key]
+            if self._is_expired(entry, now):
+                expired.append(key)
+                continue
+            self._entries.move_to_end(key)
+            self.semantic_hits += 1
+            result = entry["result"]
+            break
+        for key in expired:
+            self._remove(key)
+        return result
+
+    def record_miss(self):
+        """Count a lookup that missed every tier"""
+        self.misses += 1
+
+    def put(
+        self,
+        question: str,
+        scope: Sequence[Any],
+        corpus_version: str,
+        result: Dict[str, Any],
+        embedding: Optional[List[float]] = None
+    ):
+        """Store an answer, evicting the least recently used entries"""
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            vector /= np.linalg.norm(vector) or 1.0
+
+        self._insert(self._key(question, scope, corpus_version), {
+            "scope": list(scope),
+            "corpus_version": corpus_version,
+            "created_at": time.time(),
+            "result": result
+        }, vector)
+
+    def invalidate(self):
+        """Drop every entry, e.g. after the corpus changed"""
+        self._entries.clear()
+        self._scoped_slots.clear()
+        if self._matrix is not None:
+            self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters for /stats"""
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def _load(self):
+        """Load unexpired entries from the persistence file"""
+        if not os.path.exists(self.persist_path):
+            return
+        with open(self.persist_path, "r") as f:
+            stored = json.load(f)
+
+        now = time.time()
+        for key, entry in stored.items():
+            if self._is_expired(entry, now):
+                continue
+            embedding = entry.pop("embedding")
+            self._insert(key, entry, np.asarray(embedding, dtype=np.float32) if embedding is not None else None)
+
+    def save(self):
+        """Write the cache to the persistence file, if one is configured"""
+        if not self.persist_path:
+            return
+        serializable = {}
+        for key, entry in self._entries.items():
+            slot = entry["slot"]
+            serializable[key] = {
+                **{field: value for field, value in entry.items() if field != "slot"},
+                "embedding": self._matrix[slot].tolist() if slot is not None else None
+            }
+
+        temp_path = f"{self.persist_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(serializable, f)
+        os.replace(temp_path, self.persist_path)
@@ -0,0 +1,151 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.documents import Document
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Identifier-looking terms: snake_case, dotted.names, calls(), camelCase, digits
+_IDENTIFIER_PATTERN = re.compile(r"[_.$#()\[\]]|\d|[a-z][A-Z]")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+def is_keyword_query(question: str, max_terms: int) -> bool:
+    """True for short exact-lookup queries (quoted text or code identifiers)
+
+    These are answered from the keyword index alone, without embedding the query.
+    """
+    stripped = question.strip()
+    if len(stripped) > 2 and stripped[0] == stripped[-1] and stripped[0] in "\"'`":
+        return True
+    terms = stripped.split()
+    return 0 < len(terms) <= max_terms and all(_IDENTIFIER_PATTERN.search(term) for term in terms)
+
+def _idf(total: int, frequency: int) -> float:
+    return math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+
+def chunk_key(document: Document) -> str:
+    """Stable identity of a chunk across the vector and keyword indexes"""
+    return f"{document.metadata.get('document_id')}:{document.metadata.get('chunk_index')}"
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int, rank_constant: int = 60) -> List[Document]:
+    """Merge ranked lists by summing 1 / (rank_constant + rank)"""
+    scores: Dict[str, float] = defaultdict(float)
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = chunk_key(document)
+            scores[key] += 1.0 / (rank_constant + rank)
+            if key in documents:
+                # Keep the first ranking's copy, with what later rankings know about it
+                # (e.g. its keyword relevance) added to the metadata
+                first = documents[key]
+                documents[key] = Document(page_content=first.page_content, metadata={**document.metadata, **first.metadata})
+            else:
+                documents[key] = document
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in best]
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring
+
+    Chunks are added and removed per document as the corpus changes; document
+    frequencies and the average chunk length are maintained incrementally.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ready = False
+
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._lengths: Dict[str, int] = {}
+        self._chunks: Dict[str, Document] = {}
+        self._by_document: Dict[str, Set[str]] = defaultdict(set)
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def add(self, chunks: Iterable[Document]):
+        """Index chunks; re-adding a chunk replaces it"""
+        with self._lock:
+            for chunk in chunks:
+                key = chunk_key(chunk)
+                if key in self._chunks:
+                    self._remove_chunk(key)
+
+                terms = Counter(tokenize(chunk.page_content))
+                for term, frequency in terms.items():
+                    self._postings[term][key] = frequency
+                length = sum(terms.values())
+                self._lengths[key] = length
+                self._total_length += length
+                self._chunks[key] = chunk
+                self._by_document[chunk.metadata.get("document_id")].add(key)
+
+    def _remove_chunk(self, key: str):
+        chunk = self._chunks.pop(key)
+        for term in set(tokenize(chunk.page_content)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(key)
+
+    def remove_document(self, document_id: str):
+        """Drop every chunk of a document"""
+        with self._lock:
+            for key in self._by_document.pop(document_id, set()):
+                self._remove_chunk(key)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        document_ids: Optional[Sequence[str]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Top-k chunks by BM25 score, optionally restricted to some documents"""
+        with self._lock:
+            if not self._chunks:
+                return []
+            allowed = None
+            if document_ids:
+                allowed = set()
+                for document_id in document_ids:
+                    allowed |= self._by_document.get(document_id, set())
+
+            total = len(self._chunks)
+            average_length = self._total_length / total
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = _idf(total, len(postings))
+                for key, frequency in postings.items():
+                    if allowed is not None and key not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / average_length)
+                    scores[key] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+            best = sorted(scores, key=scores.get, reverse=True)[:k]
+            return [(self._chunks[key], scores[key]) for key in best]
+
+    def query_weight(self, query: str) -> float:
+        """Score of an average-length chunk containing every query term once
+
+        Dividing ``search`` scores by it makes them comparable across queries:
+        roughly the IDF-weighted share of the query's terms a chunk matches.
+        Terms missing from the index count with the highest IDF.
+        """
+        with self._lock:
+            total = len(self._chunks)
+            return sum(_idf(total, len(self._postings.get(term, ()))) for term in set(tokenize(query)))
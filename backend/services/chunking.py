@@ -0,0 +1,248 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+
+from services.tokenizer import get_encoding
+
+# Boundary strengths: how good a place the start of a piece is to begin a new chunk
+_NEVER = -1    # e.g. between a heading or question and its body
+_SENTENCE = 0  # inside a paragraph
+_BLOCK = 1     # between paragraphs or list items
+_SECTION = 2   # before a heading or a new question
+
+_HEADING = re.compile(
+    r"^(#{1,6}\s+\S.*"                                # Markdown heading
+    r"|\d+(\.\d+)*\s+[A-Z][^.?!]{0,80}"               # 2.1 Numbered section
+    r"|[A-Z0-9][A-Z0-9 &/:,()\-]{3,80})$"             # ALL CAPS TITLE
+)
+_QUESTION = re.compile(
+    r"^((Q|Question|QUESTION)\s*\d*\s*[:.)\-]\s*\S.*"  # Q: / Q12. / Question 3:
+    r"|\d+\s*[.)]\s+.*\?"                             # 12. What is a closure?
+    r"|[A-Z][^.!]{0,200}\?)$"                         # Any short line ending in ?
+)
+_ANSWER = re.compile(r"^(A\s*\d*\s*:|(Ans|Answer|ANSWER)\b)")
+_LIST_ITEM = re.compile(r"^([-*•▪●◦]|\d+[.)]|[a-zA-Z][.)])\s+\S")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+
+@dataclass
+class _Piece:
+    """A contiguous span of one page, the unit chunks are assembled from"""
+    page: Document
+    start: int
+    end: int
+    tokens: int
+    boundary: int
+    heading: Optional[str] = None
+    # Where the page starts in the document's non-blank pages joined with newlines
+    page_offset: int = 0
+
+class StructuredChunker:
+    """Token-budgeted chunker that cuts at headings, questions, paragraphs and list items
+
+    Pages are segmented into blocks (headings, questions, answers, list items
+    and paragraphs). Blocks are packed into chunks of up to ``chunk_tokens``
+    tokens, cutting at the strongest boundary available once a chunk has at
+    least ``min_chunk_tokens``. A question is never separated from its answer
+    unless the pair alone is over budget. Overlap adapts to the cut: none at
+    a section boundary, up to ``max_overlap_tokens`` inside a paragraph.
+    Chunks may span pages; a chunk's ``page`` and ``start_index`` are those of
+    its first piece. Its text is a slice of the document's non-blank pages
+    joined with newlines, starting at ``document_index``.
+    """
+
+    def __init__(
+        self,
+        encoding_name: str,
+        chunk_tokens: int = 400,
+        min_chunk_tokens: int = 80,
+        max_overlap_tokens: int = 60
+    ):
+        self.encoding = get_encoding(encoding_name)
+        self.chunk_tokens = chunk_tokens
+        self.min_chunk_tokens = min_chunk_tokens
+        self.max_overlap_tokens = max_overlap_tokens
+
+    def _count(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def _blocks(self, text: str) -> Iterator[Dict[str, Any]]:
+        """Group lines into blocks, each with its offset and the strength of the boundary before it"""
+        block = None
+        previous = None  # Kind of the last block, remembered across blank lines
+        offset = 0
+        for line in text.splitlines(keepends=True):
+            stripped = line.strip()
+            line_start, offset = offset, offset + len(line)
+            if not stripped:
+                if block:
+                    yield block
+                block = None
+                continue
+
+            kind = None
+            if _QUESTION.match(stripped):
+                kind, boundary = "question", _SECTION
+            elif _HEADING.match(stripped) and len(stripped) <= 100:
+                kind, boundary = "heading", _SECTION
+            elif _ANSWER.match(stripped):
+                kind, boundary = "answer", _NEVER
+            elif _LIST_ITEM.match(stripped):
+                kind, boundary = "item", _BLOCK
+
+            if kind is None and block is not None and block["kind"] not in ("heading", "question"):
+                # A wrapped line continues the current paragraph or list item
+                block["end"] = line_start + len(line.rstrip())
+                continue
+            if block:
+                yield block
+            if kind is None:
+                kind, boundary = "text", _BLOCK
+            # Whatever follows a heading, and the answer to a question, stays attached to it
+            if previous == "heading" or (previous == "question" and kind != "question"):
+                boundary = _NEVER
+            previous = kind
+            block = {
+                "kind": kind,
+                "start": line_start + (len(line) - len(line.lstrip())),
+                "end": line_start + len(line.rstrip()),
+                "boundary": boundary
+            }
+        if block:
+            yield block
+
+    def _pieces(self, page: Document, heading: Optional[str], page_offset: int) -> Iterator[_Piece]:
+        """Blocks of a page, with paragraphs that are too long split into sentences"""
+        text = page.page_content
+        for block in self._blocks(text):
+            if block["kind"] == "heading":
+                heading = text[block["start"]:block["end"]].lstrip("# ").strip()
+            start, end = block["start"], block["end"]
+            tokens = self._count(text[start:end])
+            if tokens <= self.chunk_tokens // 2:
+                yield _Piece(page, start, end, tokens, block["boundary"], heading, page_offset)
+                continue
+
+            boundary = block["boundary"]
+            sentence_start = start
+            for match in _SENTENCE_END.finditer(text, start, end):
+                yield _Piece(
+                    page, sentence_start, match.start(),
+                    self._count(text[sentence_start:match.start()]), boundary, heading, page_offset
+                )
+                sentence_start, boundary = match.end(), _SENTENCE
+            yield _Piece(
+                page, sentence_start, end, self._count(text[sentence_start:end]), boundary, heading, page_offset
+            )
+
+    def _text(self, pieces: List[_Piece]) -> str:
+        """Original text from the first piece to the last, joining pages with a newline
+
+        Contiguous in the document's joined pages, so chunks of the same
+        document can be merged by ``document_index`` across page breaks.
+        """
+        first, last = pieces[0], pieces[-1]
+        pages = [first.page]
+        for piece in pieces:
+            if piece.page is not pages[-1]:
+                pages.append(piece.page)
+        if len(pages) == 1:
+            return first.page.page_content[first.start:last.end]
+        texts = [page.page_content for page in pages]
+        texts[0] = texts[0][first.start:]
+        texts[-1] = texts[-1][:last.end]
+        return "\n".join(texts)
+
+    def _chunk(self, pieces: List[_Piece]) -> Document:
+        first = pieces[0]
+        metadata = dict(first.page.metadata)
+        metadata["start_index"] = first.start
+        metadata["document_index"] = first.page_offset + first.start
+        if first.heading:
+            metadata["section"] = first.heading
+        return Document(page_content=self._text(pieces), metadata=metadata)
+
+    def _split_long_piece(self, piece: _Piece) -> List[_Piece]:
+        """Cut a single over-budget sentence into token windows"""
+        text = piece.page.page_content[piece.start:piece.end]
+        tokens = self.encoding.encode_ordinary(text)
+        pieces = []
+        offset = piece.start
+        for i in range(0, len(tokens), self.chunk_tokens):
+            window = tokens[i:i + self.chunk_tokens]
+            # Decoded lengths can drift from the source on split multi-byte characters
+            end = min(offset + len(self.encoding.decode(window)), piece.end)
+            if i + self.chunk_tokens >= len(tokens):
+                end = piece.end
+            pieces.append(_Piece(
+                piece.page, offset, end, len(window), piece.boundary if i == 0 else _SENTENCE, piece.heading,
+                piece.page_offset
+            ))
+            offset = end
+        return pieces
+
+    def _cut(self, pending: List[_Piece]) -> int:
+        """Where to end an over-budget chunk
+
+        The strongest (then latest) boundary that leaves at least
+        min_chunk_tokens and at most chunk_tokens in the chunk, else the
+        latest boundary that fits the budget.
+        """
+        best, best_boundary = None, None
+        fallback = 1
+        tokens = 0
+        for i, piece in enumerate(pending):
+            if tokens > self.chunk_tokens:
+                break
+            if i:
+                fallback = i
+                if tokens >= self.min_chunk_tokens and (best is None or piece.boundary >= best_boundary):
+                    best, best_boundary = i, piece.boundary
+            tokens += piece.tokens
+        return fallback if best is None else best
+
+    def _overlap(self, emitted: List[_Piece], boundary: int, room: int) -> List[_Piece]:
+        """Trailing pieces repeated at the start of the next chunk, sized by how hard the cut was"""
+        budget = self.max_overlap_tokens * (_SECTION - max(boundary, _SENTENCE)) // _SECTION
+        budget = min(budget, room)
+        overlap: List[_Piece] = []
+        used = 0
+        for piece in reversed(emitted):
+            if used + piece.tokens > budget:
+                break
+            overlap.insert(0, _Piece(
+                piece.page, piece.start, piece.end, piece.tokens, _NEVER, piece.heading, piece.page_offset
+            ))
+            used += piece.tokens
+        return overlap
+
+    def split(self, pages: Iterable[Document]) -> Iterator[List[Document]]:
+        """Yield the chunks completed by each page; a unit running onto the next page is carried over"""
+        pending: List[_Piece] = []
+        pending_tokens = 0
+        heading = None
+        page_offset = 0
+        for page in pages:
+            completed: List[Document] = []
+            has_pieces = False
+            for piece in self._pieces(page, heading, page_offset):
+                heading = piece.heading
+                has_pieces = True
+                for part in (self._split_long_piece(piece) if piece.tokens > self.chunk_tokens else [piece]):
+                    pending.append(part)
+                    pending_tokens += part.tokens
+                    while pending_tokens > self.chunk_tokens:
+                        cut = self._cut(pending)
+                        emitted, pending = pending[:cut], pending[cut:]
+                        completed.append(self._chunk(emitted))
+                        pending_tokens = sum(p.tokens for p in pending)
+                        overlap = self._overlap(emitted, pending[0].boundary, self.chunk_tokens - pending_tokens)
+                        pending = overlap + pending
+                        pending_tokens += sum(p.tokens for p in overlap)
+            # Blank pages have no pieces and are left out of the joined text
+            if has_pieces:
+                page_offset += len(page.page_content) + 1
+            yield completed
+        if pending:
+            yield [self._chunk(pending)]
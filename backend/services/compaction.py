@@ -0,0 +1,83 @@
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Set
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of all files under a directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def delete_ids(collection, ids: List[str], batch_size: int) -> int:
+    """Delete vectors by id in batches"""
+    for start in range(0, len(ids), batch_size):
+        collection.delete(ids=ids[start:start + batch_size])
+    return len(ids)
+
+def delete_document_vectors(collection, document_id: str, batch_size: int) -> int:
+    """Delete every vector tagged with ``document_id``, one batch at a time"""
+    deleted = 0
+    while True:
+        ids = collection.get(where={"document_id": document_id}, limit=batch_size, include=[])["ids"]
+        if not ids:
+            return deleted
+        collection.delete(ids=ids)
+        deleted += len(ids)
+
+def find_orphaned_ids(collection, live_document_ids: Set[str], batch_size: int) -> List[str]:
+    """Ids of vectors whose document is not in the metadata store"""
+    orphaned = []
+    offset = 0
+    while True:
+        page = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+        if not page["ids"]:
+            return orphaned
+        for vector_id, metadata in zip(page["ids"], page["metadatas"]):
+            if (metadata or {}).get("document_id") not in live_document_ids:
+                orphaned.append(vector_id)
+        offset += len(page["ids"])
+
+def compact_collection(
+    collection,
+    persist_directory: str,
+    live_document_ids: Iterable[str],
+    batch_size: int,
+    vacuum: bool = True,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """Remove orphaned vectors and report how much space was reclaimed"""
+    bytes_before = directory_size(persist_directory)
+    vectors_before = collection.count()
+
+    orphaned = find_orphaned_ids(collection, set(live_document_ids), batch_size)
+    if not dry_run:
+        delete_ids(collection, orphaned, batch_size)
+
+        # SQLite keeps freed pages until it is vacuumed; the local index
+        # also rewrites its vector file without the deleted rows
+        sqlite_path = os.path.join(persist_directory, "chroma.sqlite3")
+        if vacuum and hasattr(collection, "vacuum"):
+            collection.vacuum()
+            # Finish re-clustering now rather than on the server's first start
+            collection.wait_for_build()
+        elif vacuum and os.path.exists(sqlite_path):
+            connection = sqlite3.connect(sqlite_path)
+            try:
+                connection.execute("VACUUM")
+                # Chroma keeps its connection open, so the WAL would not be checkpointed on close
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                connection.close()
+
+    bytes_after = directory_size(persist_directory)
+    return {
+        "vectors_before": vectors_before,
+        "orphaned_vectors": len(orphaned),
+        "vectors_after": collection.count(),
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_reclaimed": bytes_before - bytes_after,
+        "dry_run": dry_run
+    }
@@ -0,0 +1,105 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import httpx
+from fastapi import Request
+
+from services.fakes import FakeEmbeddings, FakeStreamingChatModel
+from services.ingestion_jobs import IngestionJobQueue
+from services.metrics import Metrics, make_tracer
+from services.rag_service import RAGService
+from utils.config import Config
+
+class ServiceContainer:
+    """Application-scoped services shared by every router"""
+
+    def __init__(self):
+        self.http_client: Optional[httpx.Client] = None
+        self.http_async_client: Optional[httpx.AsyncClient] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        self.metrics: Optional[Metrics] = None
+        self.rag_service: Optional[RAGService] = None
+        self.ingestion_jobs: Optional[IngestionJobQueue] = None
+
+    async def startup(self):
+        """Create pooled clients and a single warmed-up RAG service"""
+        # Managed thread pool; also the loop default so LangChain's executor fallbacks use it
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.WORKER_THREADS,
+            thread_name_prefix="rag-worker"
+        )
+        asyncio.get_running_loop().set_default_executor(self.executor)
+        
+        # CPU-bound PDF text extraction; spawned so workers do not inherit the server's threads
+        if Config.PDF_PARSE_WORKERS > 0:
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=Config.PDF_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        self.metrics = Metrics(tracer=make_tracer(Config.TRACING_ENABLED))
+
+        limits = httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        )
+        self.http_client = httpx.Client(limits=limits, timeout=Config.HTTP_TIMEOUT)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=Config.HTTP_TIMEOUT)
+
+        self.rag_service = RAGService(
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            executor=self.executor,
+            process_pool=self.process_pool,
+            embeddings=FakeEmbeddings(
+                request_latency=Config.FAKE_EMBEDDING_REQUEST_LATENCY,
+                text_latency=Config.FAKE_EMBEDDING_TEXT_LATENCY
+            ) if Config.USE_FAKE_EMBEDDINGS else None,
+            llm=FakeStreamingChatModel(
+                first_token_delay=Config.FAKE_LLM_FIRST_TOKEN_DELAY,
+                token_delay=Config.FAKE_LLM_TOKEN_DELAY
+            ) if Config.USE_FAKE_LLM else None,
+            metrics=self.metrics
+        )
+        await self.rag_service.start()
+
+        self.ingestion_jobs = IngestionJobQueue(
+            self.rag_service,
+            jobs_file=Config.INGEST_JOBS_FILE,
+            spool_dir=Config.SPOOL_DIR,
+            max_queue_size=Config.INGEST_MAX_QUEUE_SIZE,
+            workers=Config.INGEST_WORKERS,
+            max_finished_jobs=Config.INGEST_MAX_FINISHED_JOBS
+        )
+        await self.ingestion_jobs.start()
+
+    async def shutdown(self):
+        """Persist service state and release pooled connections"""
+        if self.ingestion_jobs is not None:
+            await self.ingestion_jobs.stop()
+        if self.rag_service is not None:
+            await self.rag_service.close()
+        if self.http_async_client is not None:
+            await self.http_async_client.aclose()
+        if self.http_client is not None:
+            self.http_client.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+        self.rag_service = None
+
+def get_rag_service(request: Request) -> RAGService:
+    """FastAPI dependency returning the shared RAG service"""
+    return request.app.state.services.rag_service
+
+def get_ingestion_jobs(request: Request) -> IngestionJobQueue:
+    """FastAPI dependency returning the shared ingestion job queue"""
+    return request.app.state.services.ingestion_jobs
+
+def get_metrics(request: Request) -> Metrics:
+    """FastAPI dependency returning the shared metrics registry"""
+    return request.app.state.services.metrics
@@ -0,0 +1,55 @@
+import time
+from typing import Any, Dict, Optional
+
+class CorpusCounters:
+    """Corpus totals maintained incrementally on ingest and delete
+
+    Reads are O(1); ``reconcile`` periodically resets them from the stores in
+    case an update was missed (e.g. a crash between the vector write and the
+    metadata write). The bytes ingested are persisted by the metadata store.
+    """
+
+    def __init__(self):
+        self.documents = 0
+        self.chunks = 0
+        self.vectors = 0
+        self.corpus_bytes = 0
+        self.bytes_ingested = 0
+        self.last_reconciled: Optional[float] = None
+
+    def add_document(self, chunk_count: int, file_size: int):
+        self.documents += 1
+        self.chunks += chunk_count
+        self.corpus_bytes += file_size
+        self.bytes_ingested += file_size
+
+    def remove_document(self, chunk_count: int, file_size: int):
+        self.documents -= 1
+        self.chunks -= chunk_count
+        self.corpus_bytes -= file_size
+
+    def add_vectors(self, count: int):
+        self.vectors += count
+
+    def remove_vectors(self, count: int):
+        self.vectors -= count
+
+    def reconcile(self, documents: int, chunks: int, corpus_bytes: int, vectors: int, bytes_ingested: int):
+        """Reset totals from counts taken from the metadata and vector stores"""
+        self.documents = documents
+        self.chunks = chunks
+        self.corpus_bytes = corpus_bytes
+        self.vectors = vectors
+        self.bytes_ingested = bytes_ingested
+        self.last_reconciled = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current totals for /stats"""
+        return {
+            "total_documents": self.documents,
+            "total_chunks": self.chunks,
+            "vector_db_size": self.vectors,
+            "corpus_bytes": self.corpus_bytes,
+            "bytes_ingested": self.bytes_ingested,
+            "last_reconciled": self.last_reconciled
+        }
@@ -0,0 +1,277 @@
+import asyncio
+import contextvars
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.stores import BaseStore
+
+from services.metrics import Metrics
+from services.tokenizer import get_encoding
+
+class RateLimiter:
+    """Sliding one-minute window over request and token budgets"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._window: Deque[Tuple[float, int]] = deque()
+        self._window_tokens = 0
+        self._lock = asyncio.Lock()
+
+    def _expire(self, now: float):
+        while self._window and now - self._window[0][0] >= 60:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    async def acquire(self, tokens: int):
+        """Wait until one request of ``tokens`` fits in the budget"""
+        # A single batch larger than the whole budget still has to go out eventually
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if (len(self._window) < self.requests_per_minute
+                        and self._window_tokens + tokens <= self.tokens_per_minute):
+                    self._window.append((now, tokens))
+                    self._window_tokens += tokens
+                    return
+                await asyncio.sleep(max(60 - (now - self._window[0][0]), 0.01))
+
+class _PendingChunk:
+    """A chunk waiting for its embedding and vector store write"""
+
+    __slots__ = ("document", "tokens", "future")
+
+    def __init__(self, document: Document, tokens: int, future: asyncio.Future):
+        self.document = document
+        self.tokens = tokens
+        self.future = future
+
+class EmbeddingScheduler:
+    """Batches chunks from concurrent uploads into token-budgeted embedding requests
+
+    Batches are sent concurrently within a requests/tokens-per-minute budget,
+    retried with exponential backoff, and each finished batch is written to the
+    vector store in one call. Chunks already in the embedding cache skip the API.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        write_vectors: Callable[[List[Document], List[List[float]]], Awaitable[None]],
+        count_tokens: Callable[[List[str]], Awaitable[List[int]]],
+        cache_store: Optional[BaseStore[str, List[float]]] = None,
+        max_batch_tokens: int = 100_000,
+        max_batch_size: int = 512,
+        max_concurrency: int = 4,
+        requests_per_minute: int = 3000,
+        tokens_per_minute: int = 1_000_000,
+        max_retries: int = 5,
+        batch_wait: float = 0.05,
+        metrics: Optional[Metrics] = None
+    ):
+        self.embeddings = embeddings
+        self.write_vectors = write_vectors
+        self.count_tokens = count_tokens
+        self.cache_store = cache_store
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.batch_wait = batch_wait
+        self.metrics = metrics or Metrics()
+
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+        self._pending: Deque[_PendingChunk] = deque()
+        self._has_pending = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._batches: set = set()
+        # Batches and vector writes holding each document's chunks, see wait_for_document
+        self._document_tasks: Dict[str, Set[asyncio.Task]] = {}
+
+        self.batches_sent = 0
+        self.chunks_embedded = 0
+        self.chunks_from_cache = 0
+        self.retries = 0
+
+    async def embed_and_store(self, chunks: List[Document]) -> int:
+        """Embed and write ``chunks``; returns once all of them are in the vector store"""
+        if not chunks:
+            return 0
+        if self._dispatcher is None or self._dispatcher.done():
+            # Started in an empty context: batches mix chunks of many uploads, so their
+            # stage spans must not become children of whichever request came first
+            self._dispatcher = contextvars.Context().run(asyncio.create_task, self._dispatch())
+
+        texts = [chunk.page_content for chunk in chunks]
+
+        # Cached vectors are written straight away without an API call
+        cached = await self.cache_store.amget(texts) if self.cache_store is not None else [None] * len(chunks)
+        hits = [(chunk, vector) for chunk, vector in zip(chunks, cached) if vector is not None]
+        misses = [chunk for chunk, vector in zip(chunks, cached) if vector is None]
+        self.metrics.cache_lookups.inc(len(hits), cache="embedding", result="hit")
+        self.metrics.cache_lookups.inc(len(misses), cache="embedding", result="miss")
+        for start in range(0, len(hits), self.max_batch_size):
+            batch = hits[start:start + self.max_batch_size]
+            documents = [chunk for chunk, _ in batch]
+            # Shielded and tracked: if the caller is cancelled mid-write, a rollback
+            # waits for the write to land before deleting the document's vectors
+            write = asyncio.ensure_future(self.write_vectors(documents, [vector for _, vector in batch]))
+            self._track(write, documents)
+            await asyncio.shield(write)
+            self.chunks_from_cache += len(batch)
+
+        if not misses:
+            return len(chunks)
+
+        loop = asyncio.get_running_loop()
+        token_counts = await self.count_tokens([chunk.page_content for chunk in misses])
+        pending = [
+            _PendingChunk(chunk, tokens, loop.create_future())
+            for chunk, tokens in zip(misses, token_counts)
+        ]
+        self._pending.extend(pending)
+        self._has_pending.set()
+
+        try:
+            await asyncio.gather(*(item.future for item in pending))
+        except BaseException:
+            # Failed or cancelled: chunks of this call still queued or in other
+            # batches must not be written either
+            for item in pending:
+                item.future.cancel()
+            raise
+        return len(chunks)
+
+    def _next_batch(self) -> List[_PendingChunk]:
+        """Take chunks from the front of the queue up to the batch budget"""
+        batch: List[_PendingChunk] = []
+        tokens = 0
+        while self._pending and len(batch) < self.max_batch_size:
+            item = self._pending[0]
+            # The caller was cancelled (e.g. its upload failed): never embed or write it
+            if item.future.cancelled():
+                self._pending.popleft()
+                continue
+            if batch and tokens + item.tokens > self.max_batch_tokens:
+                break
+            batch.append(self._pending.popleft())
+            tokens += item.tokens
+        return batch
+
+    async def _dispatch(self):
+        """Form batches from every caller's chunks and send them concurrently"""
+        while True:
+            await self._has_pending.wait()
+            # Give concurrent uploads a moment to contribute to the same batch
+            await asyncio.sleep(self.batch_wait)
+
+            while self._pending:
+                await self._concurrency.acquire()
+                batch = self._next_batch()
+                if not batch:
+                    # Only chunks of cancelled callers were left
+                    self._concurrency.release()
+                    break
+                task = asyncio.create_task(self._run_batch(batch))
+                self._batches.add(task)
+                task.add_done_callback(self._batches.discard)
+                self._track(task, [item.document for item in batch])
+            self._has_pending.clear()
+
+    async def _run_batch(self, batch: List[_PendingChunk]):
+        """Embed one batch with retries, cache the vectors and write them in bulk"""
+        texts = [item.document.page_content for item in batch]
+        try:
+            tokens = sum(item.tokens for item in batch)
+            vectors = await self._embed_with_retry(texts, tokens)
+            self.metrics.tokens.inc(tokens, kind="embedding")
+            if self.cache_store is not None:
+                await self.cache_store.amset(list(zip(texts, vectors)))
+            # Skip chunks whose caller was cancelled while the batch was embedding
+            live = [i for i, item in enumerate(batch) if not item.future.cancelled()]
+            if live:
+                await self.write_vectors([batch[i].document for i in live], [vectors[i] for i in live])
+            self.batches_sent += 1
+            self.chunks_embedded += len(batch)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_result(None)
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+        finally:
+            self._concurrency.release()
+
+    async def _embed_with_retry(self, texts: List[str], tokens: int) -> List[List[float]]:
+        """Call the embedding API, backing off exponentially on failure"""
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(tokens)
+            try:
+                with self.metrics.stage("ingest", "embed"):
+                    return await self.embeddings.aembed_documents(texts)
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(min(2 ** attempt, 30) + random.uniform(0, 1))
+
+    def _track(self, task: asyncio.Task, documents: List[Document]):
+        """Register a batch or write under the documents its chunks belong to"""
+        document_ids = {document.metadata.get("document_id") for document in documents}
+        for document_id in document_ids:
+            self._document_tasks.setdefault(document_id, set()).add(task)
+
+        def untrack(_):
+            for document_id in document_ids:
+                tasks = self._document_tasks.get(document_id)
+                if tasks is not None:
+                    tasks.discard(task)
+                    if not tasks:
+                        del self._document_tasks[document_id]
+
+        task.add_done_callback(untrack)
+
+    async def wait_for_document(self, document_id: str):
+        """Wait until no batch or write holding ``document_id``'s chunks is still running
+
+        Call after cancelling a document's ``embed_and_store`` calls and before
+        deleting its vectors, so no write lands after the delete.
+        """
+        tasks = self._document_tasks.get(document_id)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stop(self):
+        """Stop dispatching and wait for in-flight batches"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Batching and retry counters"""
+        return {
+            "batches_sent": self.batches_sent,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_from_cache": self.chunks_from_cache,
+            "retries": self.retries,
+            "pending_chunks": len(self._pending)
+        }
+
+def token_counter(encoding_name: str) -> Callable[[List[str]], List[int]]:
+    """Count tokens per text with tiktoken (see services.tokenizer)"""
+    encoding = get_encoding(encoding_name)
+
+    def count(texts: List[str]) -> List[int]:
+        return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)]
+
+    return count
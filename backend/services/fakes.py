@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import math
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Local chat model that streams a canned answer word by word
+
+    Used for development and tests without OPENAI_API_KEY. ``token_delay`` adds
+    a pause before every token to simulate LLM generation speed.
+    """
+
+    model_name: str = "fake-chat"
+    response: str = "This is a fake answer generated locally for testing."
+    first_token_delay: float = 0.0
+    token_delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat"
+
+    def _tokens(self) -> List[str]:
+        """Split the response into word tokens that keep their spacing"""
+        words = self.response.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.first_token_delay + self.token_delay * len(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.first_token_delay + self.token_delay * len(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_delay)
+        for token in self._tokens():
+            time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_delay)
+        for token in self._tokens():
+            await asyncio.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic local embeddings: hashed bag-of-words unit vectors
+
+    Texts that share words get similar vectors, so retrieval over a fake
+    corpus behaves plausibly. ``request_latency`` (per call) and
+    ``text_latency`` (per input) simulate the embedding API's response time.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 1536,
+        request_latency: float = 0.0,
+        text_latency: float = 0.0,
+        model: str = "fake-embedding"
+    ):
+        self.dimensions = dimensions
+        self.request_latency = request_latency
+        self.text_latency = text_latency
+        self.model = model
+        self.requests = 0
+        self.texts_embedded = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()) or [text]:
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def _delay(self, count: int) -> float:
+        self.requests += 1
+        self.texts_embedded += count
+        return self.request_latency + self.text_latency * count
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._delay(len(texts)))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self._delay(len(texts)))
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+class FakeEncoding:
+    """Offline stand-in for a tiktoken encoding
+
+    tiktoken downloads its BPE files on first use, so runs without network
+    access tokenize locally instead: a word with its leading space, a
+    punctuation mark or a whitespace run is one token. Counts land close to
+    cl100k_base for English text, and decoding any run of tokens gives back
+    the exact text they came from, as the chunker relies on.
+    """
+
+    _PIECE = re.compile(r"\s?\w+|\s?[^\w\s]|\s+")
+
+    def __init__(self, name: str = "fake"):
+        self.name = name
+        self._ids: Dict[str, int] = {}
+        self._pieces: List[str] = []
+        self._lock = threading.Lock()
+
+    def _id(self, piece: str) -> int:
+        token = self._ids.get(piece)
+        if token is None:
+            with self._lock:
+                token = self._ids.get(piece)
+                if token is None:
+                    token = self._ids[piece] = len(self._pieces)
+                    self._pieces.append(piece)
+        return token
+
+    def encode_ordinary(self, text: str) -> List[int]:
+        return [self._id(piece) for piece in self._PIECE.findall(text)]
+
+    def encode(self, text: str, **kwargs: Any) -> List[int]:
+        return self.encode_ordinary(text)
+
+    def encode_ordinary_batch(self, texts: List[str], **kwargs: Any) -> List[List[int]]:
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode(self, tokens: List[int]) -> str:
+        return "".join(self._pieces[token] for token in tokens)
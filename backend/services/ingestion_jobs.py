@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from services.rag_service import RAGService
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue cannot accept more jobs"""
+
+class IngestionJobQueue:
+    """Background ingestion jobs run by a bounded pool of asyncio workers
+
+    Job state is written to ``jobs_file`` on every transition, so queued and
+    interrupted jobs are picked up again after a restart.
+    """
+
+    def __init__(
+        self,
+        rag_service: RAGService,
+        jobs_file: str,
+        spool_dir: str,
+        max_queue_size: int,
+        workers: int,
+        max_finished_jobs: int
+    ):
+        self.rag_service = rag_service
+        self.jobs_file = jobs_file
+        self.spool_dir = spool_dir
+        self.max_queue_size = max_queue_size
+        self.workers = workers
+        self.max_finished_jobs = max_finished_jobs
+
+        self.jobs: Dict[str, Dict[str, Any]] = self._load_jobs()
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    def _load_jobs(self) -> Dict[str, Dict[str, Any]]:
+        """Load job state from file"""
+        if os.path.exists(self.jobs_file):
+            with open(self.jobs_file, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def _save_jobs(self):
+        """Save job state to file, dropping the oldest finished jobs"""
+        finished = sorted(
+            (job for job in self.jobs.values() if job["status"] in ("completed", "failed")),
+            key=lambda job: job["finished_at"]
+        )
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job["id"]]
+
+        temp_path = f"{self.jobs_file}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.jobs, f)
+        os.replace(temp_path, self.jobs_file)
+
+    async def start(self):
+        """Re-queue jobs left over from a previous run and start the workers"""
+        pending = sorted(
+            (job for job in self.jobs.values() if job["status"] in ("queued", "running")),
+            key=lambda job: job["created_at"]
+        )
+        for job in pending:
+            if os.path.exists(job["file_path"]):
+                job.update({"status": "queued", "stage": None})
+                self._queue.put_nowait(job["id"])
+            else:
+                self._finish(job, error="Spooled file is missing after restart")
+        self._save_jobs()
+        self._sweep_spool_dir()
+
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    def _sweep_spool_dir(self):
+        """Remove spooled files no queued job refers to, e.g. after a crash mid-upload"""
+        if not os.path.isdir(self.spool_dir):
+            return
+        referenced = {
+            os.path.abspath(job["file_path"])
+            for job in self.jobs.values()
+            if job["status"] in ("queued", "running")
+        }
+        for name in os.listdir(self.spool_dir):
+            path = os.path.abspath(os.path.join(self.spool_dir, name))
+            if path not in referenced and os.path.isfile(path):
+                os.remove(path)
+
+    async def stop(self):
+        """Stop the workers; unfinished jobs stay queued for the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._save_jobs()
+
+    def submit(self, upload: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a spooled upload for ingestion"""
+        if self._queue.qsize() >= self.max_queue_size:
+            raise QueueFullError("Ingestion queue is full, retry later")
+
+        job_id = str(uuid.uuid4())
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "stage": None,
+            "filename": upload["filename"],
+            "file_path": upload["path"],
+            "file_hash": upload["file_hash"],
+            "file_size": upload["file_size"],
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "document_id": None,
+            "chunk_count": None,
+            "duplicate": None,
+            "stage_timings": {},
+            "throughput": None,
+            "error": None
+        }
+        self.jobs[job_id] = job
+        self._save_jobs()
+        self._queue.put_nowait(job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job's public fields and the current queue depth"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        public = {key: value for key, value in job.items() if key != "file_path"}
+        return {**public, "queue_size": self._queue.qsize()}
+
+    def _set_stage(self, job: Dict[str, Any], stage: str):
+        job["stage"] = stage
+
+    def _finish(self, job: Dict[str, Any], result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """Record the outcome of a job"""
+        job["finished_at"] = time.time()
+        job["stage"] = None
+        if error is not None:
+            job.update({"status": "failed", "error": error})
+            return
+
+        elapsed = max(job["finished_at"] - job["started_at"], 1e-6)
+        job.update({
+            "status": "completed",
+            "document_id": result["document_id"],
+            "chunk_count": result["chunk_count"],
+            "duplicate": result["duplicate"],
+            "stage_timings": result["stage_timings"],
+            "throughput": {
+                "bytes_per_second": round(job["file_size"] / elapsed, 1),
+                "chunks_per_second": round(result["chunk_count"] / elapsed, 2)
+            }
+        })
+
+    async def _worker(self):
+        """Run queued jobs one at a time"""
+        while True:
+            job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+
+            job.update({"status": "running", "started_at": time.time()})
+            self._save_jobs()
+            try:
+                result = await self.rag_service.ingest_file(
+                    job["file_path"],
+                    job["filename"],
+                    job["file_hash"],
+                    job["file_size"],
+                    on_stage=lambda stage, job=job: self._set_stage(job, stage)
+                )
+                self._finish(job, result=result)
+            except asyncio.CancelledError:
+                # Shutting down: leave the job to be re-queued on the next start
+                job.update({"status": "queued", "stage": None})
+                raise
+            except Exception as e:
+                logger.exception("Ingestion job %s failed", job["id"])
+                self._finish(job, error=str(e))
+
+            if os.path.exists(job["file_path"]):
+                os.remove(job["file_path"])
+            self._save_jobs()
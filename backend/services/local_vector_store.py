@@ -0,0 +1,687 @@
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from services.quantization import Codec, make_codec, normalize
+
+logger = logging.getLogger(__name__)
+
+# "flat" always scans every vector; "ivf" switches to cluster probing once the index is large
+INDEX_MODES = ["flat", "ivf"]
+
+# Rows scored per NumPy call when scanning the index
+_SCAN_BLOCK_ROWS = 8192
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest finite scores, best first"""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top[np.isfinite(scores[top])]
+
+def _scan(array: np.ndarray, rows: Optional[np.ndarray], score, block_rows: int = _SCAN_BLOCK_ROWS) -> np.ndarray:
+    """Score ``rows`` of ``array`` (every row when None) one block at a time"""
+    total = len(array) if rows is None else len(rows)
+    scores = np.empty(total, dtype=np.float32)
+    for start in range(0, total, block_rows):
+        stop = min(start + block_rows, total)
+        scores[start:stop] = score(array[start:stop] if rows is None else array[rows[start:stop]])
+    return scores
+
+def _document_ids(where: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """Document ids selected by a Chroma-style ``document_id`` where-clause"""
+    if not where:
+        return None
+    if set(where) != {"document_id"}:
+        raise ValueError("Only document_id filters are supported by the local vector index")
+    value = where["document_id"]
+    if isinstance(value, dict):
+        if set(value) != {"$in"}:
+            raise ValueError("Only equality and $in document_id filters are supported")
+        return list(value["$in"])
+    return [value]
+
+class LocalVectorIndex:
+    """Vector index on a memory-mapped float32 matrix, with a Chroma-collection-like API
+
+    Vectors are appended to a raw row-major file that is memory-mapped for
+    search; ids, texts and metadata live in SQLite next to it. Deleting a
+    vector only drops its SQLite row, and the dead matrix row is reclaimed by
+    ``vacuum``. Search is a vectorized brute-force scan, or an IVF scan over
+    the ``probes`` closest k-means clusters once the index is large.
+
+    With a compressed representation (int8, product quantization and/or
+    Matryoshka truncation) the scan runs over a much smaller codes file and
+    the best ``k * rerank_factor`` candidates are re-scored against the
+    full-precision vectors, which are only read for those rows.
+
+    Clustering, codec training and re-encoding run on a background thread
+    over a snapshot of the index, so searches and writes are never blocked
+    by them; until their results are installed queries scan every vector
+    at full precision.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        mode: str = "ivf",
+        ivf_min_vectors: int = 50_000,
+        ivf_probes: int = 8,
+        quantization: str = "none",
+        dimensions: Optional[int] = None,
+        pq_subvectors: int = 64,
+        rerank_factor: int = 4,
+        codec_train_min_vectors: int = 10_000
+    ):
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Unknown index mode {mode}. Allowed: {INDEX_MODES}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.mode = mode
+        self.ivf_min_vectors = ivf_min_vectors
+        self.ivf_probes = ivf_probes
+        self.quantization = quantization
+        self.dimensions = dimensions
+        self.pq_subvectors = pq_subvectors
+        self.rerank_factor = rerank_factor
+        self.codec_train_min_vectors = codec_train_min_vectors
+
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._centroids_path = os.path.join(directory, "centroids.npy")
+        self._codes_path = os.path.join(directory, "codes.bin")
+        self._codec_state_path = os.path.join(directory, "codec.npz")
+        self._lock = threading.RLock()
+        # Background build; results are discarded if vacuum renumbered rows meanwhile
+        self._builder: Optional[threading.Thread] = None
+        self._build_requested = False
+        self._generation = 0
+        self._closed = False
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        self._load()
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS vectors (
+                    id TEXT PRIMARY KEY,
+                    row INTEGER NOT NULL UNIQUE,
+                    document_id TEXT,
+                    list_id INTEGER,
+                    text TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_vectors_document_id ON vectors (document_id)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _setting(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_setting(self, key: str, value: Optional[str]):
+        with self._conn:
+            if value is None:
+                self._conn.execute("DELETE FROM settings WHERE key = ?", (key,))
+            else:
+                self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+    def _load(self):
+        """Map the vector file and rebuild the live-row mask and cluster assignments"""
+        dim = self._setting("dim")
+        self.dim: Optional[int] = int(dim) if dim else None
+
+        # Rows past the last committed one (a crash mid-write) are simply dead
+        rows = 0
+        if self.dim and os.path.exists(self._vectors_path):
+            rows = os.path.getsize(self._vectors_path) // (4 * self.dim)
+        self._rows = rows
+        self._matrix = self._map(rows)
+
+        self._live = np.zeros(rows, dtype=bool)
+        self._lists = np.full(rows, -1, dtype=np.int32)
+        assigned = np.array(
+            self._conn.execute("SELECT row, COALESCE(list_id, -1) FROM vectors").fetchall(),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        assigned = assigned[assigned[:, 0] < rows]
+        self._live[assigned[:, 0]] = True
+        self._lists[assigned[:, 0]] = assigned[:, 1]
+
+        self._centroids = np.load(self._centroids_path) if os.path.exists(self._centroids_path) else None
+        self._load_codes()
+        if self._needs_ivf():
+            self._schedule_build()
+
+    def _map(self, rows: int) -> Optional[np.memmap]:
+        if rows == 0:
+            return None
+        return np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+    def _map_codes(self, rows: int) -> Optional[np.memmap]:
+        """Map the codes file if it holds exactly one code per vector row"""
+        codec = self._codec
+        if rows == 0 or not os.path.exists(self._codes_path):
+            return None
+        if os.path.getsize(self._codes_path) != rows * codec.bytes_per_vector:
+            return None
+        return np.memmap(self._codes_path, dtype=codec.dtype, mode="r", shape=(rows, codec.width))
+
+    def _load_codes(self):
+        """Open the compressed codes, or schedule re-encoding if the codec settings changed"""
+        self._codec: Optional[Codec] = None
+        self._codes: Optional[np.memmap] = None
+        # Whether the codes file holds one code per vector row, so upserts append to it
+        self._codes_synced = False
+        if self.dim is None:
+            return
+        self._codec = make_codec(self.quantization, self.dim, self.dimensions, self.pq_subvectors)
+        if self._codec is None:
+            self._set_setting("codec", None)
+            return
+
+        if self._setting("codec") == self._codec.signature:
+            if self._codec.needs_training and os.path.exists(self._codec_state_path):
+                with np.load(self._codec_state_path) as state:
+                    self._codec.load_state(dict(state))
+            self._codes = self._map_codes(self._rows) if self._codec.trained else None
+            # Codes lag the vector file after a crash between the two appends
+            self._codes_synced = self._codes is not None or (self._codec.trained and self._rows == 0)
+            if self._codes_synced:
+                return
+
+        self._set_setting("codec", None)
+        if self._rows == 0 and self._codec.trained:
+            # Nothing to encode yet: codes are appended along with the vectors
+            open(self._codes_path, "wb").close()
+            self._set_setting("codec", self._codec.signature)
+            self._codes_synced = True
+        elif self._needs_codes():
+            self._schedule_build()
+
+    def _needs_codes(self) -> bool:
+        codec = self._codec
+        if codec is None or self._codes_synced or self._rows == 0:
+            return False
+        # Scan full precision until there is enough data to train on
+        return codec.trained or int(self._live.sum()) >= self.codec_train_min_vectors
+
+    def _encode_snapshot(self, codec: Codec, matrix: np.ndarray, live: np.ndarray, rows: int) -> Optional[str]:
+        """Train ``codec`` if needed and encode rows [0, rows) into a temporary codes file"""
+        if not codec.trained:
+            live_rows = np.flatnonzero(live)
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live_rows, size=min(len(live_rows), 65_536), replace=False))
+            codec.train(np.asarray(matrix[sample]))
+
+        temporary = f"{self._codes_path}.tmp"
+        with open(temporary, "wb") as f:
+            for start in range(0, rows, 65_536):
+                if self._closed:
+                    return None
+                f.write(codec.encode(np.asarray(matrix[start:min(start + 65_536, rows)])).tobytes())
+        return temporary
+
+    def _install_codes(self, codec: Codec, temporary: str, rows: int):
+        """Switch queries to the codes, encoding rows appended since the snapshot (caller holds the lock)"""
+        with open(temporary, "ab") as f:
+            for start in range(rows, self._rows, 65_536):
+                f.write(codec.encode(np.asarray(self._matrix[start:start + 65_536])).tobytes())
+        os.replace(temporary, self._codes_path)
+        if codec.needs_training:
+            np.savez(self._codec_state_path, **codec.state())
+        self._set_setting("codec", codec.signature)
+        self._codes_synced = True
+        self._codes = self._map_codes(self._rows)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ):
+        """Append vectors; an existing id is replaced"""
+        if not ids:
+            return
+        vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+        documents = documents or [""] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._set_setting("dim", str(self.dim))
+                self._load_codes()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+            self._delete_where("id", ids)
+
+            first = self._rows
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            if self._codes_synced:
+                with open(self._codes_path, "ab") as f:
+                    f.write(self._codec.encode(vectors).tobytes())
+            lists = (
+                np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+                if self._centroids is not None else np.full(len(ids), -1, dtype=np.int32)
+            )
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO vectors (id, row, document_id, list_id, text, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (vector_id, first + i, (metadata or {}).get("document_id"),
+                         int(lists[i]) if lists[i] >= 0 else None, text, json.dumps(metadata or {}))
+                        for i, (vector_id, text, metadata) in enumerate(zip(ids, documents, metadatas))
+                    ]
+                )
+
+            # Replace rather than mutate, so searches running on a snapshot are unaffected
+            self._rows = first + len(ids)
+            self._matrix = self._map(self._rows)
+            self._live = np.concatenate([self._live, np.ones(len(ids), dtype=bool)])
+            self._lists = np.concatenate([self._lists, lists])
+            if self._codes_synced:
+                self._codes = self._map_codes(self._rows)
+            if self._needs_codes() or self._needs_ivf():
+                self._schedule_build()
+
+    def _delete_where(self, column: str, values: List[str]) -> List[str]:
+        """Drop rows whose ``column`` is in ``values`` and return their ids"""
+        deleted_ids: List[str] = []
+        rows: List[int] = []
+        for start in range(0, len(values), 500):
+            batch = values[start:start + 500]
+            placeholders = ", ".join("?" for _ in batch)
+            found = self._conn.execute(
+                f"SELECT id, row FROM vectors WHERE {column} IN ({placeholders})", batch
+            ).fetchall()
+            if found:
+                with self._conn:
+                    self._conn.execute(f"DELETE FROM vectors WHERE {column} IN ({placeholders})", batch)
+                deleted_ids.extend(vector_id for vector_id, _ in found)
+                rows.extend(row for _, row in found)
+        if rows:
+            live = self._live.copy()
+            live[[row for row in rows if row < len(live)]] = False
+            self._live = live
+        return deleted_ids
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None):
+        """Delete by id or by document_id where-clause"""
+        with self._lock:
+            if ids:
+                self._delete_where("id", list(ids))
+            document_ids = _document_ids(where)
+            if document_ids:
+                self._delete_where("document_id", document_ids)
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Iterable[str] = ("documents", "metadatas")
+    ) -> Dict[str, Any]:
+        """Records in insertion order, in the same shape as ``Collection.get``"""
+        include = list(include)
+        sql = "SELECT id, row, text, metadata FROM vectors"
+        clauses, params = [], []
+        if ids:
+            clauses.append(f"id IN ({', '.join('?' for _ in ids)})")
+            params.extend(ids)
+        document_ids = _document_ids(where)
+        if document_ids:
+            clauses.append(f"document_id IN ({', '.join('?' for _ in document_ids)})")
+            params.extend(document_ids)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY row LIMIT ? OFFSET ?"
+        params.extend([-1 if limit is None else limit, offset or 0])
+
+        with self._lock:
+            found = self._conn.execute(sql, params).fetchall()
+            matrix = self._matrix
+        return {
+            "ids": [vector_id for vector_id, _, _, _ in found],
+            "documents": [text for _, _, text, _ in found] if "documents" in include else None,
+            "metadatas": [json.loads(metadata) for _, _, _, metadata in found] if "metadatas" in include else None,
+            "embeddings": (
+                [np.asarray(matrix[row]).tolist() for _, row, _, _ in found] if "embeddings" in include else None
+            )
+        }
+
+    def query(
+        self,
+        embedding: Sequence[float],
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Top-k chunks with their squared L2 distance, as Chroma reports it (smaller is closer)"""
+        query = normalize(np.asarray(embedding, dtype=np.float32))
+        document_ids = _document_ids(where)
+
+        with self._lock:
+            matrix, live, lists, centroids = self._matrix, self._live, self._lists, self._centroids
+            codec, codes = self._codec, self._codes
+            candidates = None
+            if document_ids:
+                placeholders = ", ".join("?" for _ in document_ids)
+                candidates = np.array([
+                    row for (row,) in self._conn.execute(
+                        f"SELECT row FROM vectors WHERE document_id IN ({placeholders})", document_ids
+                    )
+                ], dtype=np.int64)
+        if matrix is None or (candidates is not None and candidates.size == 0):
+            return []
+
+        # Filtered searches are small and always exact; otherwise probe the nearest clusters
+        if candidates is None and centroids is not None and self.mode != "flat":
+            probed = np.argsort(centroids @ query)[-self.ivf_probes:]
+            candidates = np.flatnonzero(np.isin(lists, probed) & live)
+
+        # Scan the compact codes when there are any, the full-precision matrix otherwise
+        if codes is not None:
+            array, score = codes, lambda block: codec.scores(block, query)
+        else:
+            array, score = matrix, lambda block: block @ query
+
+        if candidates is None:
+            scores = _scan(array, None, score)
+            scores[~live[:len(scores)]] = -np.inf
+            rows = np.arange(len(scores))
+        else:
+            rows = candidates[candidates < len(live)]
+            scores = _scan(array, rows, score)
+
+        # Re-score the best approximate matches at full precision
+        if codes is not None and self.rerank_factor:
+            shortlist = rows[_top(scores, k * self.rerank_factor)]
+            rows = np.sort(shortlist)
+            scores = _scan(matrix, rows, lambda block: block @ query)
+
+        top = _top(scores, k)
+        return self._documents_for(rows[top], scores[top])
+
+    def _documents_for(self, rows: np.ndarray, scores: np.ndarray) -> List[Tuple[Document, float]]:
+        """Load the text and metadata of matched rows, keeping their order"""
+        if rows.size == 0:
+            return []
+        placeholders = ", ".join("?" for _ in rows)
+        with self._lock:
+            found = {
+                row: (text, metadata) for row, text, metadata in self._conn.execute(
+                    f"SELECT row, text, metadata FROM vectors WHERE row IN ({placeholders})",
+                    [int(row) for row in rows]
+                )
+            }
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            # Deleted between the scan and this lookup
+            if row not in found:
+                continue
+            text, metadata = found[row]
+            # Unit vectors: |a - b|^2 = 2 - 2 * cosine
+            results.append((Document(page_content=text, metadata=json.loads(metadata)), 2.0 - 2.0 * score))
+        return results
+
+    def _needs_ivf(self) -> bool:
+        return self._centroids is None and self.mode != "flat" and int(self._live.sum()) >= self.ivf_min_vectors
+
+    def _schedule_build(self):
+        """Start the background build, or ask the running one to go again (caller holds the lock)"""
+        if self._builder is not None:
+            self._build_requested = True
+            return
+        self._builder = threading.Thread(target=self._build, name="local-index-build", daemon=True)
+        self._builder.start()
+
+    def _build(self):
+        """Train and encode from a snapshot of the index without holding the lock, then install the results"""
+        while True:
+            with self._lock:
+                self._build_requested = False
+                generation, rows, matrix, live = self._generation, self._rows, self._matrix, self._live
+                codec = self._codec if self._needs_codes() else None
+                cluster = self._needs_ivf()
+            temporary = clusters = None
+            try:
+                if codec is not None:
+                    temporary = self._encode_snapshot(codec, matrix, live, rows)
+                if cluster:
+                    clusters = self._cluster(matrix, live)
+            except Exception:
+                logger.exception("Failed to build the local vector index")
+            with self._lock:
+                current = not self._closed and generation == self._generation
+                if temporary is not None:
+                    if current and codec is self._codec:
+                        self._install_codes(codec, temporary, rows)
+                    else:
+                        os.remove(temporary)
+                if clusters is not None and current:
+                    self._install_ivf(*clusters, rows)
+                if self._closed or not self._build_requested:
+                    self._builder = None
+                    return
+
+    def wait_for_build(self, timeout: Optional[float] = None):
+        """Block until background training has finished, e.g. before closing an index built offline"""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+
+    def _cluster(
+        self,
+        matrix: np.ndarray,
+        live: np.ndarray,
+        iterations: int = 10,
+        seed: int = 0
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Spherical k-means over a snapshot; returns the centroids and every live row's cluster"""
+        live_rows = np.flatnonzero(live)
+        n_lists = min(len(live_rows), max(1, int(4 * math.sqrt(len(live_rows)))))
+        rng = np.random.default_rng(seed)
+        sample = matrix[np.sort(rng.choice(live_rows, size=min(len(live_rows), n_lists * 64), replace=False))]
+
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            if self._closed:
+                return None
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(n_lists):
+                members = sample[assignment == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+            centroids = normalize(centroids)
+
+        lists = np.full(len(live), -1, dtype=np.int32)
+        for start in range(0, len(live_rows), 65_536):
+            block = live_rows[start:start + 65_536]
+            lists[block] = np.argmax(matrix[block] @ centroids.T, axis=1)
+        return centroids, lists
+
+    def _install_ivf(self, centroids: np.ndarray, lists: np.ndarray, rows: int):
+        """Switch queries to IVF, assigning rows appended since the snapshot (caller holds the lock)"""
+        lists = np.concatenate([lists, np.full(self._rows - rows, -1, dtype=np.int32)])
+        if self._rows > rows:
+            lists[rows:] = np.argmax(np.asarray(self._matrix[rows:]) @ centroids.T, axis=1)
+        live_rows = np.flatnonzero(self._live)
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE vectors SET list_id = ? WHERE row = ?",
+                [(int(lists[row]), int(row)) for row in live_rows]
+            )
+        np.save(self._centroids_path, centroids)
+        self._centroids = centroids
+        self._lists = lists
+
+    def vacuum(self) -> Dict[str, int]:
+        """Rewrite the vector file without dead rows and re-cluster if IVF is in use"""
+        with self._lock:
+            live_rows = np.flatnonzero(self._live)
+            dead = self._rows - len(live_rows)
+            if dead:
+                temporary = f"{self._vectors_path}.tmp"
+                with open(temporary, "wb") as f:
+                    for start in range(0, len(live_rows), 65_536):
+                        f.write(np.ascontiguousarray(self._matrix[live_rows[start:start + 65_536]]).tobytes())
+                # Ascending order never moves a row onto one that has not moved yet
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE vectors SET row = ? WHERE row = ?",
+                        [(new, int(old)) for new, old in enumerate(live_rows) if new != old]
+                    )
+                self._matrix = None
+                os.replace(temporary, self._vectors_path)
+
+                if os.path.exists(self._centroids_path):
+                    os.remove(self._centroids_path)
+                with self._conn:
+                    self._conn.execute("UPDATE vectors SET list_id = NULL")
+                # Builds started before the rewrite refer to old row numbers
+                self._generation += 1
+                # The codes file no longer matches the row count; it is re-encoded
+                # (with the trained codec) and clusters are retrained in the background
+                self._load()
+            self._conn.execute("VACUUM")
+            # In WAL mode the vacuumed pages sit in the WAL until a checkpoint
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return {"rows_reclaimed": dead, "rows": self._rows}
+
+    def stats(self) -> Dict[str, Any]:
+        """Size of the representation scanned by queries"""
+        codec = self._codec if self._codes is not None else None
+        bytes_per_vector = codec.bytes_per_vector if codec else 4 * (self.dim or 0)
+        return {
+            "vectors": int(self._live.sum()),
+            "quantization": codec.name if codec else "none",
+            "dimensions": codec.dimensions if codec else self.dim,
+            "bytes_per_vector": bytes_per_vector,
+            "search_bytes": bytes_per_vector * self._rows,
+            "full_precision_bytes": 4 * (self.dim or 0) * self._rows
+        }
+
+    def close(self):
+        with self._lock:
+            # A running build sees this and discards its result
+            self._closed = True
+            self._conn.close()
+
+class LocalVectorStore(VectorStore):
+    """LangChain vector store backed by ``LocalVectorIndex``
+
+    ``_collection`` exposes the index with the same methods the service uses
+    on a Chroma collection (upsert, get, delete, count).
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        embedding_function: Optional[Embeddings] = None,
+        mode: str = "ivf",
+        **index_options: Any
+    ):
+        self._embedding_function = embedding_function
+        self._collection = LocalVectorIndex(persist_directory, mode, **index_options)
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding_function
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = self._embedding_function.embed_documents(texts)
+        self._collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+        return ids
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: str = "local_index",
+        **kwargs: Any
+    ) -> "LocalVectorStore":
+        store = cls(persist_directory, embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        self._collection.delete(ids=ids, where=kwargs.get("where"))
+        return True
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Closest chunks with their distance, as returned by Chroma"""
+        return self._collection.query(embedding, k, where=filter)
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, filter)]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        embedding = self._embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_relevance_scores(embedding, k, filter)
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Squared L2 distance between unit vectors -> cosine similarity
+        return lambda distance: 1.0 - distance / 2
+
+    def close(self):
+        self._collection.close()
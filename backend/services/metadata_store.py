@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_COLUMNS = [
+    "id", "filename", "upload_date", "chunk_count", "file_size",
+    "file_hash", "partitioned", "content_preview"
+]
+
+# Columns with an index usable for keyset pagination
+SORTABLE_COLUMNS = ["upload_date", "file_size"]
+
+# Public document fields: what a listing returns and what clients may project
+LISTABLE_COLUMNS = ["id", "filename", "upload_date", "chunk_count", "file_size", "content_preview"]
+
+class DocumentStore:
+    """Document metadata in SQLite (WAL mode)
+
+    Inserts and deletes are single-row transactions, so write cost does not
+    grow with the corpus. Filename and file hash lookups are indexed, and
+    listing is keyset-paginated by upload date or file size.
+    """
+
+    def __init__(self, db_path: str, legacy_json_path: Optional[str] = None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+        if legacy_json_path:
+            self._migrate_from_json(legacy_json_path)
+        # Stores created before the counter existed start from the bytes still in the corpus
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO counters (name, value) "
+                "SELECT 'bytes_ingested', COALESCE(SUM(file_size), 0) FROM documents"
+            )
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    upload_date TEXT NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    file_size INTEGER NOT NULL DEFAULT 0,
+                    file_hash TEXT,
+                    partitioned INTEGER NOT NULL DEFAULT 0,
+                    content_preview TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_filename ON documents (filename)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_file_hash ON documents (file_hash)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_upload_date ON documents (upload_date, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_file_size ON documents (file_size, id)")
+            # Running totals that cannot be derived from the documents table
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _migrate_from_json(self, json_path: str):
+        """One-time import of the old documents_metadata.json file"""
+        if not os.path.exists(json_path):
+            return
+        with open(json_path, 'r') as f:
+            documents = json.load(f)
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO documents ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                [self._to_row(doc) for doc in documents.values()]
+            )
+        os.replace(json_path, f"{json_path}.migrated")
+
+    def _to_row(self, document: Dict[str, Any]) -> Tuple:
+        return (
+            document["id"],
+            document["filename"],
+            document["upload_date"],
+            document["chunk_count"],
+            document.get("file_size", 0),
+            document.get("file_hash"),
+            int(bool(document.get("partitioned"))),
+            document.get("content_preview", "")
+        )
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        document = dict(row)
+        if "partitioned" in document:
+            document["partitioned"] = bool(document["partitioned"])
+        return document
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def put(self, document: Dict[str, Any]):
+        """Insert or replace one document, adding its size to the bytes ingested"""
+        row = self._to_row(document)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO documents ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                row
+            )
+            self._conn.execute("UPDATE counters SET value = value + ? WHERE name = 'bytes_ingested'", (row[4],))
+
+    def delete(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Delete one document and return it"""
+        document = self.get(document_id)
+        if document is not None:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+        return document
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM documents WHERE id = ?", (document_id,))
+        return self._to_dict(rows[0]) if rows else None
+
+    def __contains__(self, document_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM documents WHERE id = ?", (document_id,)))
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM documents")[0][0]
+
+    def find_by_hash(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM documents WHERE file_hash = ? LIMIT 1", (file_hash,))
+        return self._to_dict(rows[0]) if rows else None
+
+    def find_by_filename(self, filename: str) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM documents WHERE filename = ? ORDER BY upload_date", (filename,))
+        return [self._to_dict(row) for row in rows]
+
+    def ids(self) -> Iterator[str]:
+        """All document ids"""
+        for row in self._query("SELECT id FROM documents"):
+            yield row[0]
+
+    def totals(self) -> Dict[str, int]:
+        """Document count, chunk total, byte total and bytes ingested in one query"""
+        row = self._query(
+            "SELECT COUNT(*), COALESCE(SUM(chunk_count), 0), COALESCE(SUM(file_size), 0), "
+            "(SELECT value FROM counters WHERE name = 'bytes_ingested') FROM documents"
+        )[0]
+        return {"documents": row[0], "chunks": row[1], "bytes": row[2], "bytes_ingested": row[3]}
+
+    def list(
+        self,
+        limit: int,
+        after: Optional[Tuple[Any, str]] = None,
+        sort_by: str = "upload_date",
+        descending: bool = False,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Keyset-paginated listing ordered by (sort_by, id), starting after the cursor
+
+        Only public columns are returned. ``fields`` limits them further; the id
+        and sort column are always included because the cursor is built from them.
+        """
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort_by}")
+        columns = LISTABLE_COLUMNS if fields is None else [
+            column for column in LISTABLE_COLUMNS
+            if column in fields or column in ("id", sort_by)
+        ]
+
+        direction = "DESC" if descending else "ASC"
+        comparison = "<" if descending else ">"
+        sql = f"SELECT {', '.join(columns)} FROM documents"
+        params: Tuple = ()
+        if after is not None:
+            sql += f" WHERE ({sort_by}, id) {comparison} (?, ?)"
+            params = (after[0], after[1])
+        sql += f" ORDER BY {sort_by} {direction}, id {direction} LIMIT ?"
+
+        return [self._to_dict(row) for row in self._query(sql, params + (limit,))]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,188 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Span of the ingestion or question being handled by the current task, parent of its stage spans
+_request_span: ContextVar[Optional[Any]] = ContextVar("rag_request_span", default=None)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+class _Metric:
+    """One metric family; values are kept per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key: Tuple[str, ...], extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.label_names, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        with self._lock:
+            samples = list(self._samples())
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *samples]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{self._labels(key)} {_number(value)}"
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            # [per-bucket counts, sum, count]
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> Iterator[str]:
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{self._labels(key, [('le', _number(bound))])} {cumulative}"
+            yield f"{self.name}_bucket{self._labels(key, [('le', '+Inf')])} {count}"
+            yield f"{self.name}_sum{self._labels(key)} {_number(total)}"
+            yield f"{self.name}_count{self._labels(key)} {count}"
+
+class Metrics:
+    """Latency, token and cache metrics for the ingestion and question-answering pipelines
+
+    Rendered for Prometheus by ``GET /metrics``. With a tracer (see
+    ``make_tracer``), every ``request`` and ``stage`` is also recorded as a
+    trace span, stages as children of the request running in the same task.
+    """
+
+    def __init__(self, tracer: Optional[Any] = None):
+        self.tracer = tracer
+        self.stage_seconds = Histogram(
+            "rag_stage_seconds",
+            "Duration of each pipeline stage",
+            ("operation", "stage")
+        )
+        self.request_seconds = Histogram(
+            "rag_request_seconds",
+            "End-to-end duration of ingestions and questions",
+            ("operation",)
+        )
+        self.errors = Counter("rag_errors_total", "Failed ingestions and questions", ("operation",))
+        self.tokens = Counter("rag_tokens_total", "Tokens sent to or generated by the models", ("kind",))
+        self.cache_lookups = Counter("rag_cache_lookups_total", "Embedding and answer cache lookups", ("cache", "result"))
+        self.chunks = Counter("rag_chunks_ingested_total", "Chunks written to the vector store")
+
+    def _start_span(self, name: str, parent: Optional[Any] = None) -> Optional[Any]:
+        # Not made the current span: timed blocks can span awaits and yields of
+        # async generators, where attaching a context is not safe. The parent is
+        # passed explicitly instead
+        if self.tracer is None:
+            return None
+        from opentelemetry import trace
+        context = trace.set_span_in_context(parent) if parent is not None else None
+        return self.tracer.start_span(name, context=context)
+
+    @contextmanager
+    def request(self, operation: str) -> Iterator[None]:
+        """Time a whole ingestion or question, counting it as an error if it raises"""
+        span = self._start_span(operation)
+        # Set and restored rather than reset with a token: the block may be left
+        # from another context, e.g. when a streaming response is closed
+        previous = _request_span.get()
+        _request_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.errors.inc(operation=operation)
+            raise
+        finally:
+            _request_span.set(previous)
+            self.request_seconds.observe(time.perf_counter() - start, operation=operation)
+            if span is not None:
+                span.end()
+
+    @contextmanager
+    def stage(self, operation: str, stage: str) -> Iterator[None]:
+        """Time a block as one stage of an operation, as a child span of its request when tracing"""
+        span = self._start_span(f"{operation}.{stage}", parent=_request_span.get())
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - start, operation=operation, stage=stage)
+            if span is not None:
+                span.end()
+
+    def observe_stage(self, operation: str, stage: str, seconds: float):
+        """Record a stage timed elsewhere, e.g. accumulated across a worker thread's loop"""
+        self.stage_seconds.observe(seconds, operation=operation, stage=stage)
+
+    def render(self) -> str:
+        families = [
+            self.stage_seconds,
+            self.request_seconds,
+            self.errors,
+            self.tokens,
+            self.cache_lookups,
+            self.chunks
+        ]
+        return "\n".join(line for family in families for line in family.render()) + "\n"
+
+def make_tracer(enabled: bool) -> Optional[Any]:
+    """OpenTelemetry tracer for stage spans, or None when tracing is off (needs opentelemetry-api)"""
+    if not enabled:
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        raise ImportError(
+            "TRACING_ENABLED requires OpenTelemetry: pip install opentelemetry-api opentelemetry-sdk"
+        )
+    return trace.get_tracer("rag")
@@ -0,0 +1,61 @@
+from collections import deque
+from concurrent.futures import Executor
+from typing import Dict, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+# Each worker process keeps the PDF it is working on open between tasks
+_readers: Dict[str, PdfReader] = {}
+
+def extract_pages(path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) of a PDF; runs in a worker process"""
+    reader = _readers.get(path)
+    if reader is None:
+        _readers.clear()
+        reader = _readers[path] = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def load_pdf_pages(
+    path: str,
+    pool: Optional[Executor] = None,
+    pages_per_task: int = 8,
+    max_pending_tasks: int = 8,
+    parallel_min_pages: int = 16
+) -> Iterator[Document]:
+    """Yield a PDF's pages in order, like PyPDFLoader.lazy_load
+
+    Large PDFs are split into page ranges extracted concurrently on a
+    process pool (text extraction is CPU-bound, so threads do not help);
+    at most ``max_pending_tasks`` ranges are in flight so memory stays
+    bounded when the consumer is slower than the pool.
+    """
+    reader = PdfReader(path)
+    page_count = len(reader.pages)
+
+    if pool is None or page_count < parallel_min_pages:
+        for i, page in enumerate(reader.pages):
+            yield Document(page_content=page.extract_text() or "", metadata={"source": path, "page": i})
+        return
+
+    ranges = iter(range(0, page_count, pages_per_task))
+    pending = deque()
+
+    def submit():
+        start = next(ranges, None)
+        if start is not None:
+            stop = min(start + pages_per_task, page_count)
+            pending.append((start, pool.submit(extract_pages, path, start, stop)))
+
+    try:
+        for _ in range(max_pending_tasks):
+            submit()
+        while pending:
+            start, future = pending.popleft()
+            submit()
+            for offset, text in enumerate(future.result()):
+                yield Document(page_content=text, metadata={"source": path, "page": start + offset})
+    finally:
+        # The consumer stopped early or a range failed
+        for _, future in pending:
+            future.cancel()
@@ -0,0 +1,142 @@
+from typing import List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from services.bm25_index import tokenize
+from services.tokenizer import get_encoding
+
+RERANKERS = ["none", "lexical", "cross-encoder"]
+
+def merge_overlapping(documents: Sequence[Document]) -> List[Document]:
+    """Collapse chunks that overlap (or touch) their neighbors into single passages
+
+    Neighbors are chunks of the same document whose character ranges overlap,
+    e.g. consecutive chunks sharing the chunker's overlap. Ranges are taken
+    from ``document_index``, the offset in the document's joined pages, so
+    chunks running across a page break merge too; chunks indexed without it
+    fall back to ``start_index`` within their page. A merged passage takes the
+    rank of its best-ranked part and the page of its first part. Chunks with
+    neither offset are only de-duplicated by exact text.
+    """
+    passages: List[Document] = []
+    # (document_id,) or (document_id, page) -> [(start, end, position in passages)]
+    spans = {}
+    seen_texts = set()
+
+    for document in documents:
+        metadata = document.metadata
+        if metadata.get("document_index") is not None:
+            start, key = metadata["document_index"], (metadata.get("document_id"),)
+        elif metadata.get("start_index") is not None:
+            start, key = metadata["start_index"], (metadata.get("document_id"), metadata.get("page"))
+        else:
+            if document.page_content not in seen_texts:
+                seen_texts.add(document.page_content)
+                passages.append(document)
+            continue
+
+        end = start + len(document.page_content)
+        for i, (span_start, span_end, position) in enumerate(spans.get(key, [])):
+            if start > span_end or end < span_start:
+                continue
+            # Splice the new text onto whichever side of the passage it extends
+            passage = passages[position]
+            text = passage.page_content
+            merged = dict(passage.metadata)
+            if start < span_start:
+                text = document.page_content[:span_start - start] + text
+                # The passage now begins where this chunk does
+                for field in ("page", "start_index", "document_index"):
+                    if field in metadata:
+                        merged[field] = metadata[field]
+            if end > span_end:
+                text = text + document.page_content[len(document.page_content) - (end - span_end):]
+            merged["chunk_index"] = min(metadata.get("chunk_index", 0), passage.metadata.get("chunk_index", 0))
+            if "relevance" in metadata:
+                merged["relevance"] = max(metadata["relevance"], passage.metadata.get("relevance", -1.0))
+            passages[position] = Document(page_content=text, metadata=merged)
+            spans[key][i] = (min(start, span_start), max(end, span_end), position)
+            break
+        else:
+            spans.setdefault(key, []).append((start, end, len(passages)))
+            passages.append(document)
+    return passages
+
+class Reranker:
+    """Re-orders retrieved passages by relevance to the question; the base class keeps retrieval order"""
+
+    def score(self, question: str, documents: Sequence[Document]) -> List[float]:
+        return [-rank for rank in range(len(documents))]
+
+    def rerank(self, question: str, documents: Sequence[Document]) -> List[Document]:
+        scores = self.score(question, documents)
+        # sorted() is stable, so ties keep their retrieval order
+        order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)
+        return [documents[i] for i in order]
+
+class LexicalReranker(Reranker):
+    """Fraction of the question's terms that appear in the passage
+
+    Cheap and dependency-free; favors passages that cover every part of the
+    question over ones that repeat a single term.
+    """
+
+    def score(self, question: str, documents: Sequence[Document]) -> List[float]:
+        terms = {term for term in tokenize(question) if len(term) > 2}
+        if not terms:
+            return super().score(question, documents)
+        return [len(terms & set(tokenize(doc.page_content))) / len(terms) for doc in documents]
+
+class CrossEncoderReranker(Reranker):
+    """Local cross-encoder scoring each (question, passage) pair (needs sentence-transformers)"""
+
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError(
+                "RERANKER = 'cross-encoder' requires sentence-transformers: pip install sentence-transformers"
+            )
+        self.model = CrossEncoder(model_name)
+
+    def score(self, question: str, documents: Sequence[Document]) -> List[float]:
+        if not documents:
+            return []
+        return [float(s) for s in self.model.predict([(question, doc.page_content) for doc in documents])]
+
+def make_reranker(name: str, model_name: Optional[str] = None) -> Optional[Reranker]:
+    """Reranker selected by Config.RERANKER, or None to keep retrieval order"""
+    if name not in RERANKERS:
+        raise ValueError(f"Unknown reranker {name}. Allowed: {RERANKERS}")
+    if name == "lexical":
+        return LexicalReranker()
+    if name == "cross-encoder":
+        return CrossEncoderReranker(model_name)
+    return None
+
+class ContextPacker:
+    """Fits the best passages into a prompt token budget, in rank order"""
+
+    def __init__(self, encoding_name: str, token_budget: int, separator: str = "\n\n"):
+        self.encoding = get_encoding(encoding_name)
+        self.token_budget = token_budget
+        self.separator_tokens = len(self.encoding.encode_ordinary(separator))
+
+    def pack(self, documents: Sequence[Document]) -> List[Document]:
+        """Greedily keep passages that still fit; skip ones that do not
+
+        The top passage is always kept, truncated to the budget if needed.
+        """
+        packed: List[Document] = []
+        used = 0
+        for document in documents:
+            tokens = self.encoding.encode_ordinary(document.page_content)
+            cost = len(tokens) + (self.separator_tokens if packed else 0)
+            if used + cost <= self.token_budget:
+                packed.append(document)
+                used += cost
+            elif not packed:
+                text = self.encoding.decode(tokens[:self.token_budget])
+                packed.append(Document(page_content=text, metadata=document.metadata))
+                used = self.token_budget
+        return packed
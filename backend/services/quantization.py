@@ -0,0 +1,180 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+QUANTIZATION_METHODS = ["none", "int8", "pq"]
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so a dot product is the cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def truncate(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    """Matryoshka truncation: keep the leading dimensions and re-normalize
+
+    text-embedding-3 models are trained so that a prefix of the vector is
+    itself a usable (lower-fidelity) embedding.
+    """
+    return normalize(np.asarray(vectors, dtype=np.float32)[..., :dimensions])
+
+class Codec:
+    """Compact search representation of unit vectors
+
+    ``encode`` maps full-precision vectors to fixed-width rows of ``dtype``
+    and ``scores`` approximates the cosine similarity between encoded rows
+    and a full-precision query.
+    """
+
+    name = "none"
+    dtype = np.float32
+    needs_training = False
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.trained = not self.needs_training
+
+    @property
+    def width(self) -> int:
+        return self.dimensions
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.width * np.dtype(self.dtype).itemsize
+
+    @property
+    def signature(self) -> str:
+        """Identifies codes that are interchangeable with this codec's"""
+        return f"{self.name}:{self.dimensions}"
+
+    def train(self, sample: np.ndarray):
+        pass
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return truncate(vectors, self.dimensions)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        return np.asarray(codes, dtype=np.float32) @ truncate(query, self.dimensions)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays to persist for a trained codec"""
+        return {}
+
+    def load_state(self, state: Dict[str, np.ndarray]):
+        self.trained = True
+
+class Int8Codec(Codec):
+    """Per-vector symmetric scalar quantization
+
+    Each row holds the int8 components followed by the 4 bytes of the
+    vector's float32 scale, so a row is about a quarter of float32.
+    """
+
+    name = "int8"
+    dtype = np.int8
+
+    @property
+    def width(self) -> int:
+        return self.dimensions + 4
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        truncated = truncate(vectors, self.dimensions)
+        scale = np.maximum(np.abs(truncated).max(axis=1), 1e-12) / 127
+        values = np.round(truncated / scale[:, None]).astype(np.int8)
+        return np.hstack([values, scale.astype(np.float32).view(np.int8).reshape(-1, 4)])
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        values = codes[:, :self.dimensions].astype(np.float32) @ truncate(query, self.dimensions)
+        scale = np.ascontiguousarray(codes[:, self.dimensions:]).view(np.float32).ravel()
+        return values * scale
+
+class ProductQuantizer(Codec):
+    """Product quantization: one byte per subvector, scored with lookup tables
+
+    The vector is split into ``subvectors`` equal slices and each slice is
+    replaced by the index of its nearest of 256 k-means centroids.
+    """
+
+    name = "pq"
+    dtype = np.uint8
+    needs_training = True
+    centroids_per_subvector = 256
+
+    def __init__(self, dimensions: int, subvectors: int):
+        if dimensions % subvectors:
+            raise ValueError(f"{dimensions} dimensions cannot be split into {subvectors} subvectors")
+        super().__init__(dimensions)
+        self.subvectors = subvectors
+        self.codebooks: Optional[np.ndarray] = None
+
+    @property
+    def width(self) -> int:
+        return self.subvectors
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name}:{self.dimensions}:{self.subvectors}"
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, subvectors, slice) view of truncated vectors"""
+        return truncate(vectors, self.dimensions).reshape(len(vectors), self.subvectors, -1)
+
+    def train(self, sample: np.ndarray, iterations: int = 10, seed: int = 0):
+        """Run k-means independently on each slice of a sample of vectors"""
+        rng = np.random.default_rng(seed)
+        slices = self._split(sample)
+        n_centroids = min(self.centroids_per_subvector, len(sample))
+        codebooks = np.zeros((self.subvectors, self.centroids_per_subvector, slices.shape[2]), dtype=np.float32)
+        for j in range(self.subvectors):
+            points = slices[:, j]
+            centroids = points[rng.choice(len(points), size=n_centroids, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = self._nearest(points, centroids)
+                for c in range(n_centroids):
+                    members = points[assignment == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+            codebooks[j, :n_centroids] = centroids
+            # Unused slots repeat real centroids so no code decodes to zero
+            codebooks[j, n_centroids:] = centroids[0]
+        self.codebooks = codebooks
+        self.trained = True
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # argmin |p - c|^2 == argmin (|c|^2 - 2 p.c)
+        return np.argmin((centroids ** 2).sum(axis=1) - 2 * points @ centroids.T, axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        slices = self._split(vectors)
+        codes = np.empty((len(vectors), self.subvectors), dtype=np.uint8)
+        for j in range(self.subvectors):
+            codes[:, j] = self._nearest(slices[:, j], self.codebooks[j])
+        return codes
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # Table of query-slice . centroid, then one gather + sum per row
+        table = np.einsum("jks,js->jk", self.codebooks, self._split(query[None, :])[0])
+        return table[np.arange(self.subvectors), codes].sum(axis=1)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+
+    def load_state(self, state: Dict[str, np.ndarray]):
+        self.codebooks = state["codebooks"]
+        self.trained = True
+
+def make_codec(
+    method: str,
+    dim: int,
+    dimensions: Optional[int] = None,
+    pq_subvectors: int = 64
+) -> Optional[Codec]:
+    """Codec for a quantization method and Matryoshka dimension, or None for plain float32"""
+    if method not in QUANTIZATION_METHODS:
+        raise ValueError(f"Unknown quantization {method}. Allowed: {QUANTIZATION_METHODS}")
+    dimensions = min(dimensions or dim, dim)
+    if method == "int8":
+        return Int8Codec(dimensions)
+    if method == "pq":
+        return ProductQuantizer(dimensions, pq_subvectors)
+    return Codec(dimensions) if dimensions < dim else None
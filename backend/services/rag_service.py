@@ -1,38 +1,187 @@
 import os
+import math
 import uuid
 import time
+import asyncio
+import threading
+from concurrent.futures import Executor
+from functools import partial
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterator, Tuple, Callable
 from fastapi import UploadFile, HTTPException
 import json
+import base64
+import hashlib
+import logging
 
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.document_loaders import TextLoader, PyPDFLoader, Docx2txtLoader
+from langchain_community.document_loaders import TextLoader, Docx2txtLoader
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 from langchain_openai import ChatOpenAI
-from langchain.chains import RetrievalQA
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
 from langchain.prompts import PromptTemplate
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import ConfigurableField
+
+from services.answer_cache import AnswerCache
+from services.bm25_index import BM25Index, is_keyword_query, reciprocal_rank_fusion
+from services.chunking import StructuredChunker
+from services.compaction import delete_document_vectors
+from services.corpus_stats import CorpusCounters
+from services.local_vector_store import LocalVectorStore
+from services.post_retrieval import ContextPacker, make_reranker, merge_overlapping
+from services.metadata_store import DocumentStore, SORTABLE_COLUMNS, LISTABLE_COLUMNS
+from services.metrics import Metrics
+from services.pdf_parsing import load_pdf_pages
+from services.embedding_scheduler import EmbeddingScheduler, token_counter
+from services.vector_store import open_vector_store
+from utils.config import Config
+from utils.validators import validate_file_size
+
+logger = logging.getLogger(__name__)
+
+def load_pages(path: str, filename: str, process_pool: Optional[Executor] = None) -> Iterator[Document]:
+    """Lazily load a file's pages with a loader picked by file type"""
+    file_extension = os.path.splitext(filename)[1].lower()
+    
+    if file_extension == '.pdf':
+        return load_pdf_pages(
+            path,
+            pool=process_pool,
+            pages_per_task=Config.PDF_PAGES_PER_TASK,
+            max_pending_tasks=2 * Config.PDF_PARSE_WORKERS,
+            parallel_min_pages=Config.PDF_PARALLEL_MIN_PAGES
+        )
+    elif file_extension == '.docx':
+        return Docx2txtLoader(path).lazy_load()
+    else:  # .txt, .md
+        return TextLoader(path).lazy_load()
+
+def split_document(
+    pages: Iterator[Document],
+    chunker: StructuredChunker,
+    filename: str,
+    document_id: str
+) -> Iterator[List[Document]]:
+    """Yield the chunks each page completes, tagged in a single pass"""
+    chunk_index = 0
+    for chunks in chunker.split(pages):
+        for chunk in chunks:
+            chunk.metadata.update({
+                "document_id": document_id,
+                "filename": filename,
+                "chunk_index": chunk_index
+            })
+            chunk_index += 1
+        yield chunks
 
 class RAGService:
-    def __init__(self):
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        self.llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
+    def __init__(
+        self,
+        http_client=None,
+        http_async_client=None,
+        executor: Optional[Executor] = None,
+        process_pool: Optional[Executor] = None,
+        embeddings: Optional[Embeddings] = None,
+        llm: Optional[BaseChatModel] = None,
+        metrics: Optional[Metrics] = None
+    ):
+        # Stage latencies, token counts and cache hit rates, served on /metrics
+        self.metrics = metrics or Metrics()
+        
+        # Pooled HTTP clients are shared by the embeddings and chat model;
+        # local stand-ins can be injected for development and tests
+        base_embeddings = embeddings or OpenAIEmbeddings(
+            model=Config.EMBEDDING_MODEL,
+            http_client=http_client,
+            http_async_client=http_async_client
+        )
+        
+        # Chunk embeddings are cached on disk by text hash, namespaced by model,
+        # so identical chunks are never sent to the embedding API twice
+        self.embeddings = CacheBackedEmbeddings.from_bytes_store(
+            base_embeddings,
+            LocalFileStore(Config.EMBEDDING_CACHE_DIR),
+            namespace=getattr(base_embeddings, "model", type(base_embeddings).__name__),
+            key_encoder="sha256"
+        )
+        self.llm = llm or ChatOpenAI(
+            model=Config.LLM_MODEL,
             temperature=0,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=http_client,
+            http_async_client=http_async_client
+        )
+        
+        # Blocking work (loaders, Chroma calls) runs here instead of on the event loop
+        self.executor = executor
+        
+        # Large PDFs have their pages extracted here (a process pool), see Config.PDF_PARSE_WORKERS
+        self.process_pool = process_pool
+        self.chunker = StructuredChunker(
+            Config.EMBEDDING_ENCODING,
+            chunk_tokens=Config.CHUNK_TOKENS,
+            min_chunk_tokens=Config.CHUNK_MIN_TOKENS,
+            max_overlap_tokens=Config.CHUNK_MAX_OVERLAP_TOKENS
         )
         
-        # Initialize vector store
-        self.persist_directory = "vector_db"
-        self.db = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embeddings
+        # Bound concurrent LLM round-trips so a burst cannot exhaust the worker
+        self._qa_semaphore = asyncio.Semaphore(Config.QA_MAX_CONCURRENCY)
+        
+        # Initialize vector store (Chroma or the local index, see Config.VECTOR_BACKEND)
+        self.db = open_vector_store(self.embeddings)
+        
+        # Per-document collections, opened on first use (see Config.DOCUMENT_PARTITIONS);
+        # the local index searches a document's rows directly and needs none
+        self._partitions: Dict[str, Chroma] = {}
+        self.partitioning = Config.DOCUMENT_PARTITIONS and isinstance(self.db, Chroma)
+        
+        # Keyword index fused with vector search (see Config.HYBRID_SEARCH)
+        self.keyword_index = BM25Index()
+        self._keyword_index_task: Optional[asyncio.Task] = None
+        
+        # Ingestion embeds through a shared, rate-limited batch scheduler
+        count_tokens = token_counter(Config.EMBEDDING_ENCODING)
+        self.embedding_scheduler = EmbeddingScheduler(
+            base_embeddings,
+            write_vectors=self._write_vectors,
+            count_tokens=lambda texts: self._run_blocking(count_tokens, texts),
+            cache_store=self.embeddings.document_embedding_store,
+            max_batch_tokens=Config.EMBEDDING_BATCH_MAX_TOKENS,
+            max_batch_size=Config.EMBEDDING_BATCH_MAX_SIZE,
+            max_concurrency=Config.EMBEDDING_MAX_CONCURRENCY,
+            requests_per_minute=Config.EMBEDDING_REQUESTS_PER_MINUTE,
+            tokens_per_minute=Config.EMBEDDING_TOKENS_PER_MINUTE,
+            max_retries=Config.EMBEDDING_MAX_RETRIES,
+            batch_wait=Config.EMBEDDING_BATCH_WAIT,
+            metrics=self.metrics
         )
         
         # Document metadata storage
-        self.documents_file = "documents_metadata.json"
-        self.documents = self._load_documents_metadata()
+        # (the old JSON file is migrated into SQLite on first start)
+        self.documents = DocumentStore(
+            Config.METADATA_DB_FILE,
+            legacy_json_path=Config.DOCUMENTS_METADATA_FILE
+        )
+        
+        # O(1) corpus totals for /stats, kept up to date on ingest and delete
+        self.counters = CorpusCounters()
+        self._reconcile_task: Optional[asyncio.Task] = None
+        
+        # Answer cache; entries are tied to the corpus version and dropped when it changes
+        self._corpus_fingerprint = 0
+        for document_id in self.documents.ids():
+            self._corpus_fingerprint ^= self._document_fingerprint(document_id)
+        self.answer_cache = AnswerCache(
+            max_entries=Config.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.ANSWER_CACHE_TTL,
+            similarity_threshold=Config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            persist_path=Config.ANSWER_CACHE_FILE
+        )
         
         # Custom prompt template
         self.prompt_template = """Use the following pieces of context to answer the question at the end. 
@@ -44,161 +193,930 @@ Question: {question}
 
 Answer:"""
         
-        self.prompt = PromptTemplate(
-            template=self.prompt_template,
-            input_variables=["context", "question"]
+        # Post-retrieval stage: merge overlapping chunks, re-rank, fit the token budget
+        self.reranker = make_reranker(Config.RERANKER, Config.RERANKER_MODEL)
+        self.context_packer = ContextPacker(Config.CONTEXT_ENCODING, Config.CONTEXT_TOKEN_BUDGET)
+        self._count_tokens = token_counter(Config.CONTEXT_ENCODING)
+        
+        # Retriever, prompt and LLM pipeline are compiled once at startup
+        self._build_qa_pipeline()
+    
+    async def warmup(self):
+        """Open the vector store collection so the first request does not pay for it"""
+        await self._run_blocking(self.db._collection.count)
+    
+    async def start(self):
+        """Warm up, seed the corpus counters and start periodic reconciliation"""
+        await self.warmup()
+        await self.reconcile_stats()
+        self._reconcile_task = asyncio.create_task(self._reconcile_loop())
+        if Config.HYBRID_SEARCH:
+            self._keyword_index_task = asyncio.create_task(self._load_keyword_index())
+    
+    async def close(self):
+        """Finish in-flight embedding batches and persist state that outlives the process"""
+        for task in (self._reconcile_task, self._keyword_index_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        await self.embedding_scheduler.stop()
+        self.answer_cache.save()
+        self.documents.close()
+        if isinstance(self.db, LocalVectorStore):
+            self.db.close()
+    
+    async def _load_keyword_index(self):
+        """Rebuild the keyword index from the chunks already in the vector store"""
+        offset = 0
+        try:
+            while True:
+                page = await self._run_blocking(
+                    self.db._collection.get,
+                    limit=Config.KEYWORD_INDEX_LOAD_BATCH_SIZE,
+                    offset=offset,
+                    include=["documents", "metadatas"]
+                )
+                if not page["ids"]:
+                    break
+                # Skip documents deleted (or orphaned) since their vectors were written
+                live = await self._run_blocking(
+                    lambda ids: {d for d in ids if d in self.documents},
+                    {(m or {}).get("document_id") for m in page["metadatas"]}
+                )
+                chunks = [
+                    Document(page_content=text, metadata=metadata)
+                    for text, metadata in zip(page["documents"], page["metadatas"])
+                    if (metadata or {}).get("document_id") in live
+                ]
+                await self._run_blocking(self.keyword_index.add, chunks)
+                offset += len(page["ids"])
+            self.keyword_index.ready = True
+        except Exception:
+            logger.exception("Failed to load the keyword index")
+    
+    def _partition(self, document_id: str) -> Chroma:
+        """Collection holding only one document's vectors"""
+        partition = self._partitions.get(document_id)
+        if partition is None:
+            partition = Chroma(
+                collection_name=f"doc_{document_id}",
+                client=self.db._client,
+                embedding_function=self.embeddings
+            )
+            self._partitions[document_id] = partition
+        return partition
+    
+    def _drop_partition(self, document_id: str):
+        """Remove a document's partition collection if it exists"""
+        self._partitions.pop(document_id, None)
+        try:
+            self.db._client.delete_collection(f"doc_{document_id}")
+        except Exception:
+            # Never created, e.g. the document failed before its first batch
+            pass
+    
+    async def _delete_vectors(self, document_id: str) -> int:
+        """Delete a document's vectors from the vector store in batches"""
+        document = await self._run_blocking(self.documents.get, document_id)
+        if self.partitioning or (document and document["partitioned"] and isinstance(self.db, Chroma)):
+            await self._run_blocking(self._drop_partition, document_id)
+        deleted = await self._run_blocking(
+            delete_document_vectors,
+            self.db._collection,
+            document_id,
+            Config.VECTOR_DELETE_BATCH_SIZE
         )
+        self.counters.remove_vectors(deleted)
+        await self._run_blocking(self.keyword_index.remove_document, document_id)
+        return deleted
     
-    def _load_documents_metadata(self) -> Dict[str, Any]:
-        """Load document metadata from file"""
-        if os.path.exists(self.documents_file):
-            with open(self.documents_file, 'r') as f:
-                return json.load(f)
-        return {}
+    async def _write_vectors(self, documents: List[Document], vectors: List[List[float]]):
+        """Bulk-write precomputed embeddings to the vector store"""
+        with self.metrics.stage("ingest", "vector_write"):
+            ids = [str(uuid.uuid4()) for _ in documents]
+            await self._run_blocking(
+                self.db._collection.upsert,
+                ids=ids,
+                embeddings=vectors,
+                documents=[doc.page_content for doc in documents],
+                metadatas=[doc.metadata for doc in documents]
+            )
+            self.counters.add_vectors(len(ids))
+            if Config.HYBRID_SEARCH:
+                await self._run_blocking(self.keyword_index.add, documents)
+            
+            # Partitions get a copy so scoped searches never touch the shared index
+            if self.partitioning:
+                by_document: Dict[str, List[int]] = {}
+                for i, doc in enumerate(documents):
+                    by_document.setdefault(doc.metadata["document_id"], []).append(i)
+                for document_id, positions in by_document.items():
+                    await self._run_blocking(
+                        self._partition(document_id)._collection.upsert,
+                        ids=[ids[i] for i in positions],
+                        embeddings=[vectors[i] for i in positions],
+                        documents=[documents[i].page_content for i in positions],
+                        metadatas=[documents[i].metadata for i in positions]
+                    )
     
-    def _save_documents_metadata(self):
-        """Save document metadata to file"""
-        with open(self.documents_file, 'w') as f:
-            json.dump(self.documents, f, indent=2)
+    def _document_fingerprint(self, document_id: str) -> int:
+        """Per-document hash combined with XOR into the corpus version"""
+        return int(hashlib.sha256(document_id.encode("utf-8")).hexdigest()[:16], 16)
     
-    async def process_document(self, file: UploadFile) -> Dict[str, Any]:
-        """Process uploaded document and create embeddings"""
-        start_time = time.time()
+    @property
+    def corpus_version(self) -> str:
+        """Changes whenever a document is added or removed"""
+        return f"{self._corpus_fingerprint:016x}"
+    
+    def _on_corpus_changed(self, document_id: str):
+        """Update the corpus version in O(1) and invalidate cached answers"""
+        self._corpus_fingerprint ^= self._document_fingerprint(document_id)
+        self.answer_cache.invalidate()
+    
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking call on the managed thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+    
+    async def save_upload(self, file: UploadFile) -> Dict[str, Any]:
+        """Stream an upload to the spool directory in chunks, hashing and size-checking as it goes"""
+        # Starlette has already spooled the body, so this only avoids copying an
+        # oversized file; UploadSizeLimitMiddleware stops it while it arrives
+        if file.size is not None:
+            validate_file_size(file.size)
+        
+        os.makedirs(Config.SPOOL_DIR, exist_ok=True)
+        path = os.path.join(Config.SPOOL_DIR, f"{uuid.uuid4()}_{os.path.basename(file.filename)}")
+        hasher = hashlib.sha256()
+        file_size = 0
+        
+        try:
+            with open(path, "wb") as buffer:
+                while True:
+                    chunk = await file.read(Config.UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    file_size += len(chunk)
+                    validate_file_size(file_size)
+                    hasher.update(chunk)
+                    await self._run_blocking(buffer.write, chunk)
+        except BaseException:
+            # Never leave a partial upload behind
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            await file.close()
+        
+        return {
+            "path": path,
+            "filename": file.filename,
+            "file_hash": hasher.hexdigest(),
+            "file_size": file_size
+        }
+    
+    def _split_pages(self, path: str, filename: str, document_id: str) -> Iterator[List[Document]]:
+        """Lazily load pages and yield the chunks each page completes
+        
+        Loading and splitting interleave page by page, so their times are summed
+        here and recorded once the document is done.
+        """
+        load_seconds = 0.0
+        split_seconds = 0.0
+        
+        def timed_pages() -> Iterator[Document]:
+            nonlocal load_seconds
+            pages = load_pages(path, filename, process_pool=self.process_pool)
+            while True:
+                start = time.perf_counter()
+                page = next(pages, None)
+                load_seconds += time.perf_counter() - start
+                if page is None:
+                    return
+                yield page
+        
+        chunk_groups = split_document(timed_pages(), self.chunker, filename, document_id)
+        while True:
+            start = time.perf_counter()
+            chunks = next(chunk_groups, None)
+            split_seconds += time.perf_counter() - start
+            if chunks is None:
+                break
+            yield chunks
+        self.metrics.observe_stage("ingest", "load", load_seconds)
+        self.metrics.observe_stage("ingest", "split", split_seconds - load_seconds)
+    
+    async def _stream_chunk_groups(
+        self,
+        path: str,
+        filename: str,
+        document_id: str
+    ) -> AsyncIterator[List[Document]]:
+        """Parse on the thread pool and yield chunk groups as soon as they are ready"""
+        loop = asyncio.get_running_loop()
+        pages: asyncio.Queue = asyncio.Queue(maxsize=Config.INGEST_PIPELINE_DEPTH)
+        stopped = threading.Event()
+        finished = object()
         
-        # Generate unique document ID
-        document_id = str(uuid.uuid4())
+        def put(item):
+            asyncio.run_coroutine_threadsafe(pages.put(item), loop).result()
         
-        # Save uploaded file temporarily
-        temp_path = f"temp_{document_id}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        def produce():
+            try:
+                for chunks in self._split_pages(path, filename, document_id):
+                    if stopped.is_set():
+                        return
+                    if chunks:
+                        put(chunks)
+            finally:
+                if not stopped.is_set():
+                    put(finished)
         
+        producer = loop.run_in_executor(self.executor, produce)
+        group: List[Document] = []
         try:
-            # Load document based on file type
-            file_extension = os.path.splitext(file.filename)[1].lower()
-            
-            if file_extension == '.pdf':
-                loader = PyPDFLoader(temp_path)
-            elif file_extension == '.docx':
-                loader = Docx2txtLoader(temp_path)
-            else:  # .txt, .md
-                loader = TextLoader(temp_path)
-            
-            documents = loader.load()
-            
-            # Split documents into chunks
-            text_splitter = CharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                separator="\n"
-            )
-            chunks = text_splitter.split_documents(documents)
-            
-            # Add metadata to chunks
-            for chunk in chunks:
-                chunk.metadata.update({
-                    "document_id": document_id,
-                    "filename": file.filename,
-                    "chunk_index": chunks.index(chunk)
-                })
+            while True:
+                chunks = await pages.get()
+                if chunks is finished:
+                    break
+                group.extend(chunks)
+                if len(group) >= Config.INGEST_EMBED_GROUP_SIZE:
+                    yield group
+                    group = []
+            # Surface parser errors
+            await producer
+            if group:
+                yield group
+        finally:
+            # Unblock and stop the parser if the consumer gave up early
+            stopped.set()
+            while not pages.empty():
+                pages.get_nowait()
+    
+    async def ingest_file(
+        self,
+        path: str,
+        filename: str,
+        file_hash: str,
+        file_size: int,
+        on_stage: Optional[Callable[[str], None]] = None,
+        document_id: Optional[str] = None,
+        chunk_groups: Optional[AsyncIterator[List[Document]]] = None
+    ) -> Dict[str, Any]:
+        """Load, split, embed and index a spooled file, timing each stage
+        
+        ``chunk_groups`` can supply chunks already split elsewhere (tagged
+        with ``document_id``), e.g. by the bulk indexer's worker processes.
+        """
+        with self.metrics.request("ingest"):
+            start_time = time.time()
+            stage_timings: Dict[str, float] = {}
             
-            # Add to vector store
-            self.db.add_documents(chunks)
+            def begin(stage: str) -> float:
+                if on_stage:
+                    on_stage(stage)
+                return time.time()
             
-            # Store document metadata
-            self.documents[document_id] = {
-                "id": document_id,
-                "filename": file.filename,
-                "upload_date": datetime.now().isoformat(),
-                "chunk_count": len(chunks),
-                "file_size": len(content),
-                "content_preview": chunks[0].page_content[:200] + "..." if chunks else ""
-            }
+            # An exact duplicate of an existing upload is returned without re-processing
+            existing = await self._run_blocking(self.documents.find_by_hash, file_hash)
+            if existing is not None:
+                return {
+                    "document_id": existing["id"],
+                    "chunk_count": existing["chunk_count"],
+                    "duplicate": True,
+                    "stage_timings": stage_timings,
+                    "processing_time": round(time.time() - start_time, 2)
+                }
+            
+            # Generate unique document ID
+            document_id = document_id or str(uuid.uuid4())
             
-            self._save_documents_metadata()
+            # Load -> split -> tag -> embed as one pipeline: chunk groups are embedded
+            # while later pages are still being parsed, so "parse" and "embed" overlap
+            stage_start = begin("parse")
+            chunk_count = 0
+            content_preview = ""
+            in_flight = set()
+            groups = chunk_groups or self._stream_chunk_groups(path, filename, document_id)
+            try:
+                async for group in groups:
+                    if chunk_count == 0:
+                        content_preview = group[0].page_content[:200] + "..."
+                        embed_start = begin("embed")
+                    chunk_count += len(group)
+                    in_flight.add(asyncio.create_task(self.embedding_scheduler.embed_and_store(group)))
+                
+                    # Bound the number of groups held in memory awaiting embeddings
+                    if len(in_flight) >= Config.INGEST_MAX_INFLIGHT_GROUPS:
+                        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            task.result()
+                stage_timings["parse"] = round(time.time() - stage_start, 3)
+                await asyncio.gather(*in_flight)
+            except BaseException as e:
+                for task in in_flight:
+                    task.cancel()
+                # Don't leave a partially indexed document behind; anything missed here
+                # (e.g. on shutdown) is removed by compact.py
+                if isinstance(e, Exception):
+                    await asyncio.gather(*in_flight, return_exceptions=True)
+                    await self.embedding_scheduler.wait_for_document(document_id)
+                    await self._delete_vectors(document_id)
+                raise
+            finally:
+                await groups.aclose()
+            if chunk_count:
+                stage_timings["embed"] = round(time.time() - embed_start, 3)
+            
+            # Store document metadata
+            stage_start = begin("metadata")
+            with self.metrics.stage("ingest", "metadata"):
+                await self._run_blocking(self.documents.put, {
+                    "id": document_id,
+                    "filename": filename,
+                    "upload_date": datetime.now().isoformat(),
+                    "chunk_count": chunk_count,
+                    "file_size": file_size,
+                    "file_hash": file_hash,
+                    "partitioned": self.partitioning,
+                    "content_preview": content_preview
+                })
+            self.counters.add_document(chunk_count, file_size)
+            self.metrics.chunks.inc(chunk_count)
+            self._on_corpus_changed(document_id)
+            stage_timings["metadata"] = round(time.time() - stage_start, 3)
             
             processing_time = time.time() - start_time
             
             return {
                 "document_id": document_id,
-                "chunk_count": len(chunks),
+                "chunk_count": chunk_count,
+                "duplicate": False,
+                "stage_timings": stage_timings,
                 "processing_time": round(processing_time, 2)
             }
+    
+    async def process_document(self, file: UploadFile) -> Dict[str, Any]:
+        """Process uploaded document and create embeddings"""
+        upload = await self.save_upload(file)
+        
+        try:
+            return await self.ingest_file(
+                upload["path"],
+                upload["filename"],
+                upload["file_hash"],
+                upload["file_size"]
+            )
             
         except Exception as e:
-            print("UPLOAD ERROR:", e)
+            logger.exception("Failed to ingest %s", upload["filename"])
             raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            os.remove(upload["path"])
+    
+    def _qa_config_signature(self) -> tuple:
+        """Settings that require the QA pipeline to be rebuilt when they change"""
+        # Not the model: it is chosen per call, see _llm_config
+        return (self.prompt_template,)
     
-    async def ask_question(self, question: str, document_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    def _build_qa_pipeline(self):
+        """Compile the prompt | llm pipeline once for all requests"""
+        # The model is a configurable field set on every call, so it can change
+        # (per request or in Config) without rebuilding the chain
+        self.prompt = PromptTemplate(
+            template=self.prompt_template,
+            input_variables=["context", "question"]
+        )
+        llm = self.llm.configurable_fields(model_name=ConfigurableField(id="model"))
+        self.answer_chain = self.prompt | llm | StrOutputParser()
+        
+        self._qa_signature = self._qa_config_signature()
+    
+    def _get_qa_pipeline(self):
+        """Return the compiled pipeline, rebuilding it only if the configuration changed"""
+        if self._qa_signature != self._qa_config_signature():
+            self._build_qa_pipeline()
+        return self.answer_chain
+    
+    def validate_model(self, model: Optional[str]) -> Optional[str]:
+        """Only allow per-request models from the configured list"""
+        if model is not None and model not in Config.ALLOWED_LLM_MODELS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Model {model} not supported. Allowed: {Config.ALLOWED_LLM_MODELS}"
+            )
+        return model
+    
+    def _document_filter(self, document_ids: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        """Where-clause restricting a search to the given documents"""
+        if not document_ids:
+            return None
+        if len(document_ids) == 1:
+            return {"document_id": document_ids[0]}
+        return {"document_id": {"$in": list(document_ids)}}
+    
+    def _with_relevance(self, results: List[Tuple[Document, float]]) -> List[Document]:
+        """Copy search results with their cosine similarity in the ``relevance`` metadata field"""
+        # Chroma's default space and the local index return squared L2 distances,
+        # which for unit vectors are 2 - 2 * cosine
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "relevance": 1.0 - distance / 2})
+            for doc, distance in results
+        ]
+    
+    async def _retrieve_from_partitions(
+        self,
+        query_embedding: List[float],
+        k: int,
+        document_ids: List[str]
+    ) -> List[Document]:
+        """Search each document's own collection and merge the closest chunks"""
+        searches = [
+            self._run_blocking(
+                self._partition(document_id).similarity_search_by_vector_with_relevance_scores,
+                query_embedding,
+                k=k
+            )
+            for document_id in document_ids
+        ]
+        results = [pair for found in await asyncio.gather(*searches) for pair in found]
+        # Chroma returns distances: smaller is closer
+        results.sort(key=lambda pair: pair[1])
+        return self._with_relevance(results[:k])
+    
+    def _keyword_search(self, question: str, k: int, document_ids: Optional[List[str]] = None) -> List[Document]:
+        """BM25 hits, each tagged with its score relative to the question in ``keyword_relevance``"""
+        hits = self.keyword_index.search(question, k, document_ids)
+        weight = self.keyword_index.query_weight(question) or 1.0
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "keyword_relevance": min(score / weight, 1.0)})
+            for doc, score in hits
+        ]
+    
+    def _is_keyword_query(self, question: str) -> bool:
+        """Whether the question can be answered from the keyword index without an embedding"""
+        return (Config.HYBRID_SEARCH and self.keyword_index.ready
+                and is_keyword_query(question, Config.KEYWORD_QUERY_MAX_TERMS))
+    
+    async def _retrieve(
+        self,
+        question: str,
+        k: int,
+        document_ids: Optional[List[str]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Document]:
+        """Retrieve with vector search, fused with keyword search when enabled"""
+        if not (Config.HYBRID_SEARCH and self.keyword_index.ready):
+            return await self._vector_search(question, k, document_ids, query_embedding)
+        
+        candidates = k * Config.HYBRID_CANDIDATES_PER_K
+        keyword_ranking = await self._run_blocking(self._keyword_search, question, candidates, document_ids)
+        
+        # Exact-lookup queries are served by the keyword index alone: no embedding round-trip
+        if keyword_ranking and query_embedding is None and self._is_keyword_query(question):
+            return keyword_ranking[:k]
+        
+        vector_ranking = await self._vector_search(question, candidates, document_ids, query_embedding)
+        return reciprocal_rank_fusion(
+            [vector_ranking, keyword_ranking], k, rank_constant=Config.RRF_RANK_CONSTANT
+        )
+    
+    async def _vector_search(
+        self,
+        question: str,
+        k: int,
+        document_ids: Optional[List[str]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Document]:
+        """Nearest chunks by embedding, each tagged with its similarity to the question"""
+        # Reuse the embedding computed for the semantic cache instead of embedding twice
+        if query_embedding is None:
+            with self.metrics.stage("ask", "embed_query"):
+                query_embedding = await self.embeddings.aembed_query(question)
+        
+        # Small scopes go straight to per-document partitions when they exist
+        if (document_ids and isinstance(self.db, Chroma) and len(document_ids) <= Config.PARTITION_MAX_FANOUT
+                and await self._run_blocking(
+                    lambda ids: all((self.documents.get(d) or {}).get("partitioned") for d in ids),
+                    document_ids
+                )):
+            return await self._retrieve_from_partitions(query_embedding, k, document_ids)
+        
+        # Otherwise the document filter is pushed down into the vector search
+        results = await self._run_blocking(
+            self.db.similarity_search_by_vector_with_relevance_scores,
+            query_embedding,
+            k=k,
+            filter=self._document_filter(document_ids)
+        )
+        return self._with_relevance(results)
+    
+    def _select_passages(self, question: str, documents: List[Document], k: int) -> List[Document]:
+        """Merge overlapping neighbors, re-rank, keep the top k and pack them into the budget"""
+        passages = merge_overlapping(documents)
+        if self.reranker is not None:
+            passages = self.reranker.rerank(question, passages)
+        return self.context_packer.pack(passages[:k])
+    
+    async def _retrieve_context(
+        self,
+        question: str,
+        k: int,
+        document_ids: Optional[List[str]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Document]:
+        """Retrieve chunks and turn them into the passages placed in the prompt"""
+        candidates = k * Config.RERANK_CANDIDATES_PER_K if self.reranker is not None else k
+        with self.metrics.stage("ask", "retrieve"):
+            documents = await self._retrieve(question, candidates, document_ids, query_embedding)
+        
+        # Out-of-scope question: nothing is similar enough to answer from, and no
+        # keyword hit matches most of its terms. Keyword-only lookups carry no
+        # similarity and are trusted as exact matches
+        relevances = [doc.metadata["relevance"] for doc in documents if "relevance" in doc.metadata]
+        keyword_match = any(
+            doc.metadata.get("keyword_relevance", 0.0) >= Config.KEYWORD_RELEVANCE_THRESHOLD for doc in documents
+        )
+        if not documents or (relevances and max(relevances) < Config.RELEVANCE_THRESHOLD and not keyword_match):
+            return []
+        with self.metrics.stage("ask", "rerank_pack"):
+            return await self._run_blocking(self._select_passages, question, documents, k)
+    
+    def _confidence(self, passages: List[Document]) -> Optional[float]:
+        """Logistic calibration of the best and the top-3 mean passage similarity
+
+        None when no similarity was measured (keyword-only lookups).
+        """
+        relevances = sorted(
+            (doc.metadata["relevance"] for doc in passages if "relevance" in doc.metadata),
+            reverse=True
+        )
+        if not relevances:
+            return None
+        support = relevances[:3]
+        similarity = 0.7 * relevances[0] + 0.3 * sum(support) / len(support)
+        return round(1 / (1 + math.exp(-Config.CONFIDENCE_STEEPNESS * (similarity - Config.CONFIDENCE_MIDPOINT))), 3)
+    
+    def _answer_inputs(self, question: str, source_documents: List[Document]) -> Dict[str, str]:
+        """Build the prompt variables from the retrieved chunks, counting the prompt's tokens"""
+        with self.metrics.stage("ask", "prompt"):
+            inputs = {"context": "\n\n".join(doc.page_content for doc in source_documents), "question": question}
+            self.metrics.tokens.inc(self._count_tokens([self.prompt.format(**inputs)])[0], kind="prompt")
+        return inputs
+    
+    def _llm_config(self, model: Optional[str]) -> Dict[str, Any]:
+        """Model for this request: the override, else the current Config.LLM_MODEL"""
+        # Resolved per call, so a changed default takes effect without rebuilding the
+        # chain and always matches the model recorded in the answer cache scope
+        return {"configurable": {"model": model or Config.LLM_MODEL}}
+    
+    def _format_sources(self, source_documents: List[Document]) -> List[Dict[str, Any]]:
+        """Convert retrieved chunks into the API source format"""
+        sources = []
+        for doc in source_documents:
+            sources.append({
+                "content": doc.page_content,
+                "document_id": doc.metadata.get("document_id"),
+                "filename": doc.metadata.get("filename"),
+                "chunk_index": doc.metadata.get("chunk_index"),
+                "relevance": doc.metadata.get("relevance")
+            })
+        return sources
+    
+    def _cache_scope(self, document_ids: Optional[List[str]], k: int, model: Optional[str]) -> List[Any]:
+        """Request parameters that must match for a cached answer to be reused"""
+        return [sorted(document_ids or []), model or Config.LLM_MODEL, k]
+    
+    async def _lookup_cached_answer(
+        self,
+        question: str,
+        scope: List[Any],
+        corpus_version: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """Check the exact tier, then the semantic tier; returns the query embedding if computed"""
+        if not Config.ANSWER_CACHE_ENABLED:
+            return None, None
+        
+        with self.metrics.stage("ask", "cache_lookup"):
+            cached = self.answer_cache.get(question, scope, corpus_version)
+            if cached is not None:
+                self.metrics.cache_lookups.inc(cache="answer", result="hit")
+                return cached, None
+            
+            # Keyword-only queries never need an embedding, so they skip the semantic tier
+            query_embedding = None
+            if Config.ANSWER_CACHE_SEMANTIC and not self._is_keyword_query(question):
+                with self.metrics.stage("ask", "embed_query"):
+                    query_embedding = await self.embeddings.aembed_query(question)
+                cached = self.answer_cache.get_similar(query_embedding, scope, corpus_version)
+            
+            if cached is None:
+                self.answer_cache.record_miss()
+            self.metrics.cache_lookups.inc(cache="answer", result="miss" if cached is None else "hit")
+            return cached, query_embedding
+    
+    def _store_cached_answer(
+        self,
+        question: str,
+        scope: List[Any],
+        corpus_version: str,
+        result: Dict[str, Any],
+        query_embedding: Optional[List[float]]
+    ):
+        """Cache an answer unless the corpus changed while it was being generated"""
+        if Config.ANSWER_CACHE_ENABLED and corpus_version == self.corpus_version:
+            self.answer_cache.put(question, scope, corpus_version, result, query_embedding)
+    
+    async def _run_qa(
+        self,
+        question: str,
+        k: int,
+        model: Optional[str],
+        document_ids: Optional[List[str]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        """Retrieve context and generate an answer with the precompiled pipeline"""
+        answer_chain = self._get_qa_pipeline()
+        
+        source_documents = await self._retrieve_context(question, k, document_ids, query_embedding)
+        if not source_documents:
+            return {"result": Config.NO_ANSWER_TEXT, "source_documents": [], "confidence": 0.0}
+        
+        inputs = self._answer_inputs(question, source_documents)
+        with self.metrics.stage("ask", "llm"):
+            answer = await answer_chain.ainvoke(inputs, config=self._llm_config(model))
+        self.metrics.tokens.inc(self._count_tokens([answer])[0], kind="completion")
+        
+        return {
+            "result": answer,
+            "source_documents": source_documents,
+            "confidence": self._confidence(source_documents)
+        }
+    
+    async def ask_question(
+        self,
+        question: str,
+        document_ids: Optional[List[str]] = None,
+        k: Optional[int] = None,
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Ask a question using RAG"""
         start_time = time.time()
+        model = self.validate_model(model)
+        k = k or Config.RETRIEVAL_K
+        # One deadline covers the cache lookup, the wait for a QA slot and the answer
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + Config.QA_TIMEOUT
+        with self.metrics.request("ask"):
+            scope = self._cache_scope(document_ids, k, model)
+            corpus_version = self.corpus_version
+            
+            try:
+                # Repeated and near-duplicate questions are answered from the cache
+                cached, query_embedding = await asyncio.wait_for(
+                    self._lookup_cached_answer(question, scope, corpus_version),
+                    timeout=deadline - loop.time()
+                )
+                if cached is not None:
+                    return {
+                        **cached,
+                        "cached": True,
+                        "processing_time": round(time.time() - start_time, 2)
+                    }
+                
+                # Get answer: async retriever and LLM calls, bounded and time-limited
+                await asyncio.wait_for(self._qa_semaphore.acquire(), timeout=deadline - loop.time())
+                try:
+                    result = await asyncio.wait_for(
+                        self._run_qa(question, k, model, document_ids, query_embedding),
+                        timeout=deadline - loop.time()
+                    )
+                finally:
+                    self._qa_semaphore.release()
+                
+                # Process sources
+                sources = self._format_sources(result['source_documents'])
+                
+                answer = {
+                    "answer": result['result'],
+                    "sources": sources,
+                    "confidence_score": result['confidence']
+                }
+                self._store_cached_answer(question, scope, corpus_version, answer, query_embedding)
+                
+                processing_time = time.time() - start_time
+                
+                return {
+                    **answer,
+                    "cached": False,
+                    "processing_time": round(processing_time, 2)
+                }
+                
+            except asyncio.TimeoutError:
+                raise
+            except Exception as e:
+                raise Exception(f"Error processing question: {str(e)}")
+    
+    async def stream_answer(
+        self,
+        question: str,
+        document_ids: Optional[List[str]] = None,
+        k: Optional[int] = None,
+        model: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream sources first, then answer tokens as the LLM produces them"""
+        model = self.validate_model(model)
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        deadline = start_time + Config.QA_TIMEOUT
+        timings: Dict[str, float] = {}
         
-        try:
-            # Create retriever
-            retriever = self.db.as_retriever(
-                search_type="similarity",
-                search_kwargs={"k": 5}
-            )
+        def elapsed_ms(since: float) -> float:
+            return round((loop.time() - since) * 1000, 1)
+        
+        with self.metrics.request("ask_stream"):
+            k = k or Config.RETRIEVAL_K
+            scope = self._cache_scope(document_ids, k, model)
+            corpus_version = self.corpus_version
             
-            # Create RAG chain
-            qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=retriever,
-                chain_type_kwargs={"prompt": self.prompt},
-                return_source_documents=True
+            # Cache hit: send the stored answer as a single token
+            stage_start = loop.time()
+            cached, query_embedding = await asyncio.wait_for(
+                self._lookup_cached_answer(question, scope, corpus_version),
+                timeout=deadline - loop.time()
             )
+            timings["cache_lookup_ms"] = elapsed_ms(stage_start)
+            if cached is not None:
+                yield {"event": "sources", "data": {
+                    "sources": cached["sources"],
+                    "confidence_score": cached["confidence_score"],
+                    "cached": True
+                }}
+                yield {"event": "token", "data": {"text": cached["answer"]}}
+                timings["total_ms"] = elapsed_ms(start_time)
+                yield {"event": "done", "data": {"timings": timings, "cached": True}}
+                return
             
-            # Get answer
-            result = qa_chain({"query": question})
-            
-            # Process sources
-            sources = []
-            for doc in result['source_documents']:
-                sources.append({
-                    "content": doc.page_content,
-                    "document_id": doc.metadata.get("document_id"),
-                    "filename": doc.metadata.get("filename"),
-                    "chunk_index": doc.metadata.get("chunk_index")
-                })
-            
-            processing_time = time.time() - start_time
+            # Waiting for a QA slot counts against the deadline too
+            await asyncio.wait_for(self._qa_semaphore.acquire(), timeout=deadline - loop.time())
+            try:
+                # Retrieval: sources are sent before generation starts
+                stage_start = loop.time()
+                source_documents = await asyncio.wait_for(
+                    self._retrieve_context(question, k, document_ids, query_embedding),
+                    timeout=deadline - loop.time()
+                )
+                timings["retrieve_ms"] = elapsed_ms(stage_start)
+                sources = self._format_sources(source_documents)
+                confidence = self._confidence(source_documents) if source_documents else 0.0
+                yield {"event": "sources", "data": {
+                    "sources": sources,
+                    "confidence_score": confidence,
+                    "cached": False
+                }}
+                
+                answer_parts = []
+                if not source_documents:
+                    # Nothing relevant was found: answer without calling the LLM
+                    answer_parts.append(Config.NO_ANSWER_TEXT)
+                    yield {"event": "token", "data": {"text": Config.NO_ANSWER_TEXT}}
+                else:
+                    # Generation: forward each token as soon as it arrives
+                    answer_chain = self._get_qa_pipeline()
+                    inputs = self._answer_inputs(question, source_documents)
+                    stage_start = loop.time()
+                    with self.metrics.stage("ask", "llm"):
+                        tokens = answer_chain.astream(inputs, config=self._llm_config(model)).__aiter__()
+                        while True:
+                            try:
+                                token = await asyncio.wait_for(tokens.__anext__(), timeout=deadline - loop.time())
+                            except StopAsyncIteration:
+                                break
+                            if "first_token_ms" not in timings:
+                                timings["first_token_ms"] = elapsed_ms(start_time)
+                                self.metrics.observe_stage("ask", "llm_first_token", loop.time() - stage_start)
+                            answer_parts.append(token)
+                            yield {"event": "token", "data": {"text": token}}
+                    timings["generate_ms"] = elapsed_ms(stage_start)
+                    self.metrics.tokens.inc(self._count_tokens(["".join(answer_parts)])[0], kind="completion")
+            finally:
+                self._qa_semaphore.release()
             
-            return {
-                "answer": result['result'],
+            self._store_cached_answer(question, scope, corpus_version, {
+                "answer": "".join(answer_parts),
                 "sources": sources,
-                "confidence_score": 0.85,  # Placeholder - could be calculated based on similarity scores
-                "processing_time": round(processing_time, 2)
-            }
+                "confidence_score": confidence
+            }, query_embedding)
             
-        except Exception as e:
-            raise Exception(f"Error processing question: {str(e)}")
+            timings["total_ms"] = elapsed_ms(start_time)
+            yield {"event": "done", "data": {"timings": timings, "cached": False}}
     
-    async def get_documents(self) -> List[Dict[str, Any]]:
-        """Get list of uploaded documents"""
-        return list(self.documents.values())
+    def _encode_cursor(self, document: Dict[str, Any], sort_by: str, descending: bool) -> str:
+        """Opaque pagination cursor pointing just past ``document``"""
+        raw = json.dumps([sort_by, descending, document[sort_by], document["id"]])
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+    
+    def _decode_cursor(self, cursor: str, sort_by: str, descending: bool) -> Tuple[Any, str]:
+        try:
+            cursor_sort, cursor_descending, value, document_id = json.loads(
+                base64.urlsafe_b64decode(cursor.encode("ascii"))
+            )
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if cursor_sort != sort_by or cursor_descending != descending:
+            raise HTTPException(status_code=400, detail="Cursor was issued for a different sort order")
+        return value, document_id
+    
+    async def get_documents(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort_by: str = "upload_date",
+        descending: bool = False,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get a page of uploaded documents with optional field projection"""
+        if sort_by not in SORTABLE_COLUMNS:
+            raise HTTPException(status_code=400, detail=f"Cannot sort by {sort_by}. Allowed: {SORTABLE_COLUMNS}")
+        if fields is not None:
+            unknown = [field for field in fields if field not in LISTABLE_COLUMNS]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}. Allowed: {LISTABLE_COLUMNS}")
+        
+        after = self._decode_cursor(cursor, sort_by, descending) if cursor else None
+        # Fetch one extra row to know whether another page exists
+        documents = await self._run_blocking(
+            self.documents.list, limit + 1, after, sort_by, descending, fields
+        )
+        next_cursor = self._encode_cursor(documents[limit - 1], sort_by, descending) if len(documents) > limit else None
+        documents = documents[:limit]
+        
+        # The cursor needs the sort column, the response only carries what was asked for
+        if fields is not None:
+            documents = [
+                {key: value for key, value in doc.items() if key in fields or key == "id"}
+                for doc in documents
+            ]
+        return {"documents": documents, "next_cursor": next_cursor}
     
     async def delete_document(self, document_id: str):
         """Delete a document and its embeddings"""
-        if document_id not in self.documents:
+        if not await self._run_blocking(self.documents.__contains__, document_id):
             raise Exception("Document not found")
         
-        # Remove from vector store (this is a simplified version)
-        # In production, you'd want to implement proper deletion from Chroma
+        # Remove from vector store
+        await self._delete_vectors(document_id)
         
         # Remove from metadata
-        del self.documents[document_id]
-        self._save_documents_metadata()
+        document = await self._run_blocking(self.documents.delete, document_id)
+        self.counters.remove_document(document["chunk_count"], document["file_size"])
+        self._on_corpus_changed(document_id)
+    
+    async def discard_vectors(self, document_id: str) -> int:
+        """Delete the vectors of a document that was never stored, e.g. one cut off by a crash"""
+        if await self._run_blocking(self.documents.__contains__, document_id):
+            raise Exception("Document is stored; use delete_document")
+        return await self._delete_vectors(document_id)
+    
+    async def reconcile_stats(self):
+        """Reset the corpus counters from the metadata and the vector store"""
+        vector_count = await self._run_blocking(self.db._collection.count)
+        totals = await self._run_blocking(self.documents.totals)
+        self.counters.reconcile(
+            totals["documents"], totals["chunks"], totals["bytes"], vector_count, totals["bytes_ingested"]
+        )
+    
+    async def _reconcile_loop(self):
+        """Periodically correct any drift in the corpus counters"""
+        while True:
+            await asyncio.sleep(Config.STATS_RECONCILE_INTERVAL)
+            try:
+                await self.reconcile_stats()
+            except Exception:
+                logger.exception("Failed to reconcile corpus stats")
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get RAG system statistics"""
-        total_documents = len(self.documents)
-        total_chunks = sum(doc["chunk_count"] for doc in self.documents.values())
+        stats = {
+            **self.counters.snapshot(),
+            "answer_cache": self.answer_cache.stats(),
+            "embedding_scheduler": self.embedding_scheduler.stats(),
+            "keyword_index": {"chunks": len(self.keyword_index), "ready": self.keyword_index.ready},
+            "system_status": "healthy"
+        }
+        if isinstance(self.db, LocalVectorStore):
+            stats["vector_index"] = self.db._collection.stats()
+        return stats
+    
+    async def get_document_stats(self, document_id: str) -> Dict[str, Any]:
+        """Get totals for a single document"""
+        document = await self._run_blocking(self.documents.get, document_id)
+        if document is None:
+            raise HTTPException(status_code=404, detail="Document not found")
         
         return {
-            "total_documents": total_documents,
-            "total_chunks": total_chunks,
-            "vector_db_size": len(self.db.get()["ids"]) if self.db.get()["ids"] else 0,
-            "system_status": "healthy"
-        } 
\ No newline at end of file
+            "document_id": document_id,
+            "filename": document["filename"],
+            "chunk_count": document["chunk_count"],
+            "file_size": document["file_size"]
+        }
@@ -0,0 +1,10 @@
+import tiktoken
+
+from utils.config import Config
+
+def get_encoding(name: str):
+    """tiktoken encoding ``name``, or a local FakeEncoding when Config.USE_FAKE_TOKENIZER is set"""
+    if Config.USE_FAKE_TOKENIZER:
+        from services.fakes import FakeEncoding
+        return FakeEncoding(name)
+    return tiktoken.get_encoding(name)
@@ -0,0 +1,33 @@
+from typing import Optional
+
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from services.local_vector_store import LocalVectorStore
+from utils.config import Config
+
+VECTOR_BACKENDS = ["chroma", "local"]
+
+def open_vector_store(embedding_function: Optional[Embeddings] = None) -> VectorStore:
+    """Open the vector store selected by Config.VECTOR_BACKEND"""
+    if Config.VECTOR_BACKEND == "chroma":
+        return Chroma(persist_directory=Config.VECTOR_DB_DIR, embedding_function=embedding_function)
+    if Config.VECTOR_BACKEND == "local":
+        return LocalVectorStore(
+            Config.LOCAL_INDEX_DIR,
+            embedding_function=embedding_function,
+            mode=Config.LOCAL_INDEX_MODE,
+            ivf_min_vectors=Config.LOCAL_INDEX_IVF_MIN_VECTORS,
+            ivf_probes=Config.LOCAL_INDEX_IVF_PROBES,
+            quantization=Config.LOCAL_INDEX_QUANTIZATION,
+            dimensions=Config.LOCAL_INDEX_DIMENSIONS,
+            pq_subvectors=Config.LOCAL_INDEX_PQ_SUBVECTORS,
+            rerank_factor=Config.LOCAL_INDEX_RERANK_FACTOR,
+            codec_train_min_vectors=Config.LOCAL_INDEX_CODEC_TRAIN_MIN_VECTORS
+        )
+    raise ValueError(f"Unknown vector backend {Config.VECTOR_BACKEND}. Allowed: {VECTOR_BACKENDS}")
+
+def vector_store_directory() -> str:
+    """Directory holding the selected vector store's files"""
+    return Config.LOCAL_INDEX_DIR if Config.VECTOR_BACKEND == "local" else Config.VECTOR_DB_DIR
@@ -0,0 +1,8 @@
+import pytest
+
+from utils.config import Config
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    """Tests never download tiktoken encodings"""
+    monkeypatch.setattr(Config, "USE_FAKE_TOKENIZER", True)
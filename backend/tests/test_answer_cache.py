@@ -0,0 +1,101 @@
+import asyncio
+
+import numpy as np
+
+from services.answer_cache import AnswerCache
+from services.fakes import FakeEmbeddings, FakeStreamingChatModel
+from services.rag_service import RAGService
+from utils.config import Config
+
+SCOPE = [[], "gpt-3.5-turbo", 4]
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+def make_cache(**options) -> AnswerCache:
+    return AnswerCache(**{"max_entries": 3, "ttl_seconds": 60, "similarity_threshold": 0.9, **options})
+
+def test_semantic_lookup_reuses_rows_of_evicted_entries(tmp_path):
+    cache = make_cache(persist_path=str(tmp_path / "answers.json"))
+    for i in range(3):
+        cache.put(f"question {i}", SCOPE, "v1", {"answer": i}, unit(*np.eye(4)[i]))
+    # Evicts question 0 and takes over its matrix row
+    cache.put("question 3", SCOPE, "v1", {"answer": 3}, unit(0, 0, 0, 1))
+
+    assert cache.get_similar(unit(1, 0, 0, 0), SCOPE, "v1") is None
+    assert cache.get_similar(unit(0, 0.1, 0, 1), SCOPE, "v1") == {"answer": 3}
+    assert cache.get_similar(unit(0, 1, 0, 0), SCOPE, "v1") == {"answer": 1}
+    # Other scopes and corpus versions never match
+    assert cache.get_similar(unit(0, 1, 0, 0), [["doc"], "gpt-3.5-turbo", 4], "v1") is None
+    assert cache.get_similar(unit(0, 1, 0, 0), SCOPE, "v2") is None
+
+    cache.save()
+    reloaded = make_cache(persist_path=str(tmp_path / "answers.json"))
+    assert reloaded.get_similar(unit(0, 0.1, 0, 1), SCOPE, "v1") == {"answer": 3}
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.answer_cache.time.time", lambda: now[0])
+    cache = make_cache(ttl_seconds=10)
+    cache.put("What is a vector?", SCOPE, "v1", {"answer": "exact"}, unit(1, 0, 0, 0))
+
+    now[0] += 9
+    assert cache.get("what is a vector", SCOPE, "v1") == {"answer": "exact"}
+    assert cache.get_similar(unit(1, 0.1, 0, 0), SCOPE, "v1") == {"answer": "exact"}
+
+    now[0] += 2
+    assert cache.get_similar(unit(1, 0.1, 0, 0), SCOPE, "v1") is None
+    assert cache.get("What is a vector?", SCOPE, "v1") is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = make_cache()
+    for i in range(3):
+        cache.put(f"question {i}", SCOPE, "v1", {"answer": i})
+    # Reading question 0 makes question 1 the least recently used
+    assert cache.get("question 0", SCOPE, "v1") == {"answer": 0}
+    cache.put("question 3", SCOPE, "v1", {"answer": 3})
+
+    assert cache.get("question 1", SCOPE, "v1") is None
+    assert [cache.get(f"question {i}", SCOPE, "v1") for i in (0, 2, 3)] == [{"answer": 0}, {"answer": 2}, {"answer": 3}]
+
+def test_semantic_hits_need_the_similarity_threshold():
+    cache = make_cache(similarity_threshold=0.9)
+    cache.put("What is a vector?", SCOPE, "v1", {"answer": "vector"}, unit(1, 0, 0, 0))
+
+    # cos = 0.95 and 0.8
+    assert cache.get_similar(unit(0.95, np.sqrt(1 - 0.95 ** 2), 0, 0), SCOPE, "v1") == {"answer": "vector"}
+    assert cache.get_similar(unit(0.8, 0.6, 0, 0), SCOPE, "v1") is None
+    assert (cache.semantic_hits, cache.exact_hits) == (1, 0)
+
+def test_uploads_and_deletes_invalidate_cached_answers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(Config, "ANSWER_CACHE_FILE", None)
+    for name in ("vectors", "tensors"):
+        (tmp_path / f"{name}.txt").write_text(f"Notes on {name}. A {name[:-1]} has components.")
+
+    async def scenario():
+        rag_service = RAGService(embeddings=FakeEmbeddings(dimensions=8), llm=FakeStreamingChatModel())
+
+        async def ask():
+            return (await rag_service.ask_question("What is a vector?"))["cached"]
+
+        async def ingest(name):
+            path = tmp_path / f"{name}.txt"
+            result = await rag_service.ingest_file(str(path), path.name, name, path.stat().st_size)
+            return result["document_id"]
+
+        try:
+            await ingest("vectors")
+            asked = [await ask(), await ask()]
+            tensors = await ingest("tensors")
+            asked += [await ask(), await ask()]
+            await rag_service.delete_document(tensors)
+            asked += [await ask()]
+            return asked
+        finally:
+            await rag_service.close()
+
+    assert asyncio.run(scenario()) == [False, True, False, True, False]
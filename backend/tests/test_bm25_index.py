@@ -0,0 +1,45 @@
+from langchain_core.documents import Document
+
+from services.bm25_index import BM25Index, chunk_key, reciprocal_rank_fusion
+
+def chunk(document_id, chunk_index, text, **metadata):
+    return Document(page_content=text, metadata={"document_id": document_id, "chunk_index": chunk_index, **metadata})
+
+def keys(documents):
+    return [chunk_key(document) for document in documents]
+
+def test_search_follows_adds_replacements_and_removals():
+    index = BM25Index()
+    index.add([
+        chunk("a", 0, "The gearbox needs oil every year."),
+        chunk("a", 1, "Turbine blades are inspected monthly."),
+        chunk("b", 0, "Gearbox gearbox gearbox: replace the gearbox seal."),
+    ])
+
+    assert keys(document for document, _ in index.search("gearbox", 5)) == ["b:0", "a:0"]
+    assert keys(document for document, _ in index.search("gearbox", 5, document_ids=["a"])) == ["a:0"]
+
+    # Re-adding a chunk replaces its terms
+    index.add([chunk("b", 0, "Replace the turbine seal.")])
+    assert len(index) == 3
+    assert keys(document for document, _ in index.search("gearbox", 5)) == ["a:0"]
+
+    index.remove_document("a")
+    assert len(index) == 1
+    assert index.search("gearbox", 5) == []
+    assert keys(document for document, _ in index.search("turbine", 5)) == ["b:0"]
+
+    index.remove_document("b")
+    assert index.search("turbine", 5) == []
+
+def test_rrf_ranks_chunks_found_by_both_retrievers_first():
+    vector = [chunk("a", 0, "zero", score=0.9), chunk("a", 1, "one", score=0.8), chunk("a", 2, "two", score=0.7)]
+    keyword = [chunk("a", 2, "two", keyword_score=3.0), chunk("a", 3, "three", keyword_score=2.0)]
+
+    fused = reciprocal_rank_fusion([vector, keyword], k=3)
+
+    # a:2 is third and first: 1/63 + 1/61 beats a:0's 1/61
+    assert keys(fused) == ["a:2", "a:0", "a:1"]
+    # Duplicates keep the first ranking's metadata plus what the other ranking adds
+    assert fused[0].metadata["score"] == 0.7
+    assert fused[0].metadata["keyword_score"] == 3.0
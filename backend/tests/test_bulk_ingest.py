@@ -0,0 +1,66 @@
+import asyncio
+import json
+import zipfile
+from argparse import Namespace
+
+import bulk_ingest
+from services.fakes import FakeEmbeddings, FakeStreamingChatModel
+from services.rag_service import RAGService
+from utils.config import Config
+
+def test_rerun_skips_finished_sources_and_discards_interrupted_documents(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Read again by the spawned worker processes
+    monkeypatch.setenv("RAG_FAKE_TOKENIZER", "1")
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(Config, "ANSWER_CACHE_FILE", None)
+    monkeypatch.setattr(Config, "HYBRID_SEARCH", False)
+    monkeypatch.setattr(Config, "USE_FAKE_EMBEDDINGS", True)
+    monkeypatch.setattr(Config, "USE_FAKE_LLM", True)
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for name in ("a", "b"):
+        (corpus / f"{name}.txt").write_text(f"Document {name} is about {name * 3}.")
+    with zipfile.ZipFile(corpus / "more.zip", "w") as archive:
+        archive.writestr("c.txt", "Document c is about ccc.")
+        archive.writestr("copy_of_a.txt", (corpus / "a.txt").read_text())
+    state_file = str(tmp_path / "state.jsonl")
+    args = Namespace(paths=[str(corpus)], processes=1, concurrency=4, state_file=state_file)
+
+    first = asyncio.run(bulk_ingest.run(args))
+    assert (first["indexed"], first["duplicate"], first["failed"], first["resumed"]) == (3, 1, 0, 0)
+
+    # A crash while d.txt was being written: vectors without a metadata row
+    (corpus / "d.txt").write_text("Document d is about ddd.")
+    with open(state_file, "a") as f:
+        f.write(json.dumps({"source": str(corpus / "d.txt"), "status": "started", "document_id": "lost"}) + "\n")
+        f.write('{"source": "cut short')
+
+    async def write_partial_vectors():
+        rag_service = RAGService(embeddings=FakeEmbeddings(), llm=FakeStreamingChatModel())
+        try:
+            rag_service.db._collection.upsert(
+                ids=["partial"], embeddings=[FakeEmbeddings().embed_query("partial")],
+                documents=["partial"], metadatas=[{"document_id": "lost"}]
+            )
+        finally:
+            await rag_service.close()
+
+    asyncio.run(write_partial_vectors())
+
+    second = asyncio.run(bulk_ingest.run(args))
+    assert (second["indexed"], second["duplicate"], second["failed"], second["resumed"]) == (1, 0, 0, 4)
+
+    async def stored():
+        rag_service = RAGService(embeddings=FakeEmbeddings(), llm=FakeStreamingChatModel())
+        try:
+            collection = rag_service.db._collection
+            lost = collection.get(where={"document_id": "lost"}, include=[])["ids"]
+            filenames = sorted(rag_service.documents.get(document_id)["filename"] for document_id in rag_service.documents.ids())
+            return filenames, lost
+        finally:
+            await rag_service.close()
+
+    filenames, lost = asyncio.run(stored())
+    assert filenames == ["a.txt", "b.txt", "c.txt", "d.txt"]
+    assert lost == []
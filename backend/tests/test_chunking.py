@@ -0,0 +1,50 @@
+from langchain_core.documents import Document
+
+from services.chunking import StructuredChunker
+
+GUIDE = """# Setup
+
+Install the package with pip. Then run the tests.
+
+Q: How do I reset the device?
+A: Hold the power button for ten seconds until the light blinks twice and then release it.
+
+# Usage
+
+Call the client with a token. The token is read from the environment when it is missing."""
+
+def make_chunker(**options) -> StructuredChunker:
+    return StructuredChunker("cl100k_base", **{"chunk_tokens": 40, "min_chunk_tokens": 10, "max_overlap_tokens": 20, **options})
+
+def split(chunker, *pages):
+    documents = [Document(page_content=text, metadata={"page": i}) for i, text in enumerate(pages)]
+    return [chunk for completed in chunker.split(documents) for chunk in completed]
+
+def test_chunks_are_cut_at_headings_and_keep_answers_with_questions():
+    chunks = split(make_chunker(), GUIDE)
+
+    assert [chunk.page_content for chunk in chunks] == [
+        "# Setup\n\nInstall the package with pip. Then run the tests.",
+        "Q: How do I reset the device?\nA: Hold the power button for ten seconds until the light blinks twice "
+        "and then release it.",
+        "# Usage\n\nCall the client with a token. The token is read from the environment when it is missing."
+    ]
+    assert [chunk.metadata["section"] for chunk in chunks] == ["Setup", "Setup", "Usage"]
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        assert GUIDE[start:start + len(chunk.page_content)] == chunk.page_content
+
+def test_paragraph_cuts_overlap_by_whole_sentences_within_budget():
+    chunker = make_chunker()
+    paragraph = " ".join(f"Sentence number {i} talks about topic {i}." for i in range(12))
+    chunks = split(chunker, paragraph)
+
+    assert len(chunks) > 2
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunker._count(chunk.page_content) <= chunker.chunk_tokens
+        # The next chunk starts with the last sentences of the previous one
+        overlap = previous.page_content[chunk.metadata["start_index"] - previous.metadata["start_index"]:]
+        assert overlap and chunk.page_content.startswith(overlap)
+        assert overlap.startswith("Sentence") and overlap.endswith(".")
+        assert chunker._count(overlap) <= chunker.max_overlap_tokens
+    assert chunks[-1].page_content.endswith("topic 11.")
@@ -0,0 +1,33 @@
+import numpy as np
+
+from services.compaction import compact_collection
+from services.local_vector_store import LocalVectorIndex
+
+def make_index(path, documents: int, chunks: int = 50) -> LocalVectorIndex:
+    rng = np.random.default_rng(0)
+    index = LocalVectorIndex(str(path))
+    count = documents * chunks
+    index.upsert(
+        ids=[f"v{i}" for i in range(count)],
+        embeddings=rng.standard_normal((count, 64), dtype=np.float32).tolist(),
+        documents=[f"chunk {i}" for i in range(count)],
+        metadatas=[{"document_id": f"doc{i // chunks}"} for i in range(count)]
+    )
+    return index
+
+def test_compaction_removes_only_orphaned_vectors_and_reclaims_space(tmp_path):
+    index = make_index(tmp_path, documents=4)
+    live = {"doc0", "doc2"}
+    try:
+        dry_run = compact_collection(index, str(tmp_path), live, batch_size=30, dry_run=True)
+        assert (dry_run["orphaned_vectors"], dry_run["vectors_after"]) == (100, 200)
+
+        report = compact_collection(index, str(tmp_path), live, batch_size=30)
+        assert (report["vectors_before"], report["orphaned_vectors"], report["vectors_after"]) == (200, 100, 100)
+        assert report["bytes_reclaimed"] > 0
+
+        remaining = index.get(include=["metadatas"])
+        assert {metadata["document_id"] for metadata in remaining["metadatas"]} == live
+        assert compact_collection(index, str(tmp_path), live, batch_size=30)["orphaned_vectors"] == 0
+    finally:
+        index.close()
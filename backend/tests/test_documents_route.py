@@ -0,0 +1,18 @@
+import pytest
+
+from routes.documents import _etag_matches
+
+ETAG = 'W/"abc"'
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('W/"abc"', True),
+    ('"abc"', True),
+    ('W/"other", W/"abc"', True),
+    ('"other","abc"', True),
+    ("*", True),
+    ('W/"other"', False),
+    ('W/"abcd"', False),
+])
+def test_if_none_match_uses_weak_comparison_over_the_list(header, expected):
+    assert _etag_matches(header, ETAG) is expected
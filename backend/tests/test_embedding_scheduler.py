@@ -0,0 +1,107 @@
+import asyncio
+from typing import List
+
+import pytest
+from langchain_core.documents import Document
+
+from services.embedding_scheduler import EmbeddingScheduler
+from services.fakes import FakeEmbeddings, FakeStreamingChatModel
+from services.rag_service import RAGService
+from utils.config import Config
+
+def chunks(document_id: str, count: int) -> List[Document]:
+    return [
+        Document(page_content=f"{document_id} chunk {i}", metadata={"document_id": document_id, "chunk_index": i})
+        for i in range(count)
+    ]
+
+def make_scheduler(embeddings, written: List[Document], **options) -> EmbeddingScheduler:
+    async def write_vectors(documents, vectors):
+        await asyncio.sleep(0)
+        written.extend(documents)
+
+    async def count_tokens(texts):
+        return [len(text.split()) for text in texts]
+
+    return EmbeddingScheduler(embeddings, write_vectors=write_vectors, count_tokens=count_tokens, batch_wait=0, **options)
+
+def test_cancelled_chunks_in_a_running_batch_are_not_written():
+    async def scenario():
+        embeddings = FakeEmbeddings(dimensions=8, request_latency=0.1)
+        written: List[Document] = []
+        scheduler = make_scheduler(embeddings, written)
+        task = asyncio.create_task(scheduler.embed_and_store(chunks("doc", 4)))
+        await asyncio.sleep(0.02)
+        assert embeddings.requests == 1
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await scheduler.wait_for_document("doc")
+        await scheduler.stop()
+        return written
+
+    assert asyncio.run(scenario()) == []
+
+def test_cancelled_chunks_waiting_in_the_queue_are_never_embedded():
+    async def scenario():
+        embeddings = FakeEmbeddings(dimensions=8, request_latency=0.1)
+        written: List[Document] = []
+        scheduler = make_scheduler(embeddings, written, max_batch_size=2, max_concurrency=1)
+        first = asyncio.create_task(scheduler.embed_and_store(chunks("kept", 2)))
+        second = asyncio.create_task(scheduler.embed_and_store(chunks("cancelled", 4)))
+        await asyncio.sleep(0.02)
+
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        await first
+        await scheduler.wait_for_document("cancelled")
+        await scheduler.stop()
+        return embeddings, written
+
+    embeddings, written = asyncio.run(scenario())
+    assert embeddings.texts_embedded == 2
+    assert {document.metadata["document_id"] for document in written} == {"kept"}
+
+class FailingEmbeddings(FakeEmbeddings):
+    """Fails the second embedding request; the others are still running when it does"""
+
+    async def aembed_documents(self, texts):
+        if self.requests == 1:
+            self.requests += 1
+            await asyncio.sleep(0.05)
+            raise RuntimeError("embedding request failed")
+        vectors = await super().aembed_documents(texts)
+        await asyncio.sleep(0.3)
+        return vectors
+
+@pytest.mark.parametrize("backend", ["chroma", "local"])
+def test_failed_ingestion_leaves_no_vectors_behind(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", backend)
+    monkeypatch.setattr(Config, "ANSWER_CACHE_FILE", None)
+    monkeypatch.setattr(Config, "CHUNK_TOKENS", 40)
+    monkeypatch.setattr(Config, "CHUNK_MIN_TOKENS", 10)
+    monkeypatch.setattr(Config, "EMBEDDING_BATCH_MAX_SIZE", 5)
+    monkeypatch.setattr(Config, "EMBEDDING_BATCH_WAIT", 0)
+    monkeypatch.setattr(Config, "EMBEDDING_MAX_RETRIES", 0)
+    monkeypatch.setattr(Config, "INGEST_EMBED_GROUP_SIZE", 5)
+    path = tmp_path / "questions.txt"
+    path.write_text("\n\n".join(
+        f"{i}. What is concept number {i} in topic {i % 7}?\nAnswer: Concept {i} is explained with several words here."
+        for i in range(40)
+    ))
+
+    async def scenario():
+        rag_service = RAGService(embeddings=FailingEmbeddings(dimensions=8), llm=FakeStreamingChatModel())
+        rag_service.keyword_index.ready = True
+        try:
+            with pytest.raises(RuntimeError):
+                await rag_service.ingest_file(str(path), path.name, "hash", path.stat().st_size)
+            # Batches that were still embedding must not write after the rollback
+            await asyncio.sleep(0.5)
+            return rag_service.db._collection.count(), len(rag_service.keyword_index), list(rag_service.documents.ids())
+        finally:
+            await rag_service.close()
+
+    vectors, keyword_chunks, documents = asyncio.run(scenario())
+    assert (vectors, keyword_chunks, documents) == (0, 0, [])
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+
+from routes import documents
+from services.fakes import FakeEmbeddings, FakeStreamingChatModel
+from services.ingestion_jobs import IngestionJobQueue
+from services.rag_service import RAGService
+from utils.config import Config
+
+class RecordingService:
+    """Stands in for RAGService; ``block`` keeps ingestion running until cancelled"""
+
+    def __init__(self, block: bool = False):
+        self.block = block
+        self.started = asyncio.Event()
+        self.ingested = []
+
+    async def ingest_file(self, path, filename, file_hash, file_size, on_stage=None):
+        self.started.set()
+        if self.block:
+            await asyncio.Event().wait()
+        self.ingested.append(filename)
+        return {"document_id": filename, "chunk_count": 1, "duplicate": False, "stage_timings": {}}
+
+def make_queue(tmp_path, rag_service, **options) -> IngestionJobQueue:
+    return IngestionJobQueue(rag_service, **{
+        "jobs_file": str(tmp_path / "jobs.json"), "spool_dir": str(tmp_path / "spool"),
+        "max_queue_size": 10, "workers": 1, "max_finished_jobs": 10, **options
+    })
+
+def spool(tmp_path, name: str) -> dict:
+    os.makedirs(tmp_path / "spool", exist_ok=True)
+    path = tmp_path / "spool" / name
+    path.write_text("content")
+    return {"path": str(path), "filename": name, "file_hash": name, "file_size": 7}
+
+def test_jobs_interrupted_by_a_restart_are_run_on_the_next_start(tmp_path):
+    async def first_run():
+        service = RecordingService(block=True)
+        queue = make_queue(tmp_path, service)
+        await queue.start()
+        running = queue.submit(spool(tmp_path, "running.txt"))
+        queued = queue.submit(spool(tmp_path, "queued.txt"))
+        await service.started.wait()
+        # A file spooled by an upload that never became a job
+        spool(tmp_path, "orphan.txt")
+        await queue.stop()
+        return running["id"], queued["id"]
+
+    running_id, queued_id = asyncio.run(first_run())
+    jobs = json.loads((tmp_path / "jobs.json").read_text())
+    assert jobs[running_id]["status"] == jobs[queued_id]["status"] == "queued"
+
+    async def second_run():
+        service = RecordingService()
+        queue = make_queue(tmp_path, service)
+        await queue.start()
+        assert not (tmp_path / "spool" / "orphan.txt").exists()
+        while len(service.ingested) < 2:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return service.ingested, queue
+
+    ingested, queue = asyncio.run(second_run())
+    # Resumed in submission order
+    assert ingested == ["running.txt", "queued.txt"]
+    assert [queue.get(job_id)["status"] for job_id in (running_id, queued_id)] == ["completed", "completed"]
+    assert os.listdir(tmp_path / "spool") == []
+
+def upload(app: FastAPI, filename: str, content: bytes):
+    """POST a multipart upload; returns the status, the headers and the JSON body"""
+    body = (
+        b"--b\r\n"
+        + f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode()
+        + b"Content-Type: text/plain\r\n\r\n" + content + b"\r\n--b--\r\n"
+    )
+
+    async def scenario():
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/documents/upload", "raw_path": b"/documents/upload", "root_path": "",
+            "query_string": b"", "client": ("test", 1), "server": ("test", 80),
+            "headers": [
+                (b"content-type", b"multipart/form-data; boundary=b"),
+                (b"content-length", str(len(body)).encode())
+            ],
+            "app": app
+        }
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        response = {"body": b""}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = {key.decode(): value.decode() for key, value in message["headers"]}
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+
+        await app(scope, receive, send)
+        return response["status"], response["headers"], json.loads(response["body"])
+
+    return asyncio.run(scenario())
+
+def test_uploads_beyond_the_queue_size_get_503_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(Config, "ANSWER_CACHE_FILE", None)
+    monkeypatch.setattr(Config, "SPOOL_DIR", str(tmp_path / "spool"))
+    monkeypatch.setattr(Config, "INGEST_RETRY_AFTER", 7)
+    rag_service = RAGService(embeddings=FakeEmbeddings(dimensions=8), llm=FakeStreamingChatModel())
+    # Never started, so the first job stays queued
+    queue = make_queue(tmp_path, rag_service, max_queue_size=1)
+    app = FastAPI()
+    app.include_router(documents.router)
+    app.state.services = SimpleNamespace(rag_service=rag_service, ingestion_jobs=queue)
+
+    try:
+        status, _, accepted = upload(app, "first.txt", b"first")
+        assert status == 202 and accepted["status"] == "queued"
+
+        status, headers, rejected = upload(app, "second.txt", b"second")
+        assert status == 503
+        assert headers["retry-after"] == "7"
+        assert "full" in rejected["detail"]
+        # The rejected upload's spooled file is removed
+        assert [name.endswith("_first.txt") for name in os.listdir(tmp_path / "spool")] == [True]
+        assert len(queue.jobs) == 1
+    finally:
+        asyncio.run(rag_service.close())
@@ -0,0 +1,64 @@
+import ast
+import hashlib
+import json
+import os
+
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_community.document_loaders import TextLoader
+
+from services.fakes import FakeEmbeddings
+from services.local_vector_store import LocalVectorStore
+
+RAG_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "langchain", "rag.py")
+
+def load_sync(**script_globals):
+    """The manifest and sync functions of langchain/rag.py, without running the script"""
+    with open(RAG_SCRIPT) as f:
+        tree = ast.parse(f.read())
+    names = {"load_manifest", "save_manifest", "chunk_ids", "clear_vector_store", "sync_vector_store"}
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    namespace = {"os": os, "json": json, "hashlib": hashlib, "TextLoader": TextLoader, **script_globals}
+    exec(compile(ast.Module(body=functions, type_ignores=[]), RAG_SCRIPT, "exec"), namespace)
+    return namespace["sync_vector_store"]
+
+def paragraphs(name: str, count: int) -> str:
+    return "\n\n".join(f"Paragraph {i} of {name} has some words in it." for i in range(count))
+
+def test_sync_embeds_only_added_and_changed_chunks(tmp_path):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    (documents / "a.txt").write_text(paragraphs("a", 3))
+    (documents / "b.txt").write_text(paragraphs("b", 3))
+    index_directory = tmp_path / "local_index"
+    sync = load_sync(
+        documents_directory=str(documents),
+        persistent_directory=str(index_directory),
+        manifest_path=str(index_directory / "manifest.json"),
+        text_splitter=CharacterTextSplitter(chunk_size=50, chunk_overlap=0)
+    )
+    embeddings = FakeEmbeddings(dimensions=8)
+    db = LocalVectorStore(str(index_directory), embedding_function=embeddings)
+    try:
+        def run() -> int:
+            before = embeddings.texts_embedded
+            sync(db)
+            return embeddings.texts_embedded - before
+
+        assert run() == 6
+        assert run() == 0
+        # Same bytes, new mtime: hashed again but not re-embedded
+        os.utime(documents / "a.txt", ns=(0, 0))
+        assert run() == 0
+
+        (documents / "a.txt").write_text(paragraphs("a", 4))
+        assert run() == 1
+        (documents / "b.txt").unlink()
+        assert run() == 0
+
+        manifest = json.loads((index_directory / "manifest.json").read_text())
+        assert list(manifest["files"]) == ["a.txt"]
+        stored = db._collection.get(include=[])["ids"]
+        assert sorted(stored) == sorted(manifest["files"]["a.txt"]["chunks"])
+        assert len(stored) == 4
+    finally:
+        db.close()
@@ -0,0 +1,122 @@
+import threading
+
+import numpy as np
+
+from services.local_vector_store import LocalVectorIndex
+
+DIM = 32
+
+def vectors(rng: np.random.Generator, count: int) -> np.ndarray:
+    values = rng.standard_normal((count, DIM), dtype=np.float32)
+    return values / np.linalg.norm(values, axis=1, keepdims=True)
+
+def upsert(index: LocalVectorIndex, rng: np.random.Generator, first: int, count: int) -> np.ndarray:
+    batch = vectors(rng, count)
+    index.upsert(
+        ids=[f"v{i}" for i in range(first, first + count)],
+        embeddings=batch.tolist(),
+        documents=[f"chunk {i}" for i in range(first, first + count)],
+        metadatas=[{"document_id": f"doc{i // 10}"} for i in range(first, first + count)]
+    )
+    return batch
+
+def hold_build(index: LocalVectorIndex, method: str) -> threading.Event:
+    """Make a background training step wait until the returned event is set"""
+    release = threading.Event()
+    train = getattr(index, method)
+
+    def held(*args, **kwargs):
+        release.wait(10)
+        return train(*args, **kwargs)
+
+    setattr(index, method, held)
+    return release
+
+def test_ivf_clustering_does_not_block_writes_or_searches(tmp_path):
+    rng = np.random.default_rng(0)
+    index = LocalVectorIndex(str(tmp_path), mode="ivf", ivf_min_vectors=500, ivf_probes=64)
+    release = hold_build(index, "_cluster")
+    try:
+        upsert(index, rng, 0, 600)
+        # Clustering is held: writes and exact searches still go through
+        late = upsert(index, rng, 600, 50)
+        assert index._centroids is None
+        assert index.query(late[0], 1)[0][0].page_content == "chunk 600"
+
+        release.set()
+        index.wait_for_build()
+        assert index._centroids is not None
+        # Rows written while clustering ran were assigned to clusters too
+        assert (index._lists[:650] >= 0).all()
+        assert index.query(late[0], 1)[0][0].page_content == "chunk 600"
+    finally:
+        release.set()
+        index.close()
+
+def test_vacuum_reclusters_in_the_background(tmp_path):
+    rng = np.random.default_rng(1)
+    index = LocalVectorIndex(str(tmp_path), mode="ivf", ivf_min_vectors=500, ivf_probes=64)
+    try:
+        stored = upsert(index, rng, 0, 700)
+        index.wait_for_build()
+        index.delete(where={"document_id": "doc0"})
+
+        release = hold_build(index, "_cluster")
+        index.vacuum()
+        assert index._centroids is None
+        assert index.query(stored[50], 1)[0][0].page_content == "chunk 50"
+
+        release.set()
+        index.wait_for_build()
+        assert index._centroids is not None
+        assert index.query(stored[50], 1)[0][0].page_content == "chunk 50"
+    finally:
+        index.close()
+
+def test_codec_training_does_not_block_writes_or_searches(tmp_path):
+    rng = np.random.default_rng(2)
+    options = dict(mode="flat", quantization="pq", pq_subvectors=8, codec_train_min_vectors=300)
+    index = LocalVectorIndex(str(tmp_path), **options)
+    release = hold_build(index, "_encode_snapshot")
+    try:
+        upsert(index, rng, 0, 400)
+        late = upsert(index, rng, 400, 20)
+        assert index._codes is None
+        assert index.query(late[0], 1)[0][0].page_content == "chunk 400"
+
+        release.set()
+        index.wait_for_build()
+        # Rows written while training ran were encoded when the codes were installed
+        assert index._codes is not None and len(index._codes) == 420
+        assert index.query(late[0], 1)[0][0].page_content == "chunk 400"
+    finally:
+        release.set()
+        index.close()
+
+    reopened = LocalVectorIndex(str(tmp_path), **options)
+    try:
+        assert reopened._codes is not None and reopened._builder is None
+        assert reopened.query(late[0], 1)[0][0].page_content == "chunk 400"
+    finally:
+        reopened.close()
+
+def test_vacuum_reencodes_with_the_trained_codec(tmp_path):
+    rng = np.random.default_rng(3)
+    index = LocalVectorIndex(str(tmp_path), mode="flat", quantization="pq", pq_subvectors=8, codec_train_min_vectors=300)
+    try:
+        stored = upsert(index, rng, 0, 400)
+        index.wait_for_build()
+        codebooks = index._codec.state()
+        index.delete(where={"document_id": "doc0"})
+
+        release = hold_build(index, "_encode_snapshot")
+        index.vacuum()
+        assert index._codes is None
+        assert index.query(stored[50], 1)[0][0].page_content == "chunk 50"
+        release.set()
+        index.wait_for_build()
+        assert len(index._codes) == 390
+        for name, array in index._codec.state().items():
+            assert np.array_equal(array, codebooks[name])
+    finally:
+        index.close()
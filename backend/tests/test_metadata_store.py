@@ -0,0 +1,58 @@
+import json
+import sqlite3
+
+from services.metadata_store import DocumentStore
+
+def document(document_id: str, file_size: int, **fields):
+    return {
+        "id": document_id, "filename": f"{document_id}.txt", "upload_date": "2024-01-01",
+        "chunk_count": 2, "file_size": file_size, "file_hash": f"hash-{document_id}", **fields
+    }
+
+def test_bytes_ingested_survive_deletes_and_restarts(tmp_path):
+    path = str(tmp_path / "metadata.db")
+    store = DocumentStore(path)
+    store.put(document("a", 100))
+    store.put(document("b", 50))
+    store.delete("a")
+    assert store.totals() == {"documents": 1, "chunks": 2, "bytes": 50, "bytes_ingested": 150}
+    store.close()
+
+    store = DocumentStore(path)
+    assert store.totals()["bytes_ingested"] == 150
+    store.close()
+
+def test_bytes_ingested_is_seeded_from_the_corpus_of_older_stores(tmp_path):
+    path = str(tmp_path / "metadata.db")
+    store = DocumentStore(path)
+    store.put(document("a", 100))
+    store.close()
+    # A store written before the counter existed
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE counters")
+
+    store = DocumentStore(path)
+    assert store.totals()["bytes_ingested"] == 100
+    store.close()
+
+def test_legacy_json_metadata_is_migrated_once(tmp_path):
+    legacy = tmp_path / "documents_metadata.json"
+    # Old entries may lack the fields added later
+    legacy.write_text(json.dumps({
+        "a": document("a", 100, partitioned=True),
+        "b": {"id": "b", "filename": "b.txt", "upload_date": "2024-01-02", "chunk_count": 3}
+    }))
+    path = str(tmp_path / "metadata.db")
+    store = DocumentStore(path, legacy_json_path=str(legacy))
+
+    assert not legacy.exists() and (tmp_path / "documents_metadata.json.migrated").exists()
+    assert store.get("a") == {**document("a", 100), "partitioned": True, "content_preview": ""}
+    assert store.get("b")["file_size"] == 0 and store.get("b")["partitioned"] is False
+    assert store.find_by_hash("hash-a")["id"] == "a"
+    assert store.totals() == {"documents": 2, "chunks": 5, "bytes": 100, "bytes_ingested": 100}
+    store.close()
+
+    # Nothing left to migrate on the next start
+    store = DocumentStore(path, legacy_json_path=str(legacy))
+    assert len(store) == 2
+    store.close()
@@ -0,0 +1,37 @@
+import asyncio
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from services.metrics import Metrics
+
+def make_metrics():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return Metrics(tracer=provider.get_tracer("test")), exporter
+
+def test_stage_spans_are_children_of_their_request():
+    metrics, exporter = make_metrics()
+
+    async def handle(operation: str):
+        with metrics.request(operation):
+            await asyncio.sleep(0.01)
+            with metrics.stage(operation, "retrieve"):
+                await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(handle("ask"), handle("ingest"))
+        # Outside any request
+        with metrics.stage("ingest", "embed"):
+            pass
+
+    asyncio.run(scenario())
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    for operation in ("ask", "ingest"):
+        request, stage = spans[operation], spans[f"{operation}.retrieve"]
+        assert request.parent is None
+        assert stage.parent.span_id == request.context.span_id
+        assert stage.context.trace_id == request.context.trace_id
+    assert spans["ingest.embed"].parent is None
@@ -0,0 +1,42 @@
+from langchain_core.documents import Document
+
+from services.chunking import StructuredChunker
+from services.post_retrieval import merge_overlapping
+
+def sentences(first: int, count: int) -> str:
+    return " ".join(f"Sentence number {i} talks about topic {i} in some detail." for i in range(first, first + count))
+
+def test_chunks_overlapping_across_a_page_break_merge_into_one_passage():
+    # The answer stays with its question, so one chunk runs onto the second page
+    pages = [
+        Document(page_content=sentences(0, 6) + "\n\nWhat does the frobnicator do?\n", metadata={"page": 0}),
+        Document(page_content="Answer: " + sentences(6, 10), metadata={"page": 1})
+    ]
+    chunker = StructuredChunker("cl100k_base", chunk_tokens=40, min_chunk_tokens=10, max_overlap_tokens=20)
+    chunks = [chunk for group in chunker.split(pages) for chunk in group]
+    for i, chunk in enumerate(chunks):
+        chunk.metadata.update(document_id="doc", chunk_index=i)
+
+    joined = "\n".join(page.page_content for page in pages)
+    for chunk in chunks:
+        start = chunk.metadata["document_index"]
+        assert joined[start:start + len(chunk.page_content)] == chunk.page_content
+    question = next(chunk for chunk in chunks if chunk.page_content.startswith("What does"))
+    assert question.metadata["page"] == 0 and "Answer:" in question.page_content
+
+    # Retrieved out of order: the overlap across the page break is merged, not packed twice
+    passages = merge_overlapping(chunks[::-1])
+    answer = next(passage for passage in passages if "Answer:" in passage.page_content)
+    assert answer.page_content == joined[question.metadata["document_index"]:]
+    assert answer.metadata["page"] == 0
+    assert sum(passage.page_content.count("Sentence number 7 ") for passage in passages) == 1
+
+def test_merge_falls_back_to_page_offsets_and_exact_text():
+    first = Document(page_content="alpha beta gamma", metadata={"document_id": "a", "page": 2, "start_index": 10})
+    second = Document(page_content="gamma delta", metadata={"document_id": "a", "page": 2, "start_index": 21})
+    other_page = Document(page_content="gamma delta", metadata={"document_id": "a", "page": 3, "start_index": 21})
+    unplaced = Document(page_content="no offsets", metadata={"document_id": "b"})
+
+    passages = merge_overlapping([second, first, other_page, unplaced, unplaced])
+    assert [p.page_content for p in passages] == ["alpha beta gamma delta", "gamma delta", "no offsets"]
+    assert passages[0].metadata["start_index"] == 10
@@ -0,0 +1,90 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+
+from routes import qa
+from services.fakes import FakeEmbeddings, FakeStreamingChatModel
+from services.rag_service import RAGService
+from utils.config import Config
+
+def parse_sse(body: str):
+    """(event, data) pairs of a Server-Sent Events body"""
+    events = []
+    for message in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+async def post_stream(app: FastAPI, payload: dict):
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/qa/ask/stream", "raw_path": b"/qa/ask/stream", "root_path": "",
+        "query_string": b"", "client": ("test", 1), "server": ("test", 80),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "app": app
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    finished = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # StreamingResponse listens for a disconnect while it streams
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    response = {"body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {key.decode(): value.decode() for key, value in message["headers"]}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], parse_sse(response["body"].decode())
+
+def test_stream_sends_sources_then_tokens_then_done(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(Config, "ANSWER_CACHE_FILE", None)
+    monkeypatch.setattr(Config, "RELEVANCE_THRESHOLD", 0.0)
+    path = tmp_path / "vectors.txt"
+    path.write_text("A vector is a list of numbers. Vectors are added component by component.")
+    llm = FakeStreamingChatModel()
+
+    async def scenario():
+        rag_service = RAGService(embeddings=FakeEmbeddings(dimensions=8), llm=llm)
+        app = FastAPI()
+        app.include_router(qa.router)
+        app.state.services = SimpleNamespace(rag_service=rag_service)
+        try:
+            await rag_service.ingest_file(str(path), path.name, "hash", path.stat().st_size)
+            first = await post_stream(app, {"question": "What is a vector?"})
+            repeated = await post_stream(app, {"question": "What is a vector?"})
+            return first, repeated
+        finally:
+            await rag_service.close()
+
+    (status, headers, events), (_, _, cached_events) = asyncio.run(scenario())
+    assert status == 200
+    assert headers["content-type"].startswith("text/event-stream")
+
+    kinds = [event for event, _ in events]
+    assert kinds == ["sources"] + ["token"] * len(llm._tokens()) + ["done"]
+    sources, done = events[0][1], events[-1][1]
+    assert sources["cached"] is False and sources["sources"][0]["filename"] == "vectors.txt"
+    assert "".join(data["text"] for event, data in events if event == "token") == llm.response
+    assert done["cached"] is False
+    assert set(done["timings"]) >= {"retrieve_ms", "first_token_ms", "generate_ms", "total_ms"}
+
+    # A repeated question streams the cached answer as one token
+    assert [event for event, _ in cached_events] == ["sources", "token", "done"]
+    assert cached_events[1][1]["text"] == llm.response
+    assert cached_events[0][1]["cached"] is cached_events[2][1]["cached"] is True
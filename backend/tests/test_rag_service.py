@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from services.fakes import FakeEmbeddings, FakeStreamingChatModel
+from services.metadata_store import LISTABLE_COLUMNS
+from services.rag_service import RAGService
+from utils.config import Config
+
+@pytest.mark.parametrize("stream", [False, True], ids=["ask", "stream"])
+def test_one_deadline_covers_cache_lookup_and_qa_slot(tmp_path, monkeypatch, stream):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(Config, "ANSWER_CACHE_FILE", None)
+    monkeypatch.setattr(Config, "QA_TIMEOUT", 0.5)
+    monkeypatch.setattr(Config, "QA_MAX_CONCURRENCY", 1)
+
+    async def scenario():
+        rag_service = RAGService(embeddings=FakeEmbeddings(dimensions=8), llm=FakeStreamingChatModel())
+
+        async def slow_lookup(question, scope, corpus_version):
+            await asyncio.sleep(0.3)
+            return None, None
+
+        rag_service._lookup_cached_answer = slow_lookup
+        loop = asyncio.get_running_loop()
+        # Every QA slot is busy for longer than the deadline
+        await rag_service._qa_semaphore.acquire()
+        start = loop.time()
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                if stream:
+                    async for _ in rag_service.stream_answer("What is a vector?"):
+                        pass
+                else:
+                    await rag_service.ask_question("What is a vector?")
+            return loop.time() - start
+        finally:
+            rag_service._qa_semaphore.release()
+            await rag_service.close()
+
+    elapsed = asyncio.run(scenario())
+    assert 0.45 < elapsed < 0.7
+
+def test_strong_keyword_hits_pass_the_relevance_threshold(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(Config, "ANSWER_CACHE_FILE", None)
+    monkeypatch.setattr(Config, "CHUNK_TOKENS", 60)
+    monkeypatch.setattr(Config, "CHUNK_MIN_TOKENS", 10)
+    # No chunk is similar enough by embedding alone
+    monkeypatch.setattr(Config, "RELEVANCE_THRESHOLD", 0.95)
+    path = tmp_path / "manual.txt"
+    path.write_text("\n\n".join(
+        f"Section {i}. This is how I set up the {topic} settings. Do not change them unless the manual says so."
+        for i, topic in enumerate(["frobnicator", "gearbox", "turbine", "compressor", "valve"] * 4)
+    ))
+
+    async def scenario():
+        rag_service = RAGService(embeddings=FakeEmbeddings(dimensions=64), llm=FakeStreamingChatModel())
+        rag_service.keyword_index.ready = True
+        try:
+            await rag_service.ingest_file(str(path), path.name, "hash", path.stat().st_size)
+            matched = await rag_service._retrieve_context("How do I set up the frobnicator settings?", 4)
+            unrelated = await rag_service._retrieve_context("Who won the football league in 1998?", 4)
+            return matched, unrelated
+        finally:
+            await rag_service.close()
+
+    matched, unrelated = asyncio.run(scenario())
+    assert matched and "frobnicator" in matched[0].page_content
+    assert unrelated == []
+
+def test_cursor_is_bound_to_sort_column_and_direction(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(Config, "ANSWER_CACHE_FILE", None)
+
+    async def scenario():
+        rag_service = RAGService(embeddings=FakeEmbeddings(dimensions=8), llm=FakeStreamingChatModel())
+        try:
+            for i in range(3):
+                rag_service.documents.put({
+                    "id": f"doc{i}", "filename": f"doc{i}.txt", "upload_date": f"2024-01-0{i + 1}",
+                    "chunk_count": 1, "file_size": 100 * (i + 1), "file_hash": f"hash{i}"
+                })
+            page = await rag_service.get_documents(limit=1, descending=True)
+            listed = await rag_service.get_documents(limit=3)
+            following = await rag_service.get_documents(limit=1, cursor=page["next_cursor"], descending=True)
+            errors = []
+            for options in ({"descending": False}, {"sort_by": "file_size", "descending": True}):
+                with pytest.raises(HTTPException) as raised:
+                    await rag_service.get_documents(limit=1, cursor=page["next_cursor"], **options)
+                errors.append(raised.value.status_code)
+            with pytest.raises(HTTPException):
+                await rag_service.get_documents(fields=["id", "partitioned"])
+            return listed, page, following, errors
+        finally:
+            await rag_service.close()
+
+    listed, page, following, errors = asyncio.run(scenario())
+    # Internal columns are neither listed nor projectable
+    assert set(listed["documents"][0]) == set(LISTABLE_COLUMNS)
+    assert [doc["id"] for doc in page["documents"] + following["documents"]] == ["doc2", "doc1"]
+    assert errors == [400, 400]
+
+class ModelEchoChatModel(FakeStreamingChatModel):
+    """Answers with the name of the model it was configured with"""
+
+    def _tokens(self):
+        return [self.model_name]
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.model_name))])
+
+def test_answer_chain_follows_the_configured_default_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(Config, "ANSWER_CACHE_FILE", None)
+
+    async def scenario():
+        rag_service = RAGService(embeddings=FakeEmbeddings(dimensions=8), llm=ModelEchoChatModel())
+        inputs = {"context": "", "question": "Which model?"}
+        try:
+            answers = [await rag_service._get_qa_pipeline().ainvoke(inputs, config=rag_service._llm_config(None))]
+            monkeypatch.setattr(Config, "LLM_MODEL", "gpt-4o-mini")
+            answers.append(await rag_service._get_qa_pipeline().ainvoke(inputs, config=rag_service._llm_config(None)))
+            answers.append(await rag_service._get_qa_pipeline().ainvoke(inputs, config=rag_service._llm_config("gpt-4o")))
+            return answers
+        finally:
+            await rag_service.close()
+
+    assert asyncio.run(scenario()) == ["gpt-3.5-turbo", "gpt-4o-mini", "gpt-4o"]
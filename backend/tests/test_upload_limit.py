@@ -0,0 +1,87 @@
+import asyncio
+import json
+from typing import Iterable, List, Optional
+
+from fastapi import FastAPI, File, UploadFile
+
+from utils.config import Config
+from utils.upload_limit import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+
+def make_app(parsed: List[str]) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, path="/upload")
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        parsed.append(file.filename)
+        return {"size": file.size}
+
+    return app
+
+def multipart(filename: str, content: bytes) -> bytes:
+    return (
+        b"--b\r\n"
+        + f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode()
+        + b"Content-Type: text/plain\r\n\r\n"
+        + content
+        + b"\r\n--b--\r\n"
+    )
+
+def post(app: FastAPI, chunks: Iterable[bytes], content_length: Optional[int] = None):
+    """Send the body chunk by chunk; returns the status, the body and how many chunks were read"""
+    async def scenario():
+        headers = [(b"content-type", b"multipart/form-data; boundary=b")]
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/upload", "raw_path": b"/upload", "root_path": "",
+            "query_string": b"", "headers": headers, "client": ("test", 1), "server": ("test", 80)
+        }
+        pending = list(chunks)
+        read = 0
+
+        async def receive():
+            nonlocal read
+            if read < len(pending):
+                read += 1
+                return {"type": "http.request", "body": pending[read - 1], "more_body": read < len(pending)}
+            return {"type": "http.disconnect"}
+
+        response = {}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"] = response.get("body", b"") + message.get("body", b"")
+
+        await app(scope, receive, send)
+        return response["status"], json.loads(response["body"]), read
+
+    return asyncio.run(scenario())
+
+def test_oversized_upload_is_rejected_before_it_is_parsed(monkeypatch):
+    monkeypatch.setattr(Config, "MAX_FILE_SIZE", 1024)
+    parsed = []
+    app = make_app(parsed)
+    body = multipart("big.txt", b"x" * (MULTIPART_OVERHEAD * 4))
+    chunks = [body[i:i + 4096] for i in range(0, len(body), 4096)]
+
+    # Declared too large: nothing is read
+    status, content, read = post(app, chunks, content_length=len(body))
+    assert status == 400
+    assert "maximum limit" in content["detail"]
+    assert read == 0
+
+    # No Content-Length: stopped once the limit is passed
+    status, _, read = post(app, chunks)
+    assert status == 400
+    assert read < len(chunks)
+    assert parsed == []
+
+    small = multipart("small.txt", b"x" * 512)
+    status, content, _ = post(app, [small], content_length=len(small))
+    assert status == 200
+    assert content == {"size": 512}
+    assert parsed == ["small.txt"]
@@ -12,6 +12,7 @@ class Config:
     # File Upload Settings
     ALLOWED_EXTENSIONS = ['.txt', '.pdf', '.docx', '.md']
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    UPLOAD_CHUNK_SIZE = 1024 * 1024  # Uploads are streamed to disk 1MB at a time
     
     # Server Settings
     HOST = "0.0.0.0"
@@ -20,4 +21,116 @@ class Config:
     # API Settings
     API_TITLE = "RAG API"
     API_DESCRIPTION = "Retrieval-Augmented Generation API"
-    API_VERSION = "1.0.0" 
\ No newline at end of file
+    API_VERSION = "1.0.0"
+    
+    # Model Settings
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    LLM_MODEL = "gpt-3.5-turbo"
+    ALLOWED_LLM_MODELS = ["gpt-3.5-turbo", "gpt-4o-mini", "gpt-4o"]
+    
+    # Chunking Settings (token counts use EMBEDDING_ENCODING)
+    CHUNK_TOKENS = 400  # Chunks end at the strongest heading, question or paragraph boundary within this budget
+    CHUNK_MIN_TOKENS = 80  # Chunks are not cut before reaching this size
+    CHUNK_MAX_OVERLAP_TOKENS = 60  # Overlap when a cut falls inside a paragraph; none between sections
+    PDF_PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Processes extracting PDF text (0 = parse on the worker thread)
+    PDF_PAGES_PER_TASK = 8  # Pages extracted per process pool task
+    PDF_PARALLEL_MIN_PAGES = 16  # Smaller PDFs are parsed on the worker thread, skipping the process round-trip
+    
+    # Retrieval Settings
+    RETRIEVAL_K = 4  # Hybrid retrieval finds the right chunks with a smaller k
+    MAX_RETRIEVAL_K = 20
+    DOCUMENT_PARTITIONS = False  # Also keep each document's vectors in its own Chroma collection (doubles vector storage)
+    PARTITION_MAX_FANOUT = 8  # Scoped queries over at most this many documents search partitions directly
+    HYBRID_SEARCH = True  # Fuse BM25 keyword results with vector results
+    HYBRID_CANDIDATES_PER_K = 3  # Each ranking contributes k * this many candidates to the fusion
+    RRF_RANK_CONSTANT = 60  # Reciprocal rank fusion: score = sum(1 / (constant + rank))
+    KEYWORD_QUERY_MAX_TERMS = 3  # Quoted or identifier-only queries this short skip the embedding call
+    KEYWORD_INDEX_LOAD_BATCH_SIZE = 1000  # Chunks read per call when rebuilding the BM25 index at startup
+    
+    # Confidence Settings (relevance is the cosine similarity between question and chunk)
+    RELEVANCE_THRESHOLD = 0.3  # If no retrieved chunk reaches this, answer NO_ANSWER_TEXT without calling the LLM
+    KEYWORD_RELEVANCE_THRESHOLD = 0.5  # Keyword hits matching this IDF-weighted share of the question's terms also count as relevant
+    NO_ANSWER_TEXT = "I don't know. The uploaded documents don't seem to cover this question."
+    CONFIDENCE_MIDPOINT = 0.45  # Similarity that maps to 50% confidence
+    CONFIDENCE_STEEPNESS = 12.0  # Logistic slope; fit both to labelled questions to calibrate
+    
+    # Context Settings (applied to retrieved chunks before they reach the prompt)
+    RERANKER = "none"  # "none" (keep retrieval order), "lexical" or "cross-encoder" (needs sentence-transformers)
+    RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES_PER_K = 2  # With a reranker, k * this many chunks are retrieved for it to choose from
+    CONTEXT_TOKEN_BUDGET = 1500  # Prompt tokens available for retrieved passages
+    CONTEXT_ENCODING = "cl100k_base"  # tiktoken encoding of the LLM
+    
+    # Storage Settings
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # "chroma" or "local" (in-process NumPy index)
+    VECTOR_DB_DIR = "vector_db"
+    LOCAL_INDEX_DIR = "local_index"
+    LOCAL_INDEX_MODE = "ivf"  # "flat" always scans every vector, "ivf" probes the nearest clusters once large
+    LOCAL_INDEX_IVF_MIN_VECTORS = 50_000  # Below this the local index stays a brute-force scan
+    LOCAL_INDEX_IVF_PROBES = 8  # Clusters scanned per query in IVF mode
+    LOCAL_INDEX_QUANTIZATION = "none"  # "none", "int8" (~4x smaller) or "pq" (LOCAL_INDEX_PQ_SUBVECTORS bytes per vector)
+    LOCAL_INDEX_DIMENSIONS = None  # Matryoshka truncation: search on the first N dimensions (e.g. 512)
+    LOCAL_INDEX_PQ_SUBVECTORS = 64  # Must divide the searched dimensions
+    LOCAL_INDEX_RERANK_FACTOR = 4  # k * this many compressed-search candidates are re-scored at full precision (0 = off)
+    LOCAL_INDEX_CODEC_TRAIN_MIN_VECTORS = 10_000  # Product quantization is trained once the index is this large
+    METADATA_DB_FILE = "documents.sqlite3"
+    DOCUMENTS_METADATA_FILE = "documents_metadata.json"  # Legacy format, migrated into METADATA_DB_FILE
+    DOCUMENTS_PAGE_SIZE = 100
+    MAX_DOCUMENTS_PAGE_SIZE = 1000
+    VECTOR_DELETE_BATCH_SIZE = 1000  # Vectors listed and deleted per call
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")  # Shared with langchain/rag.py when set
+    
+    # HTTP Client Pool Settings (shared by all OpenAI calls)
+    HTTP_MAX_CONNECTIONS = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+    HTTP_TIMEOUT = 60.0
+    
+    # Concurrency Settings
+    WORKER_THREADS = 16  # Managed pool for blocking loader and vector store calls
+    QA_MAX_CONCURRENCY = 32  # Concurrent questions allowed to reach the LLM
+    QA_TIMEOUT = 60.0  # Seconds before a question is abandoned, including the cache lookup and the wait for a QA slot
+    
+    # Embedding Scheduler Settings (match these to the OpenAI account's rate limits)
+    EMBEDDING_ENCODING = "cl100k_base"  # tiktoken encoding used to budget batches
+    EMBEDDING_BATCH_MAX_TOKENS = 100_000
+    EMBEDDING_BATCH_MAX_SIZE = 512  # Chunks per embedding request
+    EMBEDDING_MAX_CONCURRENCY = 4  # Embedding requests in flight at once
+    EMBEDDING_REQUESTS_PER_MINUTE = 3000
+    EMBEDDING_TOKENS_PER_MINUTE = 1_000_000
+    EMBEDDING_MAX_RETRIES = 5
+    EMBEDDING_BATCH_WAIT = 0.05  # Seconds to wait for concurrent uploads to fill a batch
+    
+    # Ingestion Job Settings
+    SPOOL_DIR = "uploads"  # Uploaded files wait here until their job has run
+    INGEST_JOBS_FILE = "ingestion_jobs.json"
+    INGEST_WORKERS = 2  # Documents processed concurrently
+    INGEST_MAX_QUEUE_SIZE = 100  # Uploads beyond this are rejected with 503
+    INGEST_MAX_FINISHED_JOBS = 500  # Completed/failed jobs kept for status lookups
+    INGEST_RETRY_AFTER = 30  # Seconds suggested to clients when the queue is full
+    INGEST_PIPELINE_DEPTH = 8  # Parsed pages buffered ahead of embedding
+    INGEST_EMBED_GROUP_SIZE = 64  # Chunks handed to the embedding scheduler at a time
+    INGEST_MAX_INFLIGHT_GROUPS = 8  # Chunk groups per document waiting on embeddings
+    
+    # Statistics Settings
+    STATS_RECONCILE_INTERVAL = 300  # Seconds between counter checks against the stores
+    
+    # Answer Cache Settings
+    ANSWER_CACHE_ENABLED = True
+    ANSWER_CACHE_SEMANTIC = True  # Reuse answers for near-duplicate questions (costs one query embedding)
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95  # Minimum cosine similarity for a semantic hit
+    ANSWER_CACHE_MAX_ENTRIES = 1000
+    ANSWER_CACHE_TTL = 24 * 60 * 60  # Seconds
+    ANSWER_CACHE_FILE = None  # e.g. "answer_cache.json" to keep the cache across restarts
+    
+    # Observability Settings
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    TRACING_ENABLED = os.getenv("RAG_TRACING", "").lower() in ("1", "true")  # OpenTelemetry spans per stage (needs opentelemetry-api)
+    
+    # Development Settings
+    USE_FAKE_LLM = os.getenv("RAG_FAKE_LLM", "").lower() in ("1", "true")  # Stream canned answers locally
+    USE_FAKE_EMBEDDINGS = os.getenv("RAG_FAKE_EMBEDDINGS", "").lower() in ("1", "true")  # Deterministic local embeddings
+    USE_FAKE_TOKENIZER = os.getenv("RAG_FAKE_TOKENIZER", "").lower() in ("1", "true")  # Count tokens without downloading tiktoken encodings
+    FAKE_LLM_FIRST_TOKEN_DELAY = float(os.getenv("RAG_FAKE_LLM_FIRST_TOKEN_DELAY", "0"))  # Seconds
+    FAKE_LLM_TOKEN_DELAY = float(os.getenv("RAG_FAKE_LLM_TOKEN_DELAY", "0"))  # Seconds per streamed token
+    FAKE_EMBEDDING_REQUEST_LATENCY = float(os.getenv("RAG_FAKE_EMBEDDING_REQUEST_LATENCY", "0"))  # Seconds per call
+    FAKE_EMBEDDING_TEXT_LATENCY = float(os.getenv("RAG_FAKE_EMBEDDING_TEXT_LATENCY", "0"))  # Seconds per embedded text
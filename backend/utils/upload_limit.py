@@ -0,0 +1,41 @@
+from .config import Config
+from .validators import validate_file_size
+
+# Multipart boundaries and part headers sent around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadSizeLimitMiddleware:
+    """Stop upload bodies larger than MAX_FILE_SIZE while they arrive
+
+    Starlette parses and spools the whole multipart body before the route
+    runs, so the size has to be enforced on the raw ASGI stream: a declared
+    Content-Length is checked before anything is read and bodies without one
+    are counted chunk by chunk.
+    """
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        limit = Config.MAX_FILE_SIZE + MULTIPART_OVERHEAD
+        content_length = dict(scope["headers"]).get(b"content-length")
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            # Raised from inside the body parser, so the app answers with a 400
+            if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+                validate_file_size(int(content_length))
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    validate_file_size(received)
+            return message
+
+        await self.app(scope, limited_receive, send)
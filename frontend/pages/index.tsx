@@ -84,7 +84,22 @@ export default function Home() {
       });
 
       const data = await response.json();
-      console.log('Upload successful:', data);
+      if (!response.ok) {
+        throw new Error(data.detail || 'Upload failed');
+      }
+      console.log('Upload queued:', data);
+
+      // Processing runs in the background; poll the job until it finishes
+      let job = data;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const jobResponse = await fetch(`${API_BASE_URL}${data.status_url}`);
+        job = await jobResponse.json();
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Processing failed');
+      }
+
       setSelectedFile(null);
       fetchDocuments();
       fetchStats();
@@ -1,60 +1,180 @@
 from dotenv import load_dotenv
+import hashlib
+import json
 import os
+import sys
 from langchain.text_splitter import CharacterTextSplitter
 from langchain_community.document_loaders import TextLoader
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 from langchain_openai import ChatOpenAI
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
 
 load_dotenv()
 
-# Define the directory containing the text file and the persistent directory
+# Define the directory containing the text files and the persistent directory
 current_dir = os.path.dirname(os.path.abspath(__file__))
-file_path = os.path.join(current_dir, "documents", "lord_of_the_rings.txt")
-persistent_directory = os.path.join(current_dir, "db", "chroma_db")
-
-# Check if the Chroma vector store already exists
-if not os.path.exists(persistent_directory):
-    print("Persistent directory does not exist. Initializing vector store...")
-
-    # Ensure the text file exists
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(
-            f"The file {file_path} does not exist. Please check the path."
-        )
-
-    # Read the text content from the file
-    loader = TextLoader(file_path)
-    documents = loader.load()
-
-    # Split the document into chunks
-    text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=50) 
-    docs = text_splitter.split_documents(documents)
-
-    # Display information about the split documents
-    print("\n--- Document Chunks Information ---")
-    print(f"Number of document chunks: {len(docs)}")
-    print(f"Sample chunk:\n{docs[0].page_content}\n")
-
-    # Create embeddings
-    print("\n--- Creating embeddings ---")
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-small"
-    )  # Update to a valid embedding model if needed
-    print("\n--- Finished creating embeddings ---")
-
-    # Create the vector store and persist it automatically
-    print("\n--- Creating vector store ---")
-    db = Chroma.from_documents(
-        docs, embeddings, persist_directory=persistent_directory)
-    print("\n--- Finished creating vector store ---")
-
+documents_directory = os.path.join(current_dir, "documents")
+# VECTOR_BACKEND=local uses the backend's in-process NumPy index instead of Chroma
+vector_backend = os.getenv("VECTOR_BACKEND", "chroma")
+backend_directory = os.path.abspath(os.path.join(current_dir, "..", "backend"))
+if vector_backend == "local":
+    persistent_directory = os.path.join(current_dir, "db", "local_index")
 else:
-    print("Vector store already exists. Loading existing database...")
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    db = Chroma(persist_directory=persistent_directory, embedding_function=embeddings)
+    persistent_directory = os.path.join(current_dir, "db", "chroma_db")
+# Content hashes of the indexed files and chunks, used to re-embed only what changed
+manifest_path = os.path.join(persistent_directory, "manifest.json")
+# Point EMBEDDING_CACHE_DIR at the backend's cache to share embeddings with it
+embedding_cache_directory = os.getenv(
+    "EMBEDDING_CACHE_DIR", os.path.join(current_dir, "db", "embedding_cache")
+)
+
+def create_embeddings():
+    """Create embeddings cached on disk by chunk-text hash and model."""
+    underlying = OpenAIEmbeddings(model="text-embedding-3-small")
+    return CacheBackedEmbeddings.from_bytes_store(
+        underlying,
+        LocalFileStore(embedding_cache_directory),
+        namespace=underlying.model,
+        # Must match backend/services/rag_service.py for the two to share cache entries
+        key_encoder="sha256"
+    )
+
+def load_local_vector_store():
+    """Import LocalVectorStore from the backend package next to this directory."""
+    if not os.path.isdir(os.path.join(backend_directory, "services")):
+        raise ImportError(f"VECTOR_BACKEND=local needs the backend checked out at {backend_directory}")
+    # Only for this import, so the backend's modules never shadow anything else
+    sys.path.insert(0, backend_directory)
+    try:
+        from services.local_vector_store import LocalVectorStore
+    except ImportError as e:
+        raise ImportError(
+            f"VECTOR_BACKEND=local could not import the local index from {backend_directory} ({e}); "
+            "install backend/requirements.txt"
+        ) from e
+    finally:
+        sys.path.remove(backend_directory)
+    return LocalVectorStore
+
+def open_vector_store(embeddings):
+    """Open (or create) the vector store for the selected backend."""
+    if vector_backend == "local":
+        return load_local_vector_store()(persistent_directory, embedding_function=embeddings)
+    return Chroma(persist_directory=persistent_directory, embedding_function=embeddings)
+
+def load_manifest():
+    """Per-file size, mtime, content hash and chunk ids from the last sync, or None."""
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+def save_manifest(manifest):
+    """Write the manifest atomically so a crash never leaves it half-written."""
+    os.makedirs(persistent_directory, exist_ok=True)
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, manifest_path)
+
+def chunk_ids(filename, chunks):
+    """Content-addressed chunk ids: unchanged text keeps its id (and vector) across runs."""
+    occurrences = {}
+    ids = []
+    for chunk in chunks:
+        digest = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()[:32]
+        occurrence = occurrences.get(digest, 0)
+        occurrences[digest] = occurrence + 1
+        ids.append(f"{filename}:{digest}:{occurrence}")
+    return ids
+
+def clear_vector_store(db):
+    """Delete every vector, for stores built before chunk ids were content-addressed."""
+    while True:
+        ids = db._collection.get(limit=1000, include=[])["ids"]
+        if not ids:
+            return
+        db.delete(ids=list(ids))
+
+def sync_vector_store(db):
+    """Re-embed only the chunks of documents/ that were added or changed, and drop removed ones.
+
+    A file whose size and mtime match the manifest is not even read, so an
+    unchanged corpus costs one directory scan and no embedding calls.
+    """
+    manifest = load_manifest()
+    if manifest is None:
+        print("No manifest found. Indexing the documents directory from scratch...")
+        clear_vector_store(db)
+        manifest = {"files": {}}
+    files = manifest["files"]
+
+    current = {}
+    with os.scandir(documents_directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".txt"):
+                current[entry.name] = entry.stat()
+
+    added = deleted = 0
+    for filename in sorted(set(files) - set(current)):
+        stale_ids = files.pop(filename)["chunks"]
+        # An empty file has no chunks, and Chroma rejects an empty id list
+        if stale_ids:
+            db.delete(ids=stale_ids)
+        deleted += len(stale_ids)
+        save_manifest(manifest)
+
+    for filename, stat in sorted(current.items()):
+        entry = files.get(filename)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            continue
+
+        path = os.path.join(documents_directory, filename)
+        with open(path, "rb") as f:
+            file_hash = hashlib.sha256(f.read()).hexdigest()
+        if entry is None or entry["sha256"] != file_hash:
+            docs = text_splitter.split_documents(TextLoader(path).load())
+            ids = chunk_ids(filename, docs)
+            old_ids = set(entry["chunks"]) if entry else set()
+            new_chunks = [(chunk_id, doc) for chunk_id, doc in zip(ids, docs) if chunk_id not in old_ids]
+            stale_ids = list(old_ids - set(ids))
+            if new_chunks:
+                db.add_documents([doc for _, doc in new_chunks], ids=[chunk_id for chunk_id, _ in new_chunks])
+            if stale_ids:
+                db.delete(ids=stale_ids)
+            added += len(new_chunks)
+            deleted += len(stale_ids)
+            print(f"{filename}: {len(new_chunks)} chunks embedded, {len(stale_ids)} removed, {len(ids)} total")
+        else:
+            ids = entry["chunks"]
+
+        files[filename] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_hash,
+            "chunks": ids
+        }
+        save_manifest(manifest)
+
+    if added or deleted:
+        print(f"\n--- Vector store updated: {added} chunks embedded, {deleted} removed ---")
+    else:
+        print("Vector store is up to date.")
+
+# Ensure the documents directory exists
+if not os.path.isdir(documents_directory):
+    raise FileNotFoundError(
+        f"The directory {documents_directory} does not exist. Please check the path."
+    )
+
+text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=50)
+embeddings = create_embeddings()
+db = open_vector_store(embeddings)
+sync_vector_store(db)
 
 # Create a custom prompt template for better responses
 prompt_template = """Use the following pieces of context to answer the question at the end. 
@@ -70,6 +190,9 @@ PROMPT = PromptTemplate(
     template=prompt_template, input_variables=["context", "question"]
 )
 
+# The RAG chain is built once and reused for every question
+_qa_chain = None
+
 # Create the RAG chain
 def create_rag_chain():
     """Create a RAG chain for question answering."""
@@ -91,14 +214,21 @@ def create_rag_chain():
     
     return qa_chain
 
+def get_rag_chain():
+    """Return the shared RAG chain, creating it on first use."""
+    global _qa_chain
+    if _qa_chain is None:
+        _qa_chain = create_rag_chain()
+    return _qa_chain
+
 def ask_question(question: str):
     """Ask a question and get an answer using RAG."""
     print(f"\n🔍 Question: {question}")
     print("-" * 50)
     
     try:
-        qa_chain = create_rag_chain()
-        result = qa_chain({"query": question})
+        qa_chain = get_rag_chain()
+        result = qa_chain.invoke({"query": question})
         
         print(f"💡 Answer: {result['result']}")
         print(f"\n📚 Sources used:")